@@ -0,0 +1,258 @@
+"""
+Micro-benchmark: precompiled classification tables (utils/classify.py)
+against the inline if/elif chains and word-set scans they replaced.
+
+Both versions run over the same synthetic elements; results are checked
+for equality before timing.
+
+    python bench_classify.py [--elements 5000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from utils.classify import (
+    ATTRACTION_SKIP, NEARBY_SKIP, WIKI_SKIP, TOURIST_WORDS,
+    attraction_type, attraction_quality, nearby_category, otm_attraction_type,
+)
+
+# ---------- the old inline code ----------
+OLD_ATTRACTION_SKIP = {"bus station", "railway station", "airport", "hospital", "school",
+                       "college", "university", "bank", "atm", "pharmacy", "gas station",
+                       "parking", "toilet", "bench", "post office", "police"}
+OLD_NEARBY_SKIP = {"bus station", "bus stop", "railway station", "airport", "hospital",
+                   "school", "college", "university", "bank", "atm", "pharmacy",
+                   "gas station", "petrol", "parking", "toilet", "post office", "police"}
+OLD_WIKI_SKIP = set(WIKI_SKIP.words)
+OLD_TOURIST_WORDS = set(TOURIST_WORDS.words)
+
+
+def old_overpass(elements):
+    out, seen = [], set()
+    for el in elements:
+        tags = el.get("tags", {})
+        name = tags.get("name", tags.get("name:en", "")).strip()
+        if not name or len(name) < 3 or name.lower() in seen:
+            continue
+        if any(sw in name.lower() for sw in OLD_ATTRACTION_SKIP):
+            continue
+        seen.add(name.lower())
+        tourism = tags.get("tourism", "")
+        historic = tags.get("historic", "")
+        amenity = tags.get("amenity", "")
+        osm_type = "attraction"
+        if "museum" in tourism or "gallery" in tourism:
+            osm_type = "museum"
+        elif historic in ("castle", "fort"):
+            osm_type = "fort"
+        elif historic in ("palace",):
+            osm_type = "palace"
+        elif historic in ("monument", "memorial"):
+            osm_type = "monument"
+        elif historic in ("ruins", "archaeological_site"):
+            osm_type = "historic"
+        elif amenity == "place_of_worship":
+            osm_type = "religious"
+        elif tourism == "viewpoint":
+            osm_type = "viewpoint"
+        elif "park" in tags.get("leisure", ""):
+            osm_type = "park"
+        wiki_title = tags.get("wikipedia", "").replace("en:", "").replace(" ", "_")
+        quality = 1
+        if wiki_title or tags.get("wikidata", ""):
+            quality += 3
+        if tags.get("website") or tags.get("url"):
+            quality += 1
+        if tags.get("description") or tags.get("description:en"):
+            quality += 1
+        if tourism in ("attraction", "museum", "zoo"):
+            quality += 2
+        if historic in ("castle", "fort", "palace", "ruins", "archaeological_site"):
+            quality += 2
+        if tags.get("heritage"):
+            quality += 2
+        out.append((name, osm_type, quality))
+    return out
+
+
+def old_nearby(elements):
+    out, seen = [], set()
+    for el in elements:
+        tags = el.get("tags", {})
+        name = tags.get("name", tags.get("name:en", "")).strip()
+        if not name or len(name) < 3 or name.lower() in seen:
+            continue
+        if any(sw in name.lower() for sw in OLD_NEARBY_SKIP):
+            continue
+        seen.add(name.lower())
+        tourism = tags.get("tourism", "")
+        historic = tags.get("historic", "")
+        amenity = tags.get("amenity", "")
+        leisure = tags.get("leisure", "")
+        natural_tag = tags.get("natural", "")
+        shop = tags.get("shop", "")
+        category, subcategory, quality_score = "attraction", "", 1
+        if amenity in ("restaurant", "cafe", "fast_food"):
+            category, subcategory, quality_score = "eating", amenity, 2
+        elif tourism in ("zoo", "theme_park", "aquarium"):
+            category, subcategory, quality_score = "recreation", tourism, 5
+        elif leisure in ("water_park", "amusement_arcade", "sports_centre", "stadium", "swimming_pool", "beach_resort"):
+            category, subcategory, quality_score = "recreation", leisure, 4
+        elif amenity in ("theatre", "cinema", "arts_centre"):
+            category, subcategory, quality_score = "recreation", amenity, 3
+        elif natural_tag in ("beach", "peak", "cave_entrance", "water"):
+            category, subcategory, quality_score = "nature", natural_tag, 4
+        elif leisure in ("park", "garden", "nature_reserve"):
+            category, subcategory, quality_score = "nature", leisure, 3
+        elif tourism in ("museum", "gallery"):
+            category, subcategory, quality_score = "culture", tourism, 4
+        elif historic:
+            category, subcategory, quality_score = "culture", historic, 4
+        elif amenity == "place_of_worship":
+            category, subcategory, quality_score = "culture", "temple", 3
+        elif shop:
+            category, subcategory, quality_score = "shopping", shop, 2
+        elif tourism in ("attraction", "viewpoint"):
+            category, subcategory, quality_score = "attraction", tourism, 4
+        if tags.get("wikipedia") or tags.get("wikidata"):
+            quality_score += 2
+        if tags.get("website") or tags.get("url"):
+            quality_score += 1
+        out.append((name, category, subcategory, quality_score))
+    return out
+
+
+def old_otm(places):
+    out = []
+    for place in places:
+        kinds = place.get("kinds", "")
+        osm_type = "attraction"
+        if "museum" in kinds: osm_type = "museum"
+        elif "castle" in kinds or "fort" in kinds: osm_type = "fort"
+        elif "palace" in kinds: osm_type = "palace"
+        elif "monument" in kinds or "memorial" in kinds: osm_type = "monument"
+        elif "historic" in kinds: osm_type = "historic"
+        elif "religion" in kinds or "church" in kinds or "temple" in kinds: osm_type = "religious"
+        elif "natural" in kinds or "beach" in kinds: osm_type = "hidden_gem"
+        elif "architecture" in kinds: osm_type = "architecture"
+        elif "garden" in kinds or "park" in kinds: osm_type = "park"
+        elif "theatre" in kinds or "amusement" in kinds: osm_type = "landmark"
+        out.append(osm_type)
+    return out
+
+
+def old_wiki(titles):
+    out = []
+    for title in titles:
+        title_lower = title.lower()
+        if any(sw in title_lower for sw in OLD_WIKI_SKIP):
+            continue
+        out.append((title, 5 if any(tw in title_lower for tw in OLD_TOURIST_WORDS) else 2))
+    return out
+
+
+# ---------- the same work on the precompiled tables ----------
+def new_overpass(elements):
+    out, seen = [], set()
+    for el in elements:
+        tags = el.get("tags", {})
+        name = tags.get("name", tags.get("name:en", "")).strip()
+        name_lower = name.lower()
+        if len(name) < 3 or name_lower in seen or ATTRACTION_SKIP(name_lower):
+            continue
+        seen.add(name_lower)
+        out.append((name, attraction_type(tags), attraction_quality(tags)))
+    return out
+
+
+def new_nearby(elements):
+    out, seen = [], set()
+    for el in elements:
+        tags = el.get("tags", {})
+        name = tags.get("name", tags.get("name:en", "")).strip()
+        name_lower = name.lower()
+        if len(name) < 3 or name_lower in seen or NEARBY_SKIP(name_lower):
+            continue
+        seen.add(name_lower)
+        out.append((name, *nearby_category(tags)))
+    return out
+
+
+def new_otm(places):
+    return [otm_attraction_type(place.get("kinds", "")) for place in places]
+
+
+def new_wiki(titles):
+    out = []
+    for title in titles:
+        title_lower = title.lower()
+        if WIKI_SKIP(title_lower):
+            continue
+        out.append((title, 5 if TOURIST_WORDS(title_lower) else 2))
+    return out
+
+
+# ---------- synthetic input ----------
+TAG_VALUES = {
+    "tourism": ["attraction", "museum", "gallery", "viewpoint", "zoo", "theme_park", "artwork", "museum;gallery"],
+    "historic": ["castle", "fort", "palace", "monument", "memorial", "ruins", "archaeological_site", "tomb"],
+    "amenity": ["place_of_worship", "restaurant", "cafe", "fast_food", "theatre", "cinema", "arts_centre", "bank"],
+    "leisure": ["park", "garden", "nature_reserve", "stadium", "water_park", "playground"],
+    "natural": ["beach", "peak", "cave_entrance", "water", "tree"],
+    "shop": ["mall", "department_store", "clothes"],
+}
+NAME_WORDS = ["Shri", "Old", "City", "Palace", "Temple", "Garden", "Lake", "Fort", "Gate", "Market",
+              "Museum", "Bank", "Bus Station", "Cafe", "Hawa", "Amber", "Jal", "Mahal", "School", "Tower"]
+OTM_KINDS = ["cultural,museums,interesting_places", "historic,fortifications,castles,interesting_places",
+             "religion,hindu_temples,interesting_places", "natural,beaches,interesting_places",
+             "architecture,towers,interesting_places", "amusements,theatres_and_entertainments",
+             "gardens_and_parks,urban_environment", "historic,monuments_and_memorials", "foods,restaurants"]
+
+
+def make_elements(n, rng):
+    elements = []
+    for i in range(n):
+        tags = {"name": " ".join(rng.sample(NAME_WORDS, rng.randint(1, 3))) + f" {i % 700}"}
+        for key in rng.sample(list(TAG_VALUES), rng.randint(1, 2)):
+            tags[key] = rng.choice(TAG_VALUES[key])
+        for extra in ("wikipedia", "website", "description", "heritage"):
+            if rng.random() < 0.2:
+                tags[extra] = "x"
+        elements.append({"type": "node", "id": i, "tags": tags})
+    return elements
+
+
+def bench(label, old, new, data, repeat):
+    assert old(data) == new(data), f"{label}: results differ"
+    t_old = min(_timed(old, data) for _ in range(repeat))
+    t_new = min(_timed(new, data) for _ in range(repeat))
+    print(f"{label:<22} old {t_old * 1000:8.2f} ms   new {t_new * 1000:8.2f} ms   x{t_old / t_new:4.1f}")
+
+
+def _timed(fn, data):
+    started = time.perf_counter()
+    fn(data)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--elements", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    elements = make_elements(args.elements, rng)
+    places = [{"kinds": rng.choice(OTM_KINDS)} for _ in range(args.elements)]
+    titles = [" ".join(rng.sample(NAME_WORDS, rng.randint(1, 3))) for _ in range(args.elements)]
+
+    print(f"{args.elements} elements, best of {args.repeat}")
+    bench("overpass attractions", old_overpass, new_overpass, elements, args.repeat)
+    bench("overpass nearby", old_nearby, new_nearby, elements, args.repeat)
+    bench("opentripmap kinds", old_otm, new_otm, places, args.repeat)
+    bench("wikipedia titles", old_wiki, new_wiki, titles, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: response serialisation time and bytes on the wire for
+/generate-trip, /nearby and /plan-halfday payloads.
+
+"before" is what FastAPI did for a plain dict return (jsonable_encoder, then
+the stock JSONResponse); "after" is FastJSONResponse (utils/responses.py).
+Payloads are built offline with the server's own itinerary helpers from
+synthetic attractions, at the sizes real cities produce.
+
+    python bench_responses.py [--days 7] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+import smartroute_server as server
+from utils.responses import FastJSONResponse, brotli, orjson
+
+TYPES = ["museum", "fort", "palace", "monument", "religious", "park", "viewpoint", "attraction"]
+
+
+def make_attractions(n, rng):
+    out = []
+    for i in range(n):
+        name = f"{rng.choice(['Amber', 'Hawa', 'Jal', 'City', 'Nahargarh', 'Albert'])} {rng.choice(TYPES).title()} {i}"
+        photos = [f"https://upload.wikimedia.org/wikipedia/commons/thumb/{i}/{k}/{name.replace(' ', '_')}.jpg/800px.jpg"
+                  for k in range(rng.randint(1, 3))]
+        out.append({
+            "name": name, "type": rng.choice(TYPES), "rating": round(3.8 + rng.random(), 1),
+            "price": rng.choice([0, 100, 200, 500]), "duration": rng.choice(["1 hour", "2 hours", "2-3 hours"]),
+            "lat": 26.9 + rng.uniform(-0.1, 0.1), "lon": 75.8 + rng.uniform(-0.1, 0.1),
+            "description": f"Visit {name} in Jaipur, one of the best known sights of the old city.",
+            "wiki": name.replace(" ", "_"), "quality": rng.randint(1, 9),
+            "photo": photos[0], "photos": photos,
+        })
+    return out
+
+
+def generate_trip_payload(days, rng):
+    request = server.TripRequest(destination="Jaipur", duration=days, budget=60000, start_date="2026-01-10")
+    attractions = make_attractions(days * 5, rng)
+    geo = {"lat": 26.91, "lon": 75.79}
+    trip_days = server._build_trip_days(attractions, request, geo, "Jaipur", [])
+    costs = server._trip_costs(trip_days, request.budget)
+    return {
+        "success": True,
+        "itinerary": {"days": trip_days, "total_cost": costs["total_cost"], "cities": ["Jaipur"]},
+        "bookings": {"hotels": [], "flights": [], "restaurants": []},
+        "budget_breakdown": costs["budget_breakdown"],
+        "budget_summary": costs["budget_summary"],
+        "weather_forecasts": [],
+        "language_tips": server.get_language_tips("Jaipur"),
+        "agent_summary": {"agents_used": 6, "tasks_completed": 1, "total_time": "1.2s"},
+        "metadata": server._trip_metadata(request, "Jaipur", None, attractions, trip_days, 1.2),
+    }
+
+
+def nearby_places(n, rng):
+    elements = [{"type": "node", "id": i, "lat": 26.9 + rng.uniform(-0.05, 0.05), "lon": 75.8 + rng.uniform(-0.05, 0.05),
+                 "tags": {"name": f"Place {i}", rng.choice(["tourism", "amenity", "leisure", "historic"]):
+                          rng.choice(["museum", "restaurant", "park", "fort", "cafe"]),
+                          "opening_hours": "Mo-Su 09:00-18:00", "website": f"https://example.org/{i}"}}
+                for i in range(n)]
+    seen = set()
+    places = [p for p in (server._overpass_nearby(el, seen, 26.9, 75.8) for el in elements) if p]
+    for p in places:
+        p["distance_m"] = rng.randint(50, 15000)
+    return places
+
+
+def nearby_payload(rng):
+    places = nearby_places(60, rng)
+    categorized = {}
+    for p in places:
+        categorized.setdefault(p["category"], []).append(p)
+    return {"success": True, "places": places, "categorized": categorized, "count": len(places),
+            "total_found": len(places), "radius_m": 5000, "coordinates": {"lat": 26.9, "lon": 75.8},
+            "resolved_location": "Jaipur, Rajasthan, India", "elapsed_seconds": 0.8}
+
+
+def halfday_payload(rng):
+    places = nearby_places(40, rng)
+    plan = [{"name": p["name"], "type": p["category"], "subcategory": p["subcategory"], "time": "10:00",
+             "duration": "1-2 hours", "cost": 200, "lat": p["lat"], "lon": p["lon"],
+             "distance_m": p["distance_m"], "description": p["description"], "photo": "",
+             "website": p["website"], "quality_score": p["quality_score"]} for p in places[:6]]
+    return {"success": True, "location": "Hawa Mahal", "coordinates": {"lat": 26.92, "lon": 75.82},
+            "display_name": "Hawa Mahal, Jaipur, Rajasthan, India", "city_extracted": "Jaipur",
+            "hours_available": 4, "time_of_day": "morning", "plan": plan, "total_activities": len(plan),
+            "estimated_hours": 4.0, "estimated_cost": 1200, "nearby_food": places[:5],
+            "nearby_attractions": places[6:16], "tips": ["Tap any place to get Google Maps directions"] * 5,
+            "elapsed_seconds": 1.1, "sources_used": {"nearby_overpass": 40, "wikipedia": 10, "opentripmap": 0}}
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench(label, payload, repeat):
+    before = best_of(lambda: JSONResponse(jsonable_encoder(payload)), repeat)
+    after = best_of(lambda: FastJSONResponse(payload), repeat)
+    body = FastJSONResponse(payload).body
+    gz = gzip.compress(body, compresslevel=6, mtime=0)
+    gz_ms = best_of(lambda: gzip.compress(body, compresslevel=6, mtime=0), repeat)
+    line = (f"{label:<15} serialise {before:7.2f} -> {after:6.2f} ms (x{before / after:4.1f})   "
+            f"wire {len(body) / 1024:7.1f} KB, gzip {len(gz) / 1024:6.1f} KB ({gz_ms:.2f} ms)")
+    if brotli is not None:
+        br = brotli.compress(body, quality=4)
+        line += f", br {len(br) / 1024:6.1f} KB"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'}, brotli: {'yes' if brotli else 'no'}")
+    bench("/generate-trip", generate_trip_payload(args.days, rng), args.repeat)
+    bench("/nearby", nearby_payload(rng), args.repeat)
+    bench("/plan-halfday", halfday_payload(rng), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Offline POI package initialization"""
+
+from .filters import (
+    TagFilter, ATTRACTION_FILTERS, NEARBY_FILTERS, INDOOR_FILTERS, merged_filters, to_overpass_ql,
+)
+from .store import POIStore, POIRegistry
+from .snapshot import POISnapshots
+
+__all__ = [
+    "TagFilter",
+    "ATTRACTION_FILTERS",
+    "NEARBY_FILTERS",
+    "INDOOR_FILTERS",
+    "merged_filters",
+    "to_overpass_ql",
+    "POIStore",
+    "POIRegistry",
+    "POISnapshots",
+]
@@ -0,0 +1,103 @@
+"""
+POI tag filters, shared by the live Overpass queries and the offline store
+
+Each filter is one `element["key"~"v1|v2"]` clause. Keeping them as data
+means the Overpass QL and the local query engine can never drift apart.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+
+@dataclass(frozen=True)
+class TagFilter:
+    """Matches elements of `element_types` whose `key` tag is one of `values`"""
+    key: str
+    values: Tuple[str, ...]
+    element_types: Tuple[str, ...] = ("node",)
+
+    def matches(self, element_type: str, tags: Dict[str, str]) -> bool:
+        if element_type not in self.element_types:
+            return False
+        value = tags.get(self.key)
+        if not value:
+            return False
+        # OSM multi-values are ';'-separated ("museum;gallery")
+        return any(v.strip() in self.values for v in value.split(";"))
+
+
+def _f(key: str, values: str, *types: str) -> TagFilter:
+    return TagFilter(key, tuple(values.split("|")), types or ("node",))
+
+
+# City-wide sightseeing (fetch_overpass_attractions)
+ATTRACTION_FILTERS: Tuple[TagFilter, ...] = (
+    _f("tourism", "attraction|museum|gallery|artwork|viewpoint|zoo"),
+    _f("historic", "castle|monument|memorial|ruins|fort|archaeological_site|palace"),
+    _f("amenity", "place_of_worship"),
+    _f("tourism", "attraction|museum|gallery", "way"),
+    _f("historic", "castle|monument|fort|palace", "way"),
+)
+
+# Everything worth suggesting around a live location (get_nearby_places)
+NEARBY_FILTERS: Tuple[TagFilter, ...] = (
+    _f("tourism", "attraction|museum|gallery|viewpoint|zoo|theme_park"),
+    _f("historic", "castle|monument|memorial|ruins|fort|palace"),
+    _f("amenity", "place_of_worship|restaurant|cafe|theatre|cinema"),
+    _f("leisure", "park|garden|nature_reserve|stadium"),
+    _f("natural", "beach|peak|cave_entrance"),
+    _f("tourism", "attraction|museum|zoo", "way"),
+    _f("leisure", "park|garden", "way"),
+)
+
+# Rain-proof alternatives for weather replanning (/replan)
+INDOOR_FILTERS: Tuple[TagFilter, ...] = (
+    _f("tourism", "museum|gallery"),
+    _f("amenity", "theatre|cinema|arts_centre"),
+    _f("shop", "mall|department_store"),
+)
+
+# Tags kept by the offline importer: the filter keys plus what the parsers read
+KEEP_TAGS = frozenset({
+    "name", "name:en", "tourism", "historic", "amenity", "leisure", "natural", "shop",
+    "wikipedia", "wikidata", "website", "url", "description", "description:en",
+    "opening_hours", "phone", "image", "fee", "charge",
+})
+
+
+def all_filters() -> List[TagFilter]:
+    return list(ATTRACTION_FILTERS + NEARBY_FILTERS + INDOOR_FILTERS)
+
+
+# Tag keys any filter tests: the only keys the offline store indexes
+FILTER_KEYS = frozenset(f.key for f in all_filters())
+
+
+def merged_filters(filters: Iterable[TagFilter]) -> List[TagFilter]:
+    """Same matches as `filters` with one clause per (key, element type) — a shorter superset query"""
+    values: Dict[Tuple[str, str], List[str]] = {}
+    for f in filters:
+        for etype in f.element_types:
+            bucket = values.setdefault((f.key, etype), [])
+            bucket.extend(v for v in f.values if v not in bucket)
+    return [TagFilter(key, tuple(vals), (etype,)) for (key, etype), vals in values.items()]
+
+
+def matches_any(filters: Iterable[TagFilter], element_type: str, tags: Dict[str, str]) -> bool:
+    return any(f.matches(element_type, tags) for f in filters)
+
+
+def to_overpass_ql(filters: Iterable[TagFilter], lat: float, lon: float, radius: int,
+                   limit: int = 60, timeout: int = 10) -> str:
+    """Overpass QL for `filters` around (lat, lon); ways come back with a center point"""
+    clauses = "\n".join(
+        f'      {etype}["{f.key}"~"{"|".join(f.values)}"](around:{radius},{lat},{lon});'
+        for f in filters for etype in f.element_types
+    )
+    return f"""
+    [out:json][timeout:{timeout}];
+    (
+{clauses}
+    );
+    out center {limit};
+    """
@@ -0,0 +1,226 @@
+"""
+Offline POI import
+
+Builds a POIStore `.npz` for one region from an OSM extract:
+
+  GeoJSON   FeatureCollection, e.g. from osmium-export or an Overpass "export"
+  PBF       .osm.pbf extracts (Geofabrik, BBBike) — needs the optional `osmium`
+            package (pip install osmium)
+
+Only named features matching one of the app's tag filters are kept, trimmed
+to the tags the parsers read, so a state-sized extract shrinks to a few MB.
+PBF features are filtered as they stream past, never held all at once.
+
+The extract's bounds are stored with the POIs (PBF header box, GeoJSON
+"bbox", or --bounds) so the server only answers queries that lie fully
+inside the extract.
+
+    python -m poi.importer data/tamil-nadu.geojson --region chennai
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .filters import KEEP_TAGS, all_filters, matches_any
+from .store import OSM_TYPES, POIStore
+
+try:  # PBF import needs the optional `osmium` (pyosmium) package
+    import osmium
+    HAS_OSMIUM = True
+except ImportError:
+    osmium = None
+    HAS_OSMIUM = False
+
+DEFAULT_POI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "poi")
+
+# (osm type, osm id, lat, lon, tags)
+Record = Tuple[str, int, float, float, Dict[str, str]]
+# (south, west, north, east)
+Bounds = Tuple[float, float, float, float]
+
+_FILTERS = all_filters()
+
+
+def _wanted(osm_type: str, tags: Any) -> bool:
+    """Named and matching a filter; `tags` only needs .get() (dict or osmium TagList)"""
+    if not (tags.get("name") or tags.get("name:en")):
+        return False
+    return matches_any(_FILTERS, osm_type, tags)
+
+
+def _keep(osm_type: str, tags: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """Trimmed tags when the feature is worth storing, else None"""
+    if not _wanted(osm_type, tags):
+        return None
+    return {k: str(v) for k, v in tags.items() if k in KEEP_TAGS}
+
+
+def _centroid(geometry: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a Point, or the vertex mean of a line/polygon"""
+    gtype, coords = geometry.get("type"), geometry.get("coordinates")
+    if not coords:
+        return None
+    if gtype == "Point":
+        return coords[1], coords[0]
+    # Flatten whatever nesting (LineString, Polygon, Multi*) down to [lon, lat] pairs
+    points: List = coords
+    while points and isinstance(points[0][0], list):
+        points = [p for part in points for p in part]
+    if not points:
+        return None
+    return (sum(p[1] for p in points) / len(points), sum(p[0] for p in points) / len(points))
+
+
+def _geojson_id(feature: Dict[str, Any], props: Dict[str, Any]) -> Tuple[str, int]:
+    # "node/123" (Overpass turbo, osmtogeojson) or "n123" / "w123" (osmium export)
+    raw = str(feature.get("id") or props.get("@id") or props.get("id") or "")
+    if "/" in raw:
+        kind, _, num = raw.partition("/")
+    elif raw[:1].isalpha():
+        kind, num = {"n": "node", "w": "way", "r": "relation"}.get(raw[:1], "node"), raw[1:]
+    else:
+        kind, num = "node", raw
+    try:
+        return (kind if kind in OSM_TYPES else "node"), int(num)
+    except ValueError:
+        return "node", 0
+
+
+def element_record(el: Dict[str, Any]) -> Optional[Record]:
+    """Trimmed record for one Overpass element (node, or way/relation with a center),
+    or None when it has no position or isn't worth storing"""
+    point = el if "lat" in el else el.get("center") or {}
+    if "lat" not in point or "lon" not in point:
+        return None
+    osm_type = el.get("type", "node")
+    kept = _keep(osm_type, el.get("tags") or {})
+    if kept is None:
+        return None
+    return osm_type, int(el.get("id", 0)), float(point["lat"]), float(point["lon"]), kept
+
+
+def geojson_bounds(data: Dict[str, Any]) -> Optional[Bounds]:
+    bbox = data.get("bbox")  # RFC 7946: [west, south, east, north]
+    if isinstance(bbox, list) and len(bbox) == 4:
+        return float(bbox[1]), float(bbox[0]), float(bbox[3]), float(bbox[2])
+    return None
+
+
+def read_geojson(path: str) -> Tuple[List[Record], Optional[Bounds]]:
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return list(_geojson_records(data)), geojson_bounds(data)
+
+
+def _geojson_records(data: Dict[str, Any]) -> Iterable[Record]:
+    for feature in data.get("features", []):
+        props = feature.get("properties") or {}
+        tags = props.get("tags") if isinstance(props.get("tags"), dict) else props
+        point = _centroid(feature.get("geometry") or {})
+        if point is None:
+            continue
+        osm_type, osm_id = _geojson_id(feature, props)
+        if osm_type == "node" and (feature.get("geometry") or {}).get("type") != "Point":
+            osm_type = "way"
+        yield osm_type, osm_id, point[0], point[1], tags
+
+
+def pbf_bounds(path: str) -> Optional[Bounds]:
+    """The extract's bounding box from the PBF header, if it has one"""
+    reader = osmium.io.Reader(path, osmium.osm.osm_entity_bits.NOTHING)
+    try:
+        box = reader.header().box()
+        if not box.valid():
+            return None
+        return box.bottom_left.lat, box.bottom_left.lon, box.top_right.lat, box.top_right.lon
+    finally:
+        reader.close()
+
+
+def _trimmed(tags: Any) -> Dict[str, str]:
+    return {t.k: t.v for t in tags if t.k in KEEP_TAGS}
+
+
+def read_pbf(path: str) -> Tuple[List[Record], Optional[Bounds]]:
+    if not HAS_OSMIUM:
+        raise RuntimeError("PBF import needs the `osmium` package: pip install osmium")
+
+    records: List[Record] = []
+
+    class _Handler(osmium.SimpleHandler):
+        # Filter while streaming: a country extract has millions of tagged objects
+        # and only a tiny fraction are POIs
+        def node(self, n):
+            if n.location.valid() and _wanted("node", n.tags):
+                records.append(("node", n.id, n.location.lat, n.location.lon, _trimmed(n.tags)))
+
+        def way(self, w):
+            if not _wanted("way", w.tags):
+                return
+            locs = [(nd.lat, nd.lon) for nd in w.nodes if nd.location.valid()]
+            if locs:
+                records.append(("way", w.id, sum(p[0] for p in locs) / len(locs),
+                                sum(p[1] for p in locs) / len(locs), _trimmed(w.tags)))
+
+    _Handler().apply_file(path, locations=True)
+    return records, pbf_bounds(path)
+
+
+def build_store(records: Iterable[Record], region: str, source: str = "",
+                bounds: Optional[Bounds] = None) -> POIStore:
+    lats, lons, ids, types, tags = [], [], [], [], []
+    seen = set()
+    for osm_type, osm_id, lat, lon, raw_tags in records:
+        kept = _keep(osm_type, raw_tags)
+        if kept is None or (osm_type, osm_id) in seen:
+            continue
+        seen.add((osm_type, osm_id))
+        lats.append(lat)
+        lons.append(lon)
+        ids.append(osm_id)
+        types.append(OSM_TYPES.index(osm_type))
+        tags.append(kept)
+    meta = {"source": os.path.basename(source), "imported_at": int(time.time())}
+    if bounds is not None:
+        meta["bounds"] = [float(b) for b in bounds]
+    return POIStore(region, lats, lons, ids, types, tags, meta)
+
+
+def import_file(path: str, region: str, out_dir: str = DEFAULT_POI_DIR,
+                bounds: Optional[Bounds] = None) -> str:
+    """Import `path` (GeoJSON or .pbf) and write `<out_dir>/<region>.npz`.
+    `bounds` overrides the extract's own; without either, the POIs' bbox is used."""
+    reader = read_pbf if path.endswith(".pbf") else read_geojson
+    records, extract_bounds = reader(path)
+    bounds = bounds or extract_bounds
+    if bounds is None:
+        print(f"  {path}: no extract bounds (pass --bounds); using the POIs' bounding box")
+    store = build_store(records, region, source=path, bounds=bounds)
+    out_path = os.path.join(out_dir, f"{region}.npz")
+    store.save(out_path)
+    return out_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import an OSM extract into an offline POI store")
+    parser.add_argument("path", help="GeoJSON FeatureCollection or .osm.pbf extract")
+    parser.add_argument("--region", required=True, help="region name (output file stem)")
+    parser.add_argument("--out-dir", default=os.getenv("POI_DATA_DIR", DEFAULT_POI_DIR))
+    parser.add_argument("--bounds", help="extract bounds as south,west,north,east")
+    args = parser.parse_args()
+
+    bounds = tuple(float(v) for v in args.bounds.split(",")) if args.bounds else None
+    if bounds is not None and len(bounds) != 4:
+        parser.error("--bounds needs four numbers: south,west,north,east")
+    started = time.perf_counter()
+    out_path = import_file(args.path, args.region, args.out_dir, bounds)
+    store = POIStore.load(out_path)
+    print(f"{store.region}: {len(store.lats)} POIs, bounds {store.bounds} -> {out_path} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+City POI snapshots
+
+Attractions, nearby search and indoor replan alternatives all ask Overpass
+about the same few kilometres with overlapping tag filters. A snapshot is
+one superset query (every filter in filters.py, merged) around a ~5 km grid
+cell, loaded into a POIStore; the three views are then local queries on it.
+A query is served from any cached snapshot whose circle fully contains the
+query circle, so a city's nearby searches and replans after the first trip
+plan cost no upstream calls.
+
+A miss never waits for the snapshot: the caller runs its own targeted query
+straight away while the cell's snapshot loads in the background (through
+the cache's refresh slots, at background priority). The superset answer is
+streamed and trimmed element by element, and the store is built on a
+worker thread.
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.cache import TTLCache, HOUR
+from utils.distance import haversine_m
+from utils.singleflight import SingleFlight
+from .filters import TagFilter, all_filters, merged_filters, to_overpass_ql
+from .importer import build_store, element_record
+from .store import POIStore
+
+SNAPSHOT_CELL_DEG = 0.05      # ~5.5 km cells
+SNAPSHOT_RADIUS_M = 20000     # any query up to 15 km from inside the cell fits
+SNAPSHOT_ELEMENT_LIMIT = 20000  # a snapshot that hits this is truncated, not a superset
+SNAPSHOT_QL_TIMEOUT = 25
+SNAPSHOT_MAX_BYTES = 256 * 1024 * 1024
+FAILED_CELL_BACKOFF = 300     # seconds before a failed cell is tried again
+
+_SKIPPED = ()  # parse result for elements that aren't kept (still counted for truncation)
+
+# (overpass ql, parse(element, seen), want, timeout) -> parse results; OverpassClient.collect
+Collect = Callable[[str, Callable[[Dict[str, Any], Set[str]], Any], Optional[int], float], Awaitable[List[Any]]]
+
+
+def snapshot_cell(lat: float, lon: float) -> Tuple[int, int]:
+    return (math.floor(lat / SNAPSHOT_CELL_DEG), math.floor(lon / SNAPSHOT_CELL_DEG))
+
+
+def snapshot_center(cell: Tuple[int, int]) -> Tuple[float, float]:
+    return ((cell[0] + 0.5) * SNAPSHOT_CELL_DEG, (cell[1] + 0.5) * SNAPSHOT_CELL_DEG)
+
+
+def _snapshot_record(el: Dict[str, Any], seen: Set[str]) -> Any:
+    return element_record(el) or _SKIPPED
+
+
+class POISnapshots:
+    """Cached superset snapshots keyed by grid cell, fetched once per cell"""
+
+    def __init__(self, collect: Collect, radius_m: float = SNAPSHOT_RADIUS_M, ttl: float = 24 * HOUR,
+                 soft_ttl: float = 6 * HOUR, maxsize: int = 48, max_bytes: int = SNAPSHOT_MAX_BYTES):
+        self.collect = collect
+        self.radius_m = radius_m
+        self.cache = TTLCache("poi_snapshots", maxsize=maxsize, ttl=ttl, soft_ttl=soft_ttl,
+                              max_bytes=max_bytes)
+        self.flight = SingleFlight("poi_snapshot")
+        self.filters = merged_filters(all_filters())
+        self._loading: Set[Tuple[int, int]] = set()
+        self._skip_until: Dict[Tuple[int, int], float] = {}  # failed/truncated cells: targeted queries only
+        self.local_hits = 0
+        self.cold_misses = 0
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.truncated = 0
+
+    def _covers(self, cell: Tuple[int, int], lat: float, lon: float, radius_m: float) -> bool:
+        clat, clon = snapshot_center(cell)
+        return haversine_m(clat, clon, lat, lon) + radius_m <= self.radius_m
+
+    def _nearby_cells(self, lat: float, lon: float) -> List[Tuple[int, int]]:
+        cy, cx = snapshot_cell(lat, lon)
+        return [(cy + dy, cx + dx) for dy in (0, -1, 1) for dx in (0, -1, 1)]
+
+    def _covering(self, lat: float, lon: float, radius_m: float) -> Optional[POIStore]:
+        for cell in self._nearby_cells(lat, lon):
+            store = self.cache.get(cell)
+            if store is not None and self._covers(cell, lat, lon, radius_m):
+                if self.cache.is_stale(cell):
+                    self.cache.revalidate(cell, lambda c=cell: self._load(c))
+                return store
+        return None
+
+    def _start_load(self, lat: float, lon: float, radius_m: float) -> None:
+        """Load the snapshot that would serve this query, in the background"""
+        cell = snapshot_cell(lat, lon)
+        if not self._covers(cell, lat, lon, radius_m):
+            return  # wider than a snapshot: targeted queries only
+        if any(c in self._loading and self._covers(c, lat, lon, radius_m) for c in self._nearby_cells(lat, lon)):
+            return  # a neighbouring cell's load in flight will cover us too
+        if self._skip_until.get(cell, 0) > time.monotonic():
+            return
+        self._loading.add(cell)  # visible to neighbours before the load task first runs
+        if not self.cache.revalidate(cell, lambda: self._load(cell)):
+            self._loading.discard(cell)  # refresh slots backed up; a later miss retries
+
+    async def _load(self, cell: Tuple[int, int]) -> Optional[POIStore]:
+        self._loading.add(cell)  # cleared when the fetch finishes
+        return await self.flight.do(cell, lambda: self._fetch_cell(cell))
+
+    async def _fetch_cell(self, cell: Tuple[int, int]) -> Optional[POIStore]:
+        lat, lon = snapshot_center(cell)
+        self.fetches += 1
+        ql = to_overpass_ql(self.filters, round(lat, 5), round(lon, 5), int(self.radius_m),
+                            limit=SNAPSHOT_ELEMENT_LIMIT, timeout=SNAPSHOT_QL_TIMEOUT)
+        try:
+            # Streamed: elements are trimmed to records as they arrive, never held whole
+            results = await self.collect(ql, _snapshot_record, None, SNAPSHOT_QL_TIMEOUT + 5)
+            if len(results) >= SNAPSHOT_ELEMENT_LIMIT:
+                # Overpass cut the answer short at an arbitrary point; local answers would miss places
+                self.truncated += 1
+                self._skip_until[cell] = time.monotonic() + self.cache.ttl
+                return None
+            records = [r for r in results if r is not _SKIPPED]
+            # Indexing ~20k POIs takes long enough to stall the event loop
+            store = await asyncio.to_thread(build_store, records, f"snapshot:{cell[0]},{cell[1]}", "overpass")
+        except Exception as e:
+            self.fetch_failures += 1
+            self._skip_until[cell] = time.monotonic() + FAILED_CELL_BACKOFF
+            print(f"  POI snapshot {cell} failed: {e}")
+            return None
+        finally:
+            self._loading.discard(cell)
+        self._skip_until.pop(cell, None)
+        self.cache.set(cell, store)
+        return store
+
+    def query(self, filters: Iterable[TagFilter], lat: float, lon: float, radius_m: float,
+              limit: int = 60) -> Optional[List[Dict[str, Any]]]:
+        """Elements from a cached snapshot covering the query circle; None on a miss (the
+        caller runs its own targeted query while the snapshot loads in the background)"""
+        store = self._covering(lat, lon, radius_m)
+        if store is None:
+            self.cold_misses += 1
+            self._start_load(lat, lon, radius_m)
+            return None
+        self.local_hits += 1
+        return store.query(filters, lat, lon, radius_m, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "radius_m": self.radius_m,
+            "snapshots": len(self.cache),
+            "bytes": self.cache.stats()["bytes"],
+            "local_hits": self.local_hits,
+            "cold_misses": self.cold_misses,
+            "loading": len(self._loading),
+            "fetches": self.fetches,
+            "fetch_failures": self.fetch_failures,
+            "truncated": self.truncated,
+        }
@@ -0,0 +1,212 @@
+"""
+Offline POI store and query engine
+
+A region's POIs live in columnar NumPy arrays (lat, lon, OSM id/type) plus
+one tag dict per POI. Two indexes answer queries without scanning:
+
+  tag index    (key, value) -> sorted POI indices
+  grid index   ~1 km cell   -> sorted POI indices
+
+A query intersects the tag hits with the cells covering the search circle,
+then measures the survivors in one vectorized haversine call. Results come
+back as Overpass-style elements so the existing parsers consume them as-is.
+
+Files are `.npz` archives (see importer.py for building them). A store
+only answers queries whose whole circle lies inside the extract's bounds
+(meta["bounds"], falling back to the POIs' bounding box), so a search near
+a region's edge goes upstream instead of coming back half empty.
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cache import approx_size
+from utils.distance import one_to_many
+from .filters import FILTER_KEYS, TagFilter
+
+FORMAT_VERSION = 1
+OSM_TYPES = ("node", "way", "relation")
+GRID_CELL_DEG = 0.01  # ~1.1 km
+
+
+class POIStore:
+    """One imported region, fully in memory"""
+
+    def __init__(self, region: str, lats: np.ndarray, lons: np.ndarray, ids: np.ndarray,
+                 types: np.ndarray, tags: List[Dict[str, str]], meta: Optional[Dict[str, Any]] = None):
+        self.region = region
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.types = np.asarray(types, dtype=np.uint8)
+        self.tags = tags
+        self.meta = meta or {}
+        self.queries = 0
+        if len(self.lats):
+            self.bbox = (float(self.lats.min()), float(self.lons.min()),
+                         float(self.lats.max()), float(self.lons.max()))
+        else:
+            self.bbox = (0.0, 0.0, 0.0, 0.0)
+        # (south, west, north, east) of the extract itself; POIs rarely reach its edges
+        self.bounds = tuple(self.meta["bounds"]) if self.meta.get("bounds") else self.bbox
+        self._build_indexes()
+        self.nbytes = self._estimate_nbytes()
+
+    def __sizeof__(self) -> int:
+        # What a TTLCache with max_bytes charges for holding this store
+        return self.nbytes
+
+    def _estimate_nbytes(self) -> int:
+        arrays = self.lats.nbytes + self.lons.nbytes + self.ids.nbytes + self.types.nbytes
+        index = sum(v.nbytes + 100 for v in self._tag_index.values()) + \
+            sum(v.nbytes + 100 for v in self._grid.values())
+        return arrays + index + approx_size(self.tags)
+
+    # ---------- indexes ----------
+    def _build_indexes(self) -> None:
+        tag_index: Dict[Tuple[str, str], List[int]] = {}
+        for i, tags in enumerate(self.tags):
+            for key, value in tags.items():
+                if key not in FILTER_KEYS:
+                    continue  # names, websites, ... are never queried by value
+                for v in value.split(";"):
+                    tag_index.setdefault((key, v.strip()), []).append(i)
+        self._tag_index = {k: np.array(v, dtype=np.int64) for k, v in tag_index.items()}
+
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        cy = np.floor(self.lats / GRID_CELL_DEG).astype(np.int64)
+        cx = np.floor(self.lons / GRID_CELL_DEG).astype(np.int64)
+        for i, cell in enumerate(zip(cy.tolist(), cx.tolist())):
+            grid.setdefault(cell, []).append(i)
+        self._grid = {k: np.array(v, dtype=np.int64) for k, v in grid.items()}
+
+    def _tag_candidates(self, filters: Iterable[TagFilter]) -> np.ndarray:
+        hits = []
+        for f in filters:
+            type_codes = [OSM_TYPES.index(t) for t in f.element_types if t in OSM_TYPES]
+            for value in f.values:
+                idx = self._tag_index.get((f.key, value))
+                if idx is not None and len(idx):
+                    hits.append(idx[np.isin(self.types[idx], type_codes)])
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits))
+
+    def _grid_candidates(self, lat: float, lon: float, radius_m: float) -> np.ndarray:
+        dlat = radius_m / 111320.0
+        dlon = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+        y0, y1 = math.floor((lat - dlat) / GRID_CELL_DEG), math.floor((lat + dlat) / GRID_CELL_DEG)
+        x0, x1 = math.floor((lon - dlon) / GRID_CELL_DEG), math.floor((lon + dlon) / GRID_CELL_DEG)
+        if (y1 - y0 + 1) * (x1 - x0 + 1) > len(self._grid):
+            cells = [v for (y, x), v in self._grid.items() if y0 <= y <= y1 and x0 <= x <= x1]
+        else:
+            cells = [self._grid[(y, x)] for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)
+                     if (y, x) in self._grid]
+        if not cells:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(cells))
+
+    # ---------- queries ----------
+    def covers(self, lat: float, lon: float, radius_m: float = 0.0) -> bool:
+        """True when the whole search circle lies inside the extract's bounds"""
+        south, west, north, east = self.bounds
+        dlat = radius_m / 111320.0
+        dlon = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+        return south <= lat - dlat and lat + dlat <= north and west <= lon - dlon and lon + dlon <= east
+
+    def query(self, filters: Iterable[TagFilter], lat: float, lon: float, radius_m: float,
+              limit: int = 60) -> List[Dict[str, Any]]:
+        """Overpass-style elements matching any filter within radius_m, nearest first"""
+        self.queries += 1
+        candidates = np.intersect1d(self._tag_candidates(filters),
+                                    self._grid_candidates(lat, lon, radius_m), assume_unique=True)
+        if not len(candidates):
+            return []
+        dists = one_to_many(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = dists <= radius_m
+        candidates, dists = candidates[keep], dists[keep]
+        order = np.argsort(dists, kind="stable")[:limit]
+        return [self._element(int(i)) for i in candidates[order]]
+
+    def _element(self, i: int) -> Dict[str, Any]:
+        osm_type = OSM_TYPES[int(self.types[i])]
+        element = {"type": osm_type, "id": int(self.ids[i]), "tags": dict(self.tags[i])}
+        point = {"lat": float(self.lats[i]), "lon": float(self.lons[i])}
+        if osm_type == "node":
+            element.update(point)
+        else:
+            element["center"] = point  # same shape as Overpass `out center`
+        return element
+
+    # ---------- persistence ----------
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = dict(self.meta, region=self.region, version=FORMAT_VERSION, count=len(self.lats))
+        tags_blob = json.dumps(self.tags, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh, lats=self.lats, lons=self.lons, ids=self.ids, types=self.types,
+                tags=np.frombuffer(tags_blob, dtype=np.uint8),
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "POIStore":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported POI store version {meta.get('version')}")
+            tags = json.loads(data["tags"].tobytes().decode("utf-8"))
+            return cls(meta["region"], data["lats"], data["lons"], data["ids"], data["types"], tags, meta)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pois": len(self.lats), "bbox": self.bbox, "bounds": self.bounds, "queries": self.queries,
+                "source": self.meta.get("source", ""), "imported_at": self.meta.get("imported_at")}
+
+
+class POIRegistry:
+    """All regions loaded from a directory; picks the one covering a query point"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.regions: Dict[str, POIStore] = {}
+        self.local_hits = 0
+        self.misses = 0
+
+    def load_all(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                store = POIStore.load(os.path.join(self.directory, name))
+                self.regions[store.region] = store
+            except Exception as e:
+                print(f"  POI region {name} failed to load: {e}")
+        return len(self.regions)
+
+    def region_for(self, lat: float, lon: float, radius_m: float = 0.0) -> Optional[POIStore]:
+        # Smallest region containing the circle wins (a city extract over a state extract)
+        covering = [s for s in self.regions.values() if s.covers(lat, lon, radius_m)]
+        if not covering:
+            return None
+        return min(covering, key=lambda s: (s.bounds[2] - s.bounds[0]) * (s.bounds[3] - s.bounds[1]))
+
+    def query(self, filters: Iterable[TagFilter], lat: float, lon: float, radius_m: float,
+              limit: int = 60) -> Optional[List[Dict[str, Any]]]:
+        """Elements from a loaded region, or None when no region covers the search circle"""
+        store = self.region_for(lat, lon, radius_m)
+        if store is None:
+            self.misses += 1
+            return None
+        self.local_hits += 1
+        return store.query(filters, lat, lon, radius_m, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": self.directory, "local_hits": self.local_hits, "misses": self.misses,
+                "regions": {name: s.stats() for name, s in self.regions.items()}}
@@ -0,0 +1,9 @@
+"""Routing package initialization"""
+
+from .itinerary import ItineraryOptimizer, DayRoute, estimate_travel
+
+__all__ = [
+    "ItineraryOptimizer",
+    "DayRoute",
+    "estimate_travel",
+]
@@ -0,0 +1,216 @@
+"""
+Itinerary route optimisation
+
+Splits a trip's attractions into geographically compact days with
+capacity-constrained k-means, then orders each day's stops as an open path
+from the day's start point: nearest-neighbour construction followed by 2-opt
+and Or-opt improvement over a precomputed distance matrix. Sized for the
+15-50 POIs a trip uses; a full plan takes a few milliseconds.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.distance import distance_matrix
+
+# Haversine understates street distance; typical urban detour factor
+ROAD_DETOUR_FACTOR = 1.3
+WALK_MAX_M = 1200          # legs up to this (road) length are walked
+WALK_KMPH = 4.5
+CITY_DRIVE_KMPH = 22.0     # auto/cab average in Indian city traffic
+DRIVE_OVERHEAD_MIN = 5     # finding/boarding a ride, parking
+
+
+def estimate_travel(distance_m: float) -> Dict[str, float]:
+    """Straight-line metres -> {"distance_km", "minutes", "mode"} for one leg"""
+    road_m = distance_m * ROAD_DETOUR_FACTOR
+    if road_m <= WALK_MAX_M:
+        minutes = road_m / 1000 / WALK_KMPH * 60
+        mode = "walk"
+    else:
+        minutes = road_m / 1000 / CITY_DRIVE_KMPH * 60 + DRIVE_OVERHEAD_MIN
+        mode = "drive"
+    return {"distance_km": round(road_m / 1000, 2), "minutes": int(round(minutes)), "mode": mode}
+
+
+@dataclass
+class DayRoute:
+    """Ordered stops (indices into the input list) and the leg lengths in metres.
+
+    legs_m[i] is the straight-line distance into stops[i] from the previous stop
+    (or from the start point for the first stop, 0 when there is no start).
+    """
+    stops: List[int] = field(default_factory=list)
+    legs_m: List[float] = field(default_factory=list)
+
+    @property
+    def total_m(self) -> float:
+        return float(sum(self.legs_m))
+
+
+class ItineraryOptimizer:
+    """Clusters POIs into days and solves a small open-path TSP per day"""
+
+    def __init__(self, kmeans_iterations: int = 12, or_opt_max_segment: int = 3):
+        self.kmeans_iterations = kmeans_iterations
+        self.or_opt_max_segment = or_opt_max_segment
+
+    # ---------- public ----------
+    def plan(self, points: Sequence[Tuple[float, float]], n_days: int, per_day: int,
+             start: Optional[Tuple[float, float]] = None,
+             weights: Optional[Sequence[float]] = None) -> List[DayRoute]:
+        """Split `points` into `n_days` routes of at most `per_day` stops.
+
+        `weights` (e.g. quality scores) only decide which day comes first: the
+        day holding the most valuable cluster is day 1. Days may be empty when
+        there are fewer points than days.
+        """
+        n = len(points)
+        if n == 0 or n_days <= 0:
+            return [DayRoute() for _ in range(max(n_days, 0))]
+
+        # Node 0 is the start point (city centre / hotel) when given
+        coords = ([start] if start else []) + list(points)
+        lats = [c[0] for c in coords]
+        lons = [c[1] for c in coords]
+        dist = distance_matrix(lats, lons)
+        offset = 1 if start else 0
+
+        labels = self._cluster(np.array(lats[offset:]), np.array(lons[offset:]),
+                               n_days, max(per_day, -(-n // n_days)))
+
+        d = dist.tolist()
+        routes = []
+        for k in range(n_days):
+            members = [i + offset for i in range(n) if labels[i] == k]
+            path = self._order(d, members, 0 if start else None)
+            legs = [d[path[i - 1]][path[i]] if i > 0 else (d[0][path[0]] if start else 0.0)
+                    for i in range(len(path))]
+            routes.append(DayRoute(stops=[p - offset for p in path], legs_m=legs))
+
+        w = list(weights) if weights is not None else [1.0] * n
+        routes.sort(key=lambda r: -sum(w[i] for i in r.stops) if r.stops else 0)
+        return routes
+
+    # ---------- clustering ----------
+    def _cluster(self, lats: np.ndarray, lons: np.ndarray, k: int, capacity: int) -> List[int]:
+        """Capacity-constrained k-means on a local equirectangular projection"""
+        n = lats.shape[0]
+        k = min(k, n)
+        scale = np.cos(np.radians(lats.mean()))
+        xy = np.column_stack((lats, lons * scale))
+
+        # Deterministic farthest-point seeding (k-means++ without the dice)
+        centers = [xy[0]]
+        nearest = ((xy - xy[0]) ** 2).sum(axis=1)
+        for _ in range(1, k):
+            nxt = int(nearest.argmax())
+            centers.append(xy[nxt])
+            nearest = np.minimum(nearest, ((xy - xy[nxt]) ** 2).sum(axis=1))
+        centers = np.array(centers)
+
+        labels = [-1] * n
+        for _ in range(self.kmeans_iterations):
+            sq = ((xy[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            # Greedy capacitated assignment: closest (point, centre) pairs first
+            new_labels = [-1] * n
+            load = [0] * k
+            for flat in np.argsort(sq, axis=None, kind="stable").tolist():
+                i, c = divmod(flat, k)
+                if new_labels[i] == -1 and load[c] < capacity:
+                    new_labels[i] = c
+                    load[c] += 1
+            if new_labels == labels:
+                break
+            labels = new_labels
+            for c in range(k):
+                members = [i for i in range(n) if labels[i] == c]
+                if members:
+                    centers[c] = xy[members].mean(axis=0)
+        return labels
+
+    # ---------- ordering ----------
+    def _order(self, d: List[List[float]], members: List[int], start: Optional[int]) -> List[int]:
+        """Open path over `members`, anchored at `start` if given; start not returned"""
+        if len(members) <= 1:
+            return list(members)
+
+        # Nearest-neighbour construction
+        remaining = set(members)
+        if start is None:
+            # No anchor: an outlying stop (largest total distance) makes a good path end
+            current = max(members, key=lambda m: sum(d[m][o] for o in members))
+            path = [current]
+            remaining.discard(current)
+        else:
+            current, path = start, [start]
+        while remaining:
+            current = min(remaining, key=lambda m: d[current][m])
+            path.append(current)
+            remaining.discard(current)
+
+        fixed = 1 if start is not None else 0
+        improved = True
+        while improved:
+            improved = self._two_opt(d, path, fixed) | self._or_opt(d, path, fixed)
+        return path[1:] if start is not None else path
+
+    @staticmethod
+    def _two_opt(d: List[List[float]], path: List[int], fixed: int) -> bool:
+        """Reverse path[i..j] while it shortens the open path; edits in place"""
+        n = len(path)
+        any_change = False
+        improved = True
+        while improved:
+            improved = False
+            for i in range(fixed, n - 1):
+                for j in range(i + 1, n):
+                    before = (d[path[i - 1]][path[i]] if i > 0 else 0.0) + \
+                             (d[path[j]][path[j + 1]] if j + 1 < n else 0.0)
+                    after = (d[path[i - 1]][path[j]] if i > 0 else 0.0) + \
+                            (d[path[i]][path[j + 1]] if j + 1 < n else 0.0)
+                    if after < before - 1e-6:
+                        path[i:j + 1] = reversed(path[i:j + 1])
+                        improved = any_change = True
+        return any_change
+
+    def _or_opt(self, d: List[List[float]], path: List[int], fixed: int) -> bool:
+        """Move segments of 1..3 stops (optionally reversed) to a cheaper position.
+        Each move is priced from the edges it breaks and adds, O(1) per candidate."""
+        any_change = False
+        for seg_len in range(1, self.or_opt_max_segment + 1):
+            i = fixed
+            while i + seg_len <= len(path):
+                n = len(path)
+                first, last = path[i], path[i + seg_len - 1]
+                prev = path[i - 1] if i > 0 else None
+                nxt = path[i + seg_len] if i + seg_len < n else None
+                # Cutting the segment out: drop its two outer edges, bridge prev -> nxt
+                removed = (d[prev][first] if prev is not None else 0.0) + \
+                          (d[last][nxt] if nxt is not None else 0.0) - \
+                          (d[prev][nxt] if prev is not None and nxt is not None else 0.0)
+                forward = sum(d[path[k]][path[k + 1]] for k in range(i, i + seg_len - 1))
+                backward = sum(d[path[k + 1]][path[k]] for k in range(i, i + seg_len - 1))
+                rest_len = n - seg_len
+                best, best_delta = None, -1e-6
+                for pos in range(fixed, rest_len + 1):
+                    # rest = path without the segment; insert between rest[pos - 1] and rest[pos]
+                    a = path[pos - 1 if pos <= i else pos - 1 + seg_len] if pos > 0 else None
+                    b = path[pos if pos < i else pos + seg_len] if pos < rest_len else None
+                    bridge = d[a][b] if a is not None and b is not None else 0.0
+                    for head, tail, internal, rev in ((first, last, forward, False), (last, first, backward, True)):
+                        delta = (d[a][head] if a is not None else 0.0) + \
+                                (d[tail][b] if b is not None else 0.0) - bridge + \
+                                internal - forward - removed
+                        if delta < best_delta:
+                            best, best_delta = (pos, rev), delta
+                if best is not None:
+                    pos, rev = best
+                    segment = path[i:i + seg_len]
+                    rest = path[:i] + path[i + seg_len:]
+                    path[:] = rest[:pos] + (segment[::-1] if rev else segment) + rest[pos:]
+                    any_change = True
+                i += 1
+        return any_change
@@ -11,22 +11,49 @@ Smart Route SRMist - Agentic AI Travel Planner
 - Origin-to-destination routing from user's location
 """
 
-import os, asyncio, json, random, math, httpx, time, re
-from typing import Dict, List, Optional, Any
+import os, asyncio, json, random, math, time, re
+from typing import Dict, List, Optional, Any, Callable, Sequence, Tuple
 from datetime import datetime, timedelta
 from urllib.parse import quote, unquote
 from enum import Enum
 from dataclasses import dataclass, asdict
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
 from dotenv import load_dotenv
 load_dotenv()
 
+from utils.http_client import HTTPClientPool
+from utils.overpass import OverpassClient
+from utils.geocoder import Geocoder, query_variants
+from utils.gazetteer import Gazetteer
+from utils.places import resolve_place, trip_city
+from utils.json_stream import iter_json_array, take
+from utils.media import MEDIA_TEMPLATES, MEDIA_TEMPLATES_VERSION, activity_id, expand_media, wiki_title
+from utils.responses import FastJSONResponse, CompressionMiddleware, compression_stats, dumps as dumps_json
+from utils.classify import (
+    ATTRACTION_SKIP, OTM_SKIP, NEARBY_SKIP, WIKI_SKIP, WIKI_NEARBY_SKIP, TOURIST_WORDS,
+    attraction_type, attraction_quality, nearby_category, otm_attraction_type, otm_nearby_category,
+)
+from utils.circuit_breaker import CircuitBreaker, breaker_stats
+from utils.rate_limit import background_priority
+from utils.cache import TTLCache, cache_stats, cancel_cache_refreshes, MINUTE, HOUR, DAY
+from utils.singleflight import SingleFlight, singleflight_stats
+from utils.persistent_cache import SQLiteStore
+from utils.city_pack import CityPackStore
+from utils.weather import ForecastColumns, weather_cell, cell_center, FORECAST_DAYS
+from utils.spatial import SpatialIndex, dedupe_by_location
+from utils.distance import haversine_m
+from routing import ItineraryOptimizer, estimate_travel
+from poi import POIRegistry, POISnapshots, ATTRACTION_FILTERS, NEARBY_FILTERS, INDOOR_FILTERS, to_overpass_ql
+
+MB = 1024 * 1024
+
 # ============================================
 # Configuration
 # ============================================
@@ -36,332 +63,447 @@ PEXELS_API_KEY = os.getenv("PEXELS_API_KEY", "563492ad6f917000010000017c5c7f53e8
 
 HEADERS = {"User-Agent": "SmartRouteAI/1.0 (travel planner; srmist project)"}
 
+# ============================================
+# SHARED HTTP CLIENT (one keep-alive pool per upstream host)
+# ============================================
+UPSTREAM_HOSTS = [
+    "nominatim.openstreetmap.org",
+    "overpass-api.de",
+    "overpass.kumi.systems",
+    "api.opentripmap.com",
+    "en.wikipedia.org",
+    "api.open-meteo.com",
+]
+
+# One circuit breaker per upstream provider: a provider that is down, rate-limiting us
+# or rejecting our key is skipped instantly instead of costing every request a timeout
+BREAKERS_BY_HOST = {
+    "nominatim.openstreetmap.org": CircuitBreaker("nominatim", failure_threshold=3, rate_limit_recovery_seconds=120),
+    "overpass-api.de": CircuitBreaker("overpass-api.de"),
+    "overpass.kumi.systems": CircuitBreaker("overpass.kumi.systems"),
+    "api.opentripmap.com": CircuitBreaker("opentripmap"),
+    "en.wikipedia.org": CircuitBreaker("wikipedia"),
+    "api.open-meteo.com": CircuitBreaker("open-meteo"),
+}
+
+def provider_down(host: str) -> bool:
+    """True while the provider's breaker is rejecting calls (skip it, don't wait on it)"""
+    breaker = BREAKERS_BY_HOST.get(host)
+    return breaker is not None and breaker.is_open()
+
+http_pool = HTTPClientPool(
+    headers=HEADERS,
+    max_connections_per_host=int(os.getenv("HTTP_MAX_CONN_PER_HOST", "10")),
+    max_keepalive_per_host=int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "5")),
+    keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30")),
+    host_overrides={
+        # Nominatim's usage policy: keep it to a couple of connections
+        "nominatim.openstreetmap.org": {"max_connections": 2, "max_keepalive": 2},
+        # Overpass queries are slow server-side; don't hog their slots
+        "overpass-api.de": {"max_connections": 4, "max_keepalive": 2},
+        "overpass.kumi.systems": {"max_connections": 4, "max_keepalive": 2},
+    },
+    breakers=BREAKERS_BY_HOST,
+    rate_limits={
+        # Nominatim usage policy: an absolute maximum of 1 request per second
+        "nominatim.openstreetmap.org": {"rate": float(os.getenv("NOMINATIM_RATE_PER_S", "1.0")), "burst": 1},
+        # OpenTripMap free tier: 10 req/s per key; stay well under it
+        "api.opentripmap.com": {"rate": 5.0, "burst": 5},
+    },
+)
+
+# All Overpass QL goes through one hedged client so mirror latency stats are shared
+overpass = OverpassClient(
+    http_pool,
+    mirrors=["https://overpass-api.de/api/interpreter", "https://overpass.kumi.systems/api/interpreter"],
+    hedge_quantile=float(os.getenv("OVERPASS_HEDGE_QUANTILE", "0.95")),
+)
+
+# Known destinations resolve in-process; only unknown places reach Nominatim
+gazetteer = Gazetteer()
+
+# Query variants raced against Nominatim (two at a time, matching its connection cap above)
+geocoder = Geocoder(http_pool, max_parallel=2)
+
+# Imported OSM extracts (python -m poi.importer); hot cities are answered locally instead of via Overpass
+POI_DATA_DIR = os.getenv("POI_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "poi"))
+poi_registry = POIRegistry(POI_DATA_DIR)
+
+# One superset Overpass query per ~5 km cell, shared by attractions, nearby search and indoor replans;
+# loaded in the background through the same hedged, streamed path as targeted queries
+poi_snapshots = POISnapshots(overpass.collect)
+
+async def poi_query(filters, lat: float, lon: float, radius: int, limit: int = 60,
+                    timeout: float = 10, ql_timeout: Optional[int] = None) -> Dict[str, Any]:
+    """Overpass-shaped {"elements": [...]}: offline store if a region covers (lat, lon), else a
+    cached city snapshot, else a targeted live query"""
+    elements = poi_registry.query(filters, lat, lon, radius, limit)
+    if elements is None:
+        elements = poi_snapshots.query(filters, lat, lon, radius, limit)
+    if elements is not None:
+        return {"elements": elements}
+    ql = to_overpass_ql(filters, lat, lon, radius, limit=limit, timeout=int(ql_timeout or timeout))
+    return await overpass.query(ql, timeout=timeout)
+
+async def poi_collect(filters, lat: float, lon: float, radius: int, parse: Callable[[Dict, set], Any],
+                      want: int, limit: int = 60, timeout: float = 10,
+                      ql_timeout: Optional[int] = None) -> List[Any]:
+    """poi_query, but runs `parse(element, seen)` per element and keeps up to `want` results.
+    A live answer is parsed as it streams in and the download stops once `want` are kept."""
+    elements = poi_registry.query(filters, lat, lon, radius, limit)
+    if elements is None:
+        elements = poi_snapshots.query(filters, lat, lon, radius, limit)
+    if elements is not None:
+        return await take(elements, parse, want)
+    ql = to_overpass_ql(filters, lat, lon, radius, limit=limit, timeout=int(ql_timeout or timeout))
+    return await overpass.collect(ql, parse, want, timeout=timeout)
+
 # ============================================
 # CACHES
 # ============================================
-_photo_cache: Dict[str, str] = {}
-_geo_cache: Dict[str, Dict] = {}
-_attraction_cache: Dict[str, List[Dict]] = {}  # city -> attractions
-_language_cache: Dict[str, Dict] = {}
+# Bounded + TTL'd so long-running workers neither leak nor serve stale data forever
+_photo_cache = TTLCache("photo", maxsize=5000, ttl=7 * DAY, max_bytes=4 * MB)
+_geo_cache = TTLCache("geo", maxsize=5000, ttl=30 * DAY, max_bytes=8 * MB, policy="lfu")
+# Attractions and weather are stale-while-revalidate: served instantly past soft_ttl while a
+# background refresh runs; callers only block on a fetch once the hard ttl is gone too
+_attraction_cache = TTLCache("attractions", maxsize=500, ttl=DAY, soft_ttl=6 * HOUR,
+                             max_bytes=32 * MB, policy="lfu")  # city -> attractions
+_language_cache = TTLCache("language", maxsize=1000, ttl=7 * DAY, max_bytes=2 * MB)
+_weather_cache = TTLCache("weather", maxsize=2000, ttl=3 * HOUR, soft_ttl=30 * MINUTE, max_bytes=4 * MB)  # grid cell -> ForecastColumns
+_attraction_sources = TTLCache("attraction_sources", maxsize=500, ttl=6 * HOUR)  # city -> sources that made the cut
+_activity_cache = TTLCache("activities", maxsize=20000, ttl=DAY, max_bytes=8 * MB)  # activity id -> canonical fields for /activity/{id}/media
+
+# Second tier on disk (SQLite WAL) so restarts and sibling workers start warm
+PERSISTENT_CACHE_ENABLED = os.getenv("PERSISTENT_CACHE", "1") != "0"
+PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "smartroute_cache.sqlite3"))
+PERSISTENT_WARM_LIMIT = int(os.getenv("PERSISTENT_WARM_LIMIT", "200"))
+_persistent_store: Optional[SQLiteStore] = None
+
+async def open_persistent_cache() -> None:
+    """Attach the on-disk store to the geocode/attraction/photo caches and warm them"""
+    global _persistent_store
+    if not PERSISTENT_CACHE_ENABLED:
+        return
+    store = SQLiteStore(PERSISTENT_CACHE_PATH)
+    try:
+        await store.open()
+    except Exception as e:
+        print(f"  Persistent cache unavailable ({e}) — running memory-only")
+        return
+    _persistent_store = store
+    for cache in (_geo_cache, _attraction_cache, _photo_cache):
+        cache.attach_store(store)
+        loaded = await cache.warm(PERSISTENT_WARM_LIMIT)
+        print(f"  Warm start: {loaded} hot '{cache.namespace}' entries loaded")
+
+async def close_persistent_cache() -> None:
+    global _persistent_store
+    if _persistent_store is None:
+        return
+    for cache in (_geo_cache, _attraction_cache, _photo_cache):
+        cache.attach_store(None)
+    await _persistent_store.close()
+    _persistent_store = None
+
+# Latency budget for the three-source attraction fan-out; late sources finish in the background
+ATTRACTION_DEADLINE_SECONDS = float(os.getenv("ATTRACTION_DEADLINE_SECONDS", "4.0"))
+
+# Fire-and-forget work (late-source folding, ...) — strong refs so tasks aren't GC'd mid-flight
+_background_tasks: set = set()
+
+def _spawn_background(coro) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def cancel_background_tasks() -> None:
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+# Precomputed per-city attraction packs (see build_city_pack); served before any upstream call
+CITY_PACK_DIR = os.getenv("CITY_PACK_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "city_packs"))
+CITY_PACK_REFRESH_HOURS = float(os.getenv("CITY_PACK_REFRESH_HOURS", "24"))
+# Opt-in: each build hits every free upstream API; with several workers only one warms (file lock)
+CITY_PACK_WARMER = os.getenv("CITY_PACK_WARMER", "0") == "1"
+# Comma-separated override; default is every DESTINATION_DATABASE entry plus the SRM home city
+CITY_PACK_CITIES = [c.strip() for c in os.getenv("CITY_PACK_CITIES", "").split(",") if c.strip()]
+city_packs = CityPackStore(CITY_PACK_DIR, max_age_seconds=CITY_PACK_REFRESH_HOURS * HOUR)
+
+# Concurrent identical lookups share one upstream fetch
+_photo_flight = SingleFlight("photo")
+_geo_flight = SingleFlight("geo")
+_attraction_flight = SingleFlight("attractions")
+_ranked_flight = SingleFlight("attractions_ranked")
+_nearby_flight = SingleFlight("nearby")
+_weather_flight = SingleFlight("weather")
 
 # ============================================
 # PHOTO FETCHING
 # ============================================
+WIKI_TITLES_PER_QUERY = 50      # MediaWiki limit for titles=A|B|C and pilimit
+PHOTO_MISS_TTL = 6 * HOUR       # remember "no photo" so we don't re-ask every request
+
+def _norm_wiki_title(title: str) -> str:
+    return unquote(title).replace("_", " ").strip()
+
+def _usable_photo(url: str) -> bool:
+    return bool(url) and ".svg" not in url.lower() and "Flag_of" not in url and "Coat_of" not in url
+
 async def fetch_wiki_photo_fast(name: str, wiki_title: str = "") -> str:
     """Fetch a real photo from Wikipedia using the exact article title"""
-    cache_key = wiki_title or name
-    if cache_key in _photo_cache:
-        return _photo_cache[cache_key]
-    
-    title = wiki_title or name
+    title = _norm_wiki_title(wiki_title or name)
+    found = await fetch_wiki_photos_batch([title])
+    return found.get(title, "")
+
+async def fetch_wiki_photos_batch(titles: List[str]) -> Dict[str, str]:
+    """Resolve many article titles to photo URLs using the fewest pageimages requests.
+    Returns {normalized title: url} ("" when the article has no usable image)."""
+    wanted = list(dict.fromkeys(_norm_wiki_title(raw) for raw in titles if raw))
+    wanted = [t for t in wanted if t]
+    # Memory tier, then one store read for the rest
+    results: Dict[str, str] = await _photo_cache.aget_many(wanted)
+    pending = [t for t in wanted if t not in results]
+    if pending:
+        # Per-title single-flight: titles another request is already fetching are joined,
+        # only the remainder goes out (in chunks of 50)
+        results.update(await _photo_flight.do_many(pending, _fetch_wiki_photos))
+    return results
+
+async def _fetch_wiki_photos(titles: List[str]) -> Dict[str, str]:
+    """Fetch uncached titles in concurrent 50-title chunks and store them in one write"""
+    chunks = [tuple(titles[i:i + WIKI_TITLES_PER_QUERY]) for i in range(0, len(titles), WIKI_TITLES_PER_QUERY)]
+    found: Dict[str, str] = {}
+    for part in await asyncio.gather(*[_fetch_wiki_photo_chunk(chunk) for chunk in chunks]):
+        found.update(part)
+    await _photo_cache.aset_many([(title, url, None if url else PHOTO_MISS_TTL) for title, url in found.items()])
+    return found
+
+async def _fetch_wiki_photo_chunk(titles: tuple) -> Dict[str, str]:
+    """One pageimages request for up to 50 titles, mapped back through normalization/redirects"""
     try:
-        async with httpx.AsyncClient(timeout=3, headers=HEADERS) as client:
-            resp = await client.get("https://en.wikipedia.org/w/api.php", params={
-                "action": "query", "format": "json",
-                "titles": title.replace("_", " ").replace("%20", " "),
-                "prop": "pageimages",
-                "piprop": "original|thumbnail",
-                "pithumbsize": "500"
-            })
-            if resp.status_code != 200:
-                return ""
-            data = resp.json()
-            pages = data.get("query", {}).get("pages", {})
-            for page in pages.values():
-                if int(page.get("pageid", -1)) < 0:
-                    continue
-                thumb = page.get("thumbnail", {}).get("source", "")
-                original = page.get("original", {}).get("source", "")
-                url = thumb or original
-                if url and ".svg" not in url.lower() and "Flag_of" not in url and "Coat_of" not in url:
-                    _photo_cache[cache_key] = url
-                    return url
+        resp = await http_pool.get("https://en.wikipedia.org/w/api.php", params={
+            "action": "query", "format": "json", "formatversion": "2",
+            "titles": "|".join(titles),
+            "prop": "pageimages",
+            "piprop": "original|thumbnail",
+            "pithumbsize": "500",
+            "pilimit": str(WIKI_TITLES_PER_QUERY),
+            "redirects": "1"
+        }, timeout=5)
+        if resp.status_code != 200:
+            return {}
+        query = resp.json().get("query", {})
     except Exception as e:
-        print(f"  Wiki photo fetch failed for {cache_key}: {e}")
-    return ""
+        print(f"  Wiki photo batch failed ({len(titles)} titles): {e}")
+        return {}
+    
+    normalized = {n["from"]: n["to"] for n in query.get("normalized", [])}
+    redirects = {r["from"]: r["to"] for r in query.get("redirects", [])}
+    photo_by_title = {}
+    for page in query.get("pages", []):
+        if page.get("missing") or page.get("invalid"):
+            continue
+        url = page.get("thumbnail", {}).get("source", "") or page.get("original", {}).get("source", "")
+        if _usable_photo(url):
+            photo_by_title[page.get("title", "")] = url
+    
+    found = {}
+    for title in titles:
+        resolved = normalized.get(title, title)
+        resolved = redirects.get(resolved, resolved)
+        url = photo_by_title.get(resolved, "")
+        found[title] = url
+    return found
+
+async def resolve_photos(candidates: List[List[str]]) -> List[str]:
+    """For each item's ordered list of candidate titles, return the first one with a photo.
+    All candidates (including fallback variants) go out in a single batched lookup."""
+    found = await fetch_wiki_photos_batch([t for titles in candidates for t in titles])
+    resolved = []
+    for titles in candidates:
+        url = ""
+        for t in titles:
+            url = found.get(_norm_wiki_title(t), "") if t else ""
+            if url:
+                break
+        resolved.append(url)
+    return resolved
+
+def _photo_candidates(attr: Dict, city: str = "") -> List[str]:
+    """Title variants to try for an attraction, best first"""
+    name = attr.get("name", "")
+    titles = [attr.get("wiki", ""), name]
+    if city:
+        titles.append(f"{name} {city}")
+    titles.append(name.split(",")[0].strip())
+    return titles
 
 async def fetch_photos_batch(attractions: List[Dict], city: str) -> None:
-    """Fetch ALL photos in parallel"""
-    tasks = []
-    for attr in attractions:
-        wiki = attr.get("wiki", "")
-        wiki_decoded = unquote(wiki) if wiki else ""
-        name = attr.get("name", "")
-        tasks.append(fetch_wiki_photo_fast(name, wiki_decoded))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    for i, result in enumerate(results):
-        if isinstance(result, str) and result:
-            attractions[i]["photo"] = result
-            attractions[i]["photos"] = [result]
-        else:
-            attractions[i]["photo"] = ""
-            attractions[i]["photos"] = []
+    """Fetch ALL photos (wiki title + name/city fallbacks) in one batched lookup"""
+    photos = await resolve_photos([_photo_candidates(a, city) for a in attractions])
+    for attr, photo in zip(attractions, photos):
+        attr["photo"] = photo
+        attr["photos"] = [photo] if photo else []
 
 async def fetch_missing_photos(attractions: List[Dict], city: str) -> None:
     """Second pass: try alternate queries for missing photos"""
-    tasks = []
-    indices = []
-    for i, attr in enumerate(attractions):
-        if not attr.get("photo"):
-            name = attr.get("name", "")
-            queries = [name, f"{name} {city}", name.split(",")[0].strip()]
-            tasks.append(_try_multiple_wiki_queries(queries))
-            indices.append(i)
-    
-    if not tasks:
-        return
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    for j, result in enumerate(results):
-        idx = indices[j]
-        if isinstance(result, str) and result:
-            attractions[idx]["photo"] = result
-            attractions[idx]["photos"] = [result]
+    missing = [a for a in attractions if not a.get("photo")]
+    if missing:
+        await fetch_photos_batch(missing, city)
+
+# ============================================
+# SPATIAL HELPERS
+# ============================================
+
+DUPLICATE_POI_M = 15          # two POIs closer than this are the same place under different names
+NEARBY_RADIUS_SLACK = 1.1     # way centroids can sit just outside the Overpass around: radius
 
-async def _try_multiple_wiki_queries(queries: List[str]) -> str:
-    for q in queries:
-        result = await fetch_wiki_photo_fast(q)
-        if result:
-            return result
-    return ""
+def _prefer_ascii_name(new: Dict, existing: Dict) -> bool:
+    """Dedup tie-break: keep the English/ASCII name over a transliterated one"""
+    return not existing.get("name", "").isascii() and new.get("name", "").isascii()
+
+def _places_within(places: List[Dict], lat: float, lon: float, radius_m: float) -> List[Tuple[float, Dict]]:
+    """(distance_m, place) for every place within radius_m of (lat, lon), nearest first"""
+    cell_m = max(radius_m / 8, 250) if math.isfinite(radius_m) else 1000
+    index = SpatialIndex(cell_m=cell_m, ref_lat=lat)
+    for p in places:
+        index.insert(float(p["lat"]), float(p["lon"]), p)
+    return index.within(lat, lon, radius_m)
 
 # ============================================
 # GEOCODING
 # ============================================
-async def geocode_city_fast(city: str) -> Optional[Dict]:
+async def geocode_city_fast(city: str, fallbacks: Sequence[str] = ()) -> Optional[Dict]:
     """Get lat/lon for a city using Nominatim with multi-strategy fallback.
-    Works for ANY location: cities, landmarks, universities, cafes, specific addresses."""
+    Works for ANY location: cities, landmarks, universities, cafes, specific addresses.
+    `fallbacks` are extra phrasings raced after the built-in variants."""
+    known, confirmed = gazetteer.resolve(city)
+    if confirmed:
+        return known
     city_lower = city.lower().strip()
-    if city_lower in _geo_cache:
-        return _geo_cache[city_lower]
-    
-    # SRM-specific hardcoded coordinates for precision
-    SRM_LOCATIONS = {
-        "srm": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-        "srmist": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-        "srm university": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-        "srm university chennai": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-        "srm institute": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-        "srm kattankulathur": {"lat": 12.8231, "lon": 80.0442, "display_name": "SRM Institute of Science and Technology, Kattankulathur, Chennai, Tamil Nadu, India", "type": "university", "class": "amenity"},
-    }
-    if city_lower in SRM_LOCATIONS:
-        result = SRM_LOCATIONS[city_lower]
-        _geo_cache[city_lower] = result
-        return result
-    
-    # Try multiple search strategies in order
-    search_queries = [
-        city,  # exact as entered
-    ]
-    # If it doesn't look like it already has a country, add India context
-    has_country = any(c in city.lower() for c in ["india", "usa", "uk", "france", "japan", "thailand", "indonesia", "italy", "spain", "turkey", "germany", "australia"])
-    if not has_country:
-        search_queries.append(f"{city}, India")
-    
-    for query in search_queries:
-        try:
-            async with httpx.AsyncClient(timeout=8, headers=HEADERS) as client:
-                resp = await client.get("https://nominatim.openstreetmap.org/search", params={
-                    "q": query, "format": "json", "limit": 3,
-                    "addressdetails": 1
-                })
-                data = resp.json()
-                if data:
-                    # Prefer results that are actual places, not random admin boundaries
-                    best = data[0]
-                    for r in data:
-                        rtype = r.get("type", "")
-                        rclass = r.get("class", "")
-                        # Prefer tourism, amenity, or named place types
-                        if rtype in ("attraction", "museum", "university", "city", "town", "village"):
-                            best = r
-                            break
-                    result = {
-                        "lat": float(best["lat"]),
-                        "lon": float(best["lon"]),
-                        "display_name": best.get("display_name", city),
-                        "type": best.get("type", ""),
-                        "class": best.get("class", ""),
-                        "address": best.get("address", {})
-                    }
-                    _geo_cache[city_lower] = result
-                    return result
-        except:
-            continue
-    return None
+    cached = await _geo_cache.aget(city_lower)
+    if cached is not None:
+        cached.pop("resolved", None)  # memo that older entries carried; never part of the payload
+        return cached
+    packed = city_packs.geo(city_lower)
+    if packed is not None:
+        packed.pop("resolved", None)
+        return packed
+    
+    # Different fallbacks can resolve differently, so they are part of the flight key
+    return await _geo_flight.do((city_lower, tuple(fallbacks)),
+                                lambda: _geocode_city(city, city_lower, fallbacks, hint=known))
+
+GAZETTEER_HINT_MAX_M = 50000  # Nominatim answer this close to a typo guess confirms it
+
+async def _geocode_city(city: str, city_lower: str, fallbacks: Sequence[str] = (),
+                        hint: Optional[Dict] = None) -> Optional[Dict]:
+    """Uncached Nominatim geocode (known places never get here: see gazetteer).
+    `hint` is an unconfirmed gazetteer typo match, used only if Nominatim agrees."""
+    # Race the search variants; the first acceptable hit wins and the rest are cancelled
+    result = await geocoder.geocode(query_variants(city, fallbacks))
+    if hint is not None:
+        if result is None:
+            # No real place by that name, so the typo reading stands (not cached: it is a guess)
+            return hint
+        if haversine_m(result["lat"], result["lon"], hint["lat"], hint["lon"]) <= GAZETTEER_HINT_MAX_M:
+            result = hint  # same place: keep the canonical gazetteer entry
+    if result is not None:
+        await _geo_cache.aset(city_lower, result)
+    return result
 
 # ============================================
 # API-BASED ATTRACTION FETCHING (NO PREDEFINED DATA)
 # ============================================
 
+def _overpass_attraction(el: Dict, seen: set, lat: float, lon: float, city: str) -> Optional[Dict]:
+    """Attraction dict for one OSM element, or None if it's unnamed, a duplicate or not a sight"""
+    tags = el.get("tags", {})
+    name = tags.get("name", tags.get("name:en", "")).strip()
+    name_lower = name.lower()
+    if len(name) < 3 or name_lower in seen or ATTRACTION_SKIP(name_lower):
+        return None
+    seen.add(name_lower)
+    
+    # Get coordinates
+    p_lat = el.get("lat") or el.get("center", {}).get("lat", lat)
+    p_lon = el.get("lon") or el.get("center", {}).get("lon", lon)
+    
+    wiki_title = tags.get("wikipedia", "").replace("en:", "").replace(" ", "_")
+    return {
+        "name": name,
+        "type": attraction_type(tags),
+        "rating": round(3.8 + random.random() * 1.2, 1),
+        "price": random.choice([0, 0, 0, 100, 200, 300, 500, 800]),
+        "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours", "3 hours"]),
+        "lat": float(p_lat),
+        "lon": float(p_lon),
+        "description": tags.get("description", tags.get("description:en", f"Visit {name} in {city}")),
+        "wiki": wiki_title or name.replace(" ", "_"),
+        "wikidata": tags.get("wikidata", ""),
+        "quality": attraction_quality(tags),
+        "photo": "", "photos": []
+    }
+
 async def fetch_overpass_attractions(lat: float, lon: float, city: str, radius: int = 15000) -> List[Dict]:
-    """Fetch attractions from OpenStreetMap Overpass API"""
-    query = f"""
-    [out:json][timeout:10];
-    (
-      node["tourism"~"attraction|museum|gallery|artwork|viewpoint|zoo"](around:{radius},{lat},{lon});
-      node["historic"~"castle|monument|memorial|ruins|fort|archaeological_site|palace"](around:{radius},{lat},{lon});
-      node["amenity"~"place_of_worship"](around:{radius},{lat},{lon});
-      way["tourism"~"attraction|museum|gallery"](around:{radius},{lat},{lon});
-      way["historic"~"castle|monument|fort|palace"](around:{radius},{lat},{lon});
-    );
-    out center 60;
-    """
+    """Fetch attractions from OpenStreetMap (offline POI store or the Overpass API)"""
     try:
-        async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
-            resp = await client.post(
-                "https://overpass-api.de/api/interpreter",
-                data={"data": query}
-            )
-            if resp.status_code != 200:
-                return []
-            data = resp.json()
-            elements = data.get("elements", [])
-            
-            attractions = []
-            seen = set()
-            skip_words = {"bus station", "railway station", "airport", "hospital", "school",
-                         "college", "university", "bank", "atm", "pharmacy", "gas station",
-                         "parking", "toilet", "bench", "post office", "police"}
-            
-            for el in elements:
-                tags = el.get("tags", {})
-                name = tags.get("name", tags.get("name:en", "")).strip()
-                if not name or len(name) < 3 or name.lower() in seen:
-                    continue
-                if any(sw in name.lower() for sw in skip_words):
-                    continue
-                seen.add(name.lower())
-                
-                # Get coordinates
-                p_lat = el.get("lat") or el.get("center", {}).get("lat", lat)
-                p_lon = el.get("lon") or el.get("center", {}).get("lon", lon)
-                
-                # Determine type
-                tourism = tags.get("tourism", "")
-                historic = tags.get("historic", "")
-                amenity = tags.get("amenity", "")
-                
-                osm_type = "attraction"
-                if "museum" in tourism or "gallery" in tourism:
-                    osm_type = "museum"
-                elif historic in ("castle", "fort"):
-                    osm_type = "fort"
-                elif historic in ("palace",):
-                    osm_type = "palace"
-                elif historic in ("monument", "memorial"):
-                    osm_type = "monument"
-                elif historic in ("ruins", "archaeological_site"):
-                    osm_type = "historic"
-                elif amenity == "place_of_worship":
-                    osm_type = "religious"
-                elif tourism == "viewpoint":
-                    osm_type = "viewpoint"
-                elif "park" in tags.get("leisure", ""):
-                    osm_type = "park"
-                
-                wiki_title = tags.get("wikipedia", "").replace("en:", "").replace(" ", "_")
-                wikidata = tags.get("wikidata", "")
-                
-                # Quality scoring: prioritize real notable tourist spots
-                quality = 1
-                if wiki_title or wikidata:
-                    quality += 3  # Has Wikipedia/Wikidata = notable place
-                if tags.get("website") or tags.get("url"):
-                    quality += 1
-                if tags.get("description") or tags.get("description:en"):
-                    quality += 1
-                if tourism in ("attraction", "museum", "zoo"):
-                    quality += 2  # Explicitly tagged as tourist attraction
-                if historic in ("castle", "fort", "palace", "ruins", "archaeological_site"):
-                    quality += 2  # Major historic sites
-                if tags.get("heritage"):
-                    quality += 2  # Heritage sites
-                
-                attractions.append({
-                    "name": name,
-                    "type": osm_type,
-                    "rating": round(3.8 + random.random() * 1.2, 1),
-                    "price": random.choice([0, 0, 0, 100, 200, 300, 500, 800]),
-                    "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours", "3 hours"]),
-                    "lat": float(p_lat),
-                    "lon": float(p_lon),
-                    "description": tags.get("description", tags.get("description:en", f"Visit {name} in {city}")),
-                    "wiki": wiki_title or name.replace(" ", "_"),
-                    "wikidata": wikidata,
-                    "quality": quality,
-                    "photo": "", "photos": []
-                })
-            
-            return attractions
+        # Ask for more elements than we keep: skipped names don't eat into the 60,
+        # and a streamed answer stops downloading once 60 are kept
+        return await poi_collect(ATTRACTION_FILTERS, lat, lon, radius,
+                                 lambda el, seen: _overpass_attraction(el, seen, lat, lon, city),
+                                 want=60, limit=100, timeout=10)
     except Exception as e:
         print(f"Overpass API failed: {e}")
         return []
 
 
+def _otm_attraction(place: Dict, seen: set, lat: float, lon: float, city: str) -> Optional[Dict]:
+    """Attraction dict for one OpenTripMap place, or None if skipped"""
+    name = place.get("name", "").strip()
+    name_lower = name.lower()
+    if len(name) < 3 or name_lower in seen or OTM_SKIP(name_lower):
+        return None
+    seen.add(name_lower)
+    
+    p_lat = place.get("point", {}).get("lat", lat)
+    p_lon = place.get("point", {}).get("lon", lon)
+    rate = place.get("rate", 3) or 3
+    return {
+        "name": name,
+        "type": otm_attraction_type(place.get("kinds", "")),
+        "rating": round(max(3.5, min(5.0, rate + random.random() * 0.5)), 1),
+        "price": random.choice([0, 0, 100, 200, 300, 500]),
+        "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours"]),
+        "lat": float(p_lat),
+        "lon": float(p_lon),
+        "description": f"Visit {name} in {city}",
+        "wiki": name.replace(" ", "_"),
+        "photo": "", "photos": []
+    }
+
 async def fetch_opentripmap_attractions(lat: float, lon: float, city: str, limit: int = 30) -> List[Dict]:
     """Fetch attractions from OpenTripMap API — with auth failure handling"""
     try:
-        async with httpx.AsyncClient(timeout=12, headers=HEADERS) as client:
-            resp = await client.get("https://api.opentripmap.com/0.1/en/places/radius", params={
-                "radius": 15000, "lon": lon, "lat": lat,
-                "kinds": "interesting_places,cultural,historic,natural,architecture,religion,museums,churches,theatres_and_entertainments,amusements",
-                "rate": "2",  # Only rated places
-                "limit": limit, "format": "json"
-            })
+        async with http_pool.stream("GET", "https://api.opentripmap.com/0.1/en/places/radius", params={
+            "radius": 15000, "lon": lon, "lat": lat,
+            "kinds": "interesting_places,cultural,historic,natural,architecture,religion,museums,churches,theatres_and_entertainments,amusements",
+            "rate": "2",  # Only rated places
+            "limit": limit, "format": "json"
+        }, timeout=12) as resp:
             if resp.status_code == 401 or resp.status_code == 403:
                 print("  OTM API auth required — skipping (using Overpass + Wikipedia instead)")
                 return []
-            places = resp.json()
-            if not isinstance(places, list):
-                return []
-            
-            attractions = []
-            seen = set()
-            skip_words = {"bus station", "railway station", "airport", "hospital", "school",
-                         "college", "university", "bank", "atm", "pharmacy", "gas station",
-                         "parking", "toilet", "post office"}
-            
-            for place in places:
-                name = place.get("name", "").strip()
-                if not name or len(name) < 3 or name.lower() in seen:
-                    continue
-                if any(sw in name.lower() for sw in skip_words):
-                    continue
-                seen.add(name.lower())
-                
-                kinds = place.get("kinds", "")
-                osm_type = "attraction"
-                if "museum" in kinds: osm_type = "museum"
-                elif "castle" in kinds or "fort" in kinds: osm_type = "fort"
-                elif "palace" in kinds: osm_type = "palace"
-                elif "monument" in kinds or "memorial" in kinds: osm_type = "monument"
-                elif "historic" in kinds: osm_type = "historic"
-                elif "religion" in kinds or "church" in kinds or "temple" in kinds: osm_type = "religious"
-                elif "natural" in kinds or "beach" in kinds: osm_type = "hidden_gem"
-                elif "architecture" in kinds: osm_type = "architecture"
-                elif "garden" in kinds or "park" in kinds: osm_type = "park"
-                elif "theatre" in kinds or "amusement" in kinds: osm_type = "landmark"
-                
-                p_lat = place.get("point", {}).get("lat", lat)
-                p_lon = place.get("point", {}).get("lon", lon)
-                rate = place.get("rate", 3) or 3
-                
-                attractions.append({
-                    "name": name,
-                    "type": osm_type,
-                    "rating": round(max(3.5, min(5.0, rate + random.random() * 0.5)), 1),
-                    "price": random.choice([0, 0, 100, 200, 300, 500]),
-                    "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours"]),
-                    "lat": float(p_lat),
-                    "lon": float(p_lon),
-                    "description": f"Visit {name} in {city}",
-                    "wiki": name.replace(" ", "_"),
-                    "photo": "", "photos": []
-                })
-            return attractions
+            # Parsed as the body streams in (an error object instead of a list raises ValueError)
+            places = iter_json_array(resp.aiter_bytes())
+            try:
+                return await take(places, lambda place, seen: _otm_attraction(place, seen, lat, lon, city))
+            finally:
+                await places.aclose()
     except Exception as e:
         print(f"OpenTripMap failed: {e}")
         return []
@@ -371,89 +513,63 @@ async def fetch_wikipedia_attractions(city: str, lat: float, lon: float) -> List
     """Fetch notable TOURIST places from Wikipedia GeoSearch.
     Aggressively filters out non-tourist entries like districts, constituencies, etc."""
     try:
-        async with httpx.AsyncClient(timeout=8, headers=HEADERS) as client:
-            resp = await client.get("https://en.wikipedia.org/w/api.php", params={
-                "action": "query", "format": "json",
-                "list": "geosearch",
-                "gscoord": f"{lat}|{lon}",
-                "gsradius": 10000,
-                "gslimit": 40,
-                "gsnamespace": 0
-            })
-            data = resp.json()
-            results = data.get("query", {}).get("geosearch", [])
+        resp = await http_pool.get("https://en.wikipedia.org/w/api.php", params={
+            "action": "query", "format": "json",
+            "list": "geosearch",
+            "gscoord": f"{lat}|{lon}",
+            "gsradius": 10000,
+            "gslimit": 40,
+            "gsnamespace": 0
+        }, timeout=8)
+        data = resp.json()
+        results = data.get("query", {}).get("geosearch", [])
+        
+        attractions = []
+        seen = set()
+        city_lower = city.lower()
+        for r in results:
+            title = r.get("title", "").strip()
+            title_lower = title.lower()
+            if len(title) < 3 or title_lower in seen:
+                continue
             
-            attractions = []
-            seen = set()
-            # Aggressively skip non-tourist entries
-            skip_words = {"district", "ward", "station", "airport", "highway", "road",
-                         "river", "village", "town", "city", "county", "province",
-                         "school", "university", "college", "hospital", "constituency",
-                         "assembly", "lok sabha", "rajya sabha", "parliament", "election",
-                         "metro", "bus", "railway", "junction", "bypass", "flyover",
-                         "municipal", "corporation", "division", "zone", "tehsil",
-                         "block", "sector", "phase", "plot", "colony", "society",
-                         "pin code", "postal", "census", "population", "demographics",
-                         "administrative", "subdivision", "circle", "region",
-                         "company", "ltd", "inc", "pvt", "private", "limited",
-                         "cricket", "football", "hockey", "stadium", "league",
-                         "film", "movie", "television", "serial", "episode",
-                         "album", "song", "band", "novel", "book"}
+            # Skip generic non-tourist entries (areas, transport, organisations, media)
+            if WIKI_SKIP(title_lower):
+                continue
             
-            # Words that indicate it IS a tourist spot (boost confidence)
-            tourist_words = {"temple", "fort", "palace", "mosque", "church", "museum",
-                           "garden", "park", "lake", "beach", "cave", "waterfall",
-                           "monument", "memorial", "tomb", "mausoleum", "shrine",
-                           "gallery", "tower", "gate", "well", "step well", "baoli",
-                           "haveli", "mahal", "garh", "mandir", "masjid", "gurudwara",
-                           "zoo", "sanctuary", "reserve", "hills"}
+            # Skip if it's just the city name or a variant
+            if title_lower == city_lower or title_lower == city_lower + " city":
+                continue
             
-            for r in results:
-                title = r.get("title", "").strip()
-                if not title or title.lower() in seen or len(title) < 3:
+            # Skip entries that look like geographic/political areas
+            # (single word names that are likely area names, not landmarks)
+            touristy = TOURIST_WORDS(title_lower)
+            if len(title.split()) == 1 and not touristy:
+                # Single word entries are often neighborhood/area names
+                # Only keep if very close to center (likely a landmark)
+                dist = abs(r.get("lat", lat) - lat) + abs(r.get("lon", lon) - lon)
+                if dist > 0.01:  # More than ~1km away
                     continue
-                
-                title_lower = title.lower()
-                
-                # Skip generic non-tourist entries
-                if any(sw in title_lower for sw in skip_words):
-                    continue
-                
-                # Skip if it's just the city name or a variant
-                if title_lower == city.lower() or title_lower == city.lower() + " city":
-                    continue
-                
-                # Skip entries that look like geographic/political areas
-                # (single word names that are likely area names, not landmarks)
-                words = title.split()
-                if len(words) == 1 and not any(tw in title_lower for tw in tourist_words):
-                    # Single word entries are often neighborhood/area names
-                    # Only keep if very close to center (likely a landmark)
-                    dist = abs(r.get("lat", lat) - lat) + abs(r.get("lon", lon) - lon)
-                    if dist > 0.01:  # More than ~1km away
-                        continue
-                
-                seen.add(title_lower)
-                
-                # Determine quality: entries with tourist keywords get higher quality
-                quality = 2
-                if any(tw in title_lower for tw in tourist_words):
-                    quality = 5
-                
-                attractions.append({
-                    "name": title,
-                    "type": "attraction",
-                    "rating": round(4.0 + random.random() * 0.9, 1),
-                    "price": random.choice([0, 0, 100, 200, 500]),
-                    "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours"]),
-                    "lat": float(r.get("lat", lat)),
-                    "lon": float(r.get("lon", lon)),
-                    "description": f"Visit {title} in {city}",
-                    "wiki": title.replace(" ", "_"),
-                    "quality": quality,
-                    "photo": "", "photos": []
-                })
-            return attractions
+            
+            seen.add(title_lower)
+            
+            # Entries with tourist keywords get higher quality
+            quality = 5 if touristy else 2
+            
+            attractions.append({
+                "name": title,
+                "type": "attraction",
+                "rating": round(4.0 + random.random() * 0.9, 1),
+                "price": random.choice([0, 0, 100, 200, 500]),
+                "duration": random.choice(["1 hour", "1-2 hours", "2 hours", "2-3 hours"]),
+                "lat": float(r.get("lat", lat)),
+                "lon": float(r.get("lon", lon)),
+                "description": f"Visit {title} in {city}",
+                "wiki": title.replace(" ", "_"),
+                "quality": quality,
+                "photo": "", "photos": []
+            })
+        return attractions
     except Exception as e:
         print(f"Wikipedia GeoSearch failed: {e}")
         return []
@@ -466,36 +582,192 @@ async def get_attractions_api(city: str) -> List[Dict]:
     
     city_lower = city.lower().strip()
     
-    # Check cache
-    if city_lower in _attraction_cache:
-        return [dict(a) for a in _attraction_cache[city_lower]]
+    fetch = lambda: _attraction_flight.do(city_lower, lambda: _fetch_attractions(city, city_lower))
+    # Check cache (a stale entry is served as-is while `fetch` refreshes it in the background)
+    cached = await _attraction_cache.aget_swr(city_lower, fetch)
+    if cached is None:
+        cached = city_packs.attractions(city_lower)
+    if cached is None:
+        cached = await fetch()
+    return [dict(a) for a in cached]
+
+
+async def get_ranked_attractions(city: str) -> Tuple[List[Dict], bool]:
+    """Attractions as early as possible, for streaming responses.
+    Returns the cached list (photos included) when there is one; otherwise the merged,
+    ranked list before the photo pass. The flag says whether photos are still to come."""
+    city_lower = city.lower().strip()
+    cached = await _attraction_cache.aget_swr(
+        city_lower, lambda: _attraction_flight.do(city_lower, lambda: _fetch_attractions(city, city_lower)))
+    if cached is None:
+        cached = city_packs.attractions(city_lower)
+    if cached is not None:
+        return [dict(a) for a in cached], False
+    ranked = await _ranked_flight.do(city_lower, lambda: _rank_attractions(city))
+    return [dict(a) for a in ranked], True
+
+
+async def complete_attraction_photos(city: str, attractions: List[Dict]) -> List[Dict]:
+    """Photo pass + cache fill for a list from get_ranked_attractions"""
+    city_lower = city.lower().strip()
+    done = await _attraction_flight.do(
+        city_lower, lambda: _finish_attractions(city, city_lower, [dict(a) for a in attractions])
+    )
+    return [dict(a) for a in done]
+
+
+async def _fetch_attractions(city: str, city_lower: str) -> List[Dict]:
+    """Uncached three-source fan-out, merge, dedup and photo pass for one city"""
+    ranked = await _ranked_flight.do(city_lower, lambda: _rank_attractions(city))
+    return await _finish_attractions(city, city_lower, [dict(a) for a in ranked])
+
+
+async def _finish_attractions(city: str, city_lower: str, attractions: List[Dict]) -> List[Dict]:
+    """Photo pass for the top attractions, then cache the finished list"""
+    # Fetch photos in one batched lookup (only top 6 — photos fetched lazily on frontend too);
+    # the name + city fallback variants ride along in the same request
+    await fetch_photos_batch(attractions[:6], city)
     
+    # Cache results — unless late sources already folded a more complete list in
+    if not (_attraction_sources.get(city_lower) or {}).get("folded"):
+        await _attraction_cache.aset(city_lower, attractions)
+    return attractions
+
+
+async def _rank_attractions(city: str, wait_all: bool = False) -> List[Dict]:
+    """Three-source fan-out, merge, dedup and ranking for one city (no photos).
+    wait_all skips the latency deadline (offline pack builds want every source)."""
     # Geocode first
     geo = await geocode_city_fast(city)
     if not geo:
         return []
     
     lat, lon = geo["lat"], geo["lon"]
+    city_lower = city.lower().strip()
     
-    # Parallel fetch from ALL 3 APIs
-    overpass_task = fetch_overpass_attractions(lat, lon, city)
-    otm_task = fetch_opentripmap_attractions(lat, lon, city)
-    wiki_task = fetch_wikipedia_attractions(city, lat, lon)
-    
-    overpass_results, otm_results, wiki_results = await asyncio.gather(
-        overpass_task, otm_task, wiki_task, return_exceptions=True
-    )
-    
-    # Handle exceptions
-    if isinstance(overpass_results, Exception):
-        print(f"Overpass error: {overpass_results}")
-        overpass_results = []
-    if isinstance(otm_results, Exception):
-        print(f"OTM error: {otm_results}")
-        otm_results = []
-    if isinstance(wiki_results, Exception):
-        print(f"Wiki error: {wiki_results}")
-        wiki_results = []
+    # Parallel fetch from ALL 3 APIs, but only wait up to the latency budget
+    # (providers with a tripped circuit breaker are skipped outright)
+    tasks = {}
+    if not (provider_down("overpass-api.de") and provider_down("overpass.kumi.systems")):
+        tasks["Overpass"] = asyncio.ensure_future(fetch_overpass_attractions(lat, lon, city))
+    if not provider_down("api.opentripmap.com"):
+        tasks["OpenTripMap"] = asyncio.ensure_future(fetch_opentripmap_attractions(lat, lon, city))
+    if not provider_down("en.wikipedia.org"):
+        tasks["Wikipedia"] = asyncio.ensure_future(fetch_wikipedia_attractions(city, lat, lon))
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=None if wait_all else ATTRACTION_DEADLINE_SECONDS)
+    # Nothing usable by the deadline: take whichever source answers first
+    while not _source_results(tasks) and not all(t.done() for t in tasks.values()):
+        await asyncio.wait([t for t in tasks.values() if not t.done()], return_when=asyncio.FIRST_COMPLETED)
+    
+    results = _source_results(tasks)
+    late = [name for name, t in tasks.items() if not t.done()]
+    attractions = _merge_attractions(city, lat, lon, results)
+    _attraction_sources.set(city_lower, {"sources": [n for n in tasks if results.get(n)], "late": late})
+    
+    if late:
+        print(f"  [{city}] Deadline {ATTRACTION_DEADLINE_SECONDS}s hit — serving {len(attractions)} attractions, still waiting on {', '.join(late)}")
+        _spawn_background(_fold_late_sources(city, lat, lon, tasks))
+    return attractions
+
+
+def _source_results(tasks: Dict[str, asyncio.Future]) -> Dict[str, List[Dict]]:
+    """Results of the attraction sources that finished successfully"""
+    results = {}
+    for name, task in tasks.items():
+        if not task.done() or task.cancelled():
+            continue
+        if task.exception() is not None:
+            print(f"{name} error: {task.exception()}")
+            continue
+        if task.result():
+            results[name] = task.result()
+    return results
+
+
+async def _fold_late_sources(city: str, lat: float, lon: float, tasks: Dict[str, asyncio.Future]) -> None:
+    """Let sources that missed the deadline finish, then re-merge and refresh the cache"""
+    await asyncio.wait(tasks.values())
+    city_lower = city.lower().strip()
+    results = _source_results(tasks)
+    attractions = _merge_attractions(city, lat, lon, results)
+    _attraction_sources.set(city_lower, {"sources": [n for n in tasks if results.get(n)], "late": [], "folded": True})
+    await fetch_photos_batch(attractions[:6], city)
+    await _attraction_cache.aset(city_lower, attractions)
+    print(f"  [{city}] Late sources folded into cache: {len(attractions)} attractions")
+
+
+async def build_city_pack(city: str) -> bool:
+    """Full merge (every source, no deadline) + photos for the whole list, saved as a city pack"""
+    geo = await geocode_city_fast(city)
+    if not geo:
+        return False
+    attractions = [dict(a) for a in await _rank_attractions(city, wait_all=True)]
+    # Built offline, served as-is: this merge feeds the pack, not the live source label
+    info = _attraction_sources.pop(city.lower().strip(), None) or {}
+    if not info.get("sources"):
+        return False  # every upstream failed — keep the previous pack
+    await fetch_photos_batch(attractions, city)
+    await city_packs.save(city, geo, attractions, info["sources"])
+    return True
+
+
+def city_pack_cities() -> List[str]:
+    names = CITY_PACK_CITIES or ["Chennai"] + [d["name"] for d in DESTINATION_DATABASE]
+    return list({name.lower(): name for name in names}.values())  # Chennai is also in the database
+
+
+async def refresh_city_packs() -> None:
+    """Background warmer: (re)build missing or aged packs one city at a time, forever.
+    Workers that don't hold the warmer lock just pick up the packs it writes."""
+    if not city_packs.acquire_warmer_lock():
+        print("  City pack warmer runs in another worker; reloading its packs periodically")
+        while True:
+            await asyncio.sleep(min(HOUR, CITY_PACK_REFRESH_HOURS * HOUR / 4))
+            await asyncio.to_thread(city_packs.load_all)
+    await asyncio.sleep(30)  # let startup traffic settle first
+    with background_priority():  # rate-limited hosts serve interactive requests first
+        await _refresh_city_packs_forever()
+
+
+async def _refresh_city_packs_forever() -> None:
+    while True:
+        for city in city_pack_cities():
+            if not city_packs.needs_refresh(city):
+                continue
+            try:
+                ok = await build_city_pack(city)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ok = False
+                print(f"  City pack build for {city} failed: {e}")
+            if ok:
+                print(f"  City pack built: {city}")
+            else:
+                city_packs.build_failures += 1
+            await asyncio.sleep(2)  # be gentle with the free upstream APIs
+        await asyncio.sleep(min(HOUR, CITY_PACK_REFRESH_HOURS * HOUR / 4))
+
+
+def attraction_source_label(*cities: str) -> str:
+    """metadata.source text: which upstream sources made it into the served attractions"""
+    for city in cities:
+        info = _attraction_sources.get(city.lower().strip())
+        if info:
+            label = f"api_merged ({' + '.join(info['sources']) or 'fallback'})"
+            return label + (f" [late: {', '.join(info['late'])}]" if info["late"] else "")
+        pack = city_packs.packs.get(city.lower().strip())
+        if pack:
+            return f"city_pack ({' + '.join(pack['sources']) or 'fallback'})"
+    return "cache"
+
+
+def _merge_attractions(city: str, lat: float, lon: float, results: Dict[str, List[Dict]]) -> List[Dict]:
+    """Merge, dedup and rank whatever the sources returned (no network calls)"""
+    overpass_results = results.get("Overpass", [])
+    otm_results = results.get("OpenTripMap", [])
+    wiki_results = results.get("Wikipedia", [])
     
     # Merge and deduplicate (priority: Overpass > OpenTripMap > Wikipedia)
     merged = {}
@@ -527,29 +799,7 @@ async def get_attractions_api(city: str) -> List[Dict]:
     
     # Additional deduplication: remove entries that are at almost the same coordinates
     # (catches Hindi/English duplicate names like "एल्बर्ट हॉल" vs "Albert Hall Museum")
-    final = []
-    seen_coords = set()
-    for a in attractions:
-        coord_key = (round(a.get("lat", 0), 4), round(a.get("lon", 0), 4))
-        if coord_key not in seen_coords:
-            # Prefer the entry with an English/ASCII name
-            final.append(a)
-            seen_coords.add(coord_key)
-        else:
-            # If the existing entry has a non-ASCII name and this one is ASCII, replace
-            existing_idx = None
-            for i, f in enumerate(final):
-                if (round(f.get("lat", 0), 4), round(f.get("lon", 0), 4)) == coord_key:
-                    existing_idx = i
-                    break
-            if existing_idx is not None:
-                existing_name = final[existing_idx]["name"]
-                new_name = a["name"]
-                # Prefer ASCII (English) names
-                if not existing_name.isascii() and new_name.isascii():
-                    final[existing_idx] = a
-    
-    attractions = final
+    attractions = dedupe_by_location(attractions, DUPLICATE_POI_M, prefer=_prefer_ascii_name)
     
     # Supplement with curated Chennai/SRM data if applicable
     chennai_extra = get_chennai_srm_supplement(city)
@@ -582,27 +832,6 @@ async def get_attractions_api(city: str) -> List[Dict]:
              "photo": "", "photos": [], "lat": lat + 0.01, "lon": lon - 0.005, "wiki": f"{city}_cultural"},
         ]
     
-    # Fetch photos in parallel (only top 6 for speed — photos fetched lazily on frontend too)
-    top_for_photos = attractions[:6]
-    await fetch_photos_batch(top_for_photos, city)
-    # Quick pass for missing - only try the name + city combo, don't block
-    missing_tasks = []
-    for a in top_for_photos:
-        if not a.get("photo"):
-            missing_tasks.append(fetch_wiki_photo_fast(a["name"] + " " + city))
-    if missing_tasks:
-        results = await asyncio.gather(*missing_tasks, return_exceptions=True)
-        idx = 0
-        for a in top_for_photos:
-            if not a.get("photo") and idx < len(results):
-                if isinstance(results[idx], str) and results[idx]:
-                    a["photo"] = results[idx]
-                    a["photos"] = [results[idx]]
-                idx += 1
-    
-    # Cache results
-    _attraction_cache[city_lower] = attractions
-    
     print(f"  [{city}] Fetched {len(overpass_results)} Overpass + {len(otm_results)} OTM + {len(wiki_results)} Wiki = {len(attractions)} unique attractions")
     
     return [dict(a) for a in attractions]
@@ -712,242 +941,124 @@ def get_chennai_srm_supplement(city: str) -> List[Dict]:
 async def get_nearby_places(lat: float, lon: float, radius: int = 5000, categories: List[str] = None) -> Dict[str, Any]:
     """Fetch nearby places with quality filtering and categorization.
     Returns categorized results: attractions, eating, recreation, nature, shopping, culture"""
+    flight_key = (round(lat, 4), round(lon, 4), radius)
+    result = await _nearby_flight.do(flight_key, lambda: _fetch_nearby_places(lat, lon, radius))
+    # Coalesced callers share one result; hand each caller its own place dicts
+    return {
+        "categorized": {cat: [dict(p) for p in places] for cat, places in result["categorized"].items()},
+        "all": [dict(p) for p in result["all"]],
+        "total": result["total"],
+    }
+
+def _overpass_nearby(el: Dict, seen: set, lat: float, lon: float) -> Optional[Dict]:
+    """Nearby-search place for one OSM element, or None if skipped"""
+    tags = el.get("tags", {})
+    name = tags.get("name", tags.get("name:en", "")).strip()
+    name_lower = name.lower()
+    if len(name) < 3 or name_lower in seen or NEARBY_SKIP(name_lower):
+        return None
+    seen.add(name_lower)
     
-    # Simple, fast Overpass query — nodes only for speed
-    query = f"""
-    [out:json][timeout:15];
-    (
-      node["tourism"~"attraction|museum|gallery|viewpoint|zoo|theme_park"](around:{radius},{lat},{lon});
-      node["historic"~"castle|monument|memorial|ruins|fort|palace"](around:{radius},{lat},{lon});
-      node["amenity"~"place_of_worship|restaurant|cafe|theatre|cinema"](around:{radius},{lat},{lon});
-      node["leisure"~"park|garden|nature_reserve|stadium"](around:{radius},{lat},{lon});
-      node["natural"~"beach|peak|cave_entrance"](around:{radius},{lat},{lon});
-      way["tourism"~"attraction|museum|zoo"](around:{radius},{lat},{lon});
-      way["leisure"~"park|garden"](around:{radius},{lat},{lon});
-    );
-    out center 60;
-    """
+    p_lat = el.get("lat") or el.get("center", {}).get("lat", lat)
+    p_lon = el.get("lon") or el.get("center", {}).get("lon", lon)
+    category, subcategory, quality_score = nearby_category(tags)
+    return {
+        "name": name,
+        "category": category,
+        "subcategory": subcategory,
+        "lat": float(p_lat),
+        "lon": float(p_lon),
+        "distance_m": 0,
+        "description": tags.get("description", tags.get("description:en", f"{name}")),
+        "opening_hours": tags.get("opening_hours", ""),
+        "phone": tags.get("phone", ""),
+        "website": tags.get("website", tags.get("url", "")),
+        "wiki": tags.get("wikipedia", "").replace("en:", "").replace(" ", "_") or name.replace(" ", "_"),
+        "quality_score": quality_score,
+        "photo": ""
+    }
+
+def _otm_nearby(place: Dict, seen: set, lat: float, lon: float) -> Optional[Dict]:
+    """Nearby-search place for one OpenTripMap place, or None if skipped"""
+    name = place.get("name", "").strip()
+    name_lower = name.lower()
+    if len(name) < 3 or name_lower in seen or NEARBY_SKIP(name_lower):
+        return None
+    seen.add(name_lower)
     
+    category, bonus = otm_nearby_category(place.get("kinds", ""))
+    return {
+        "name": name,
+        "category": category,
+        "subcategory": "",
+        "lat": float(place.get("point", {}).get("lat", lat)),
+        "lon": float(place.get("point", {}).get("lon", lon)),
+        "distance_m": 0,
+        "description": name,
+        "opening_hours": "",
+        "phone": "",
+        "website": "",
+        "wiki": name.replace(" ", "_"),
+        "quality_score": (place.get("rate", 1) or 1) + 1 + bonus,
+        "photo": ""
+    }
+
+async def _fetch_nearby_places(lat: float, lon: float, radius: int) -> Dict[str, Any]:
+    """Uncached Overpass + OpenTripMap + Wikipedia nearby search"""
     all_places = []
-    skip_words = {"bus station", "bus stop", "railway station", "airport", "hospital", 
-                 "school", "college", "university", "bank", "atm", "pharmacy", 
-                 "gas station", "petrol", "parking", "toilet", "post office", "police"}
-    
-    overpass_success = False
-    overpass_urls = [
-        "https://overpass-api.de/api/interpreter",
-        "https://overpass.kumi.systems/api/interpreter"
-    ]
-    for attempt, api_url in enumerate(overpass_urls):
-        if overpass_success:
-            break
-        try:
-            timeout_val = 15 + attempt * 5
-            async with httpx.AsyncClient(timeout=timeout_val, headers=HEADERS) as client:
-                resp = await client.post(api_url, data={"data": query})
-                if resp.status_code == 200:
-                    data = resp.json()
-                    elements = data.get("elements", [])
-                    seen = set()
-                    for el in elements:
-                        tags = el.get("tags", {})
-                        name = tags.get("name", tags.get("name:en", "")).strip()
-                        if not name or len(name) < 3 or name.lower() in seen:
-                            continue
-                        if any(sw in name.lower() for sw in skip_words):
-                            continue
-                        seen.add(name.lower())
-                        
-                        p_lat = el.get("lat") or el.get("center", {}).get("lat", lat)
-                        p_lon = el.get("lon") or el.get("center", {}).get("lon", lon)
-                        p_lat, p_lon = float(p_lat), float(p_lon)
-                        
-                        dlat = math.radians(p_lat - lat)
-                        dlon = math.radians(p_lon - lon)
-                        a_val = math.sin(dlat/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(p_lat)) * math.sin(dlon/2)**2
-                        dist = 6371000 * 2 * math.atan2(math.sqrt(a_val), math.sqrt(1-a_val))
-                        
-                        tourism = tags.get("tourism", "")
-                        historic = tags.get("historic", "")
-                        amenity = tags.get("amenity", "")
-                        leisure = tags.get("leisure", "")
-                        natural_tag = tags.get("natural", "")
-                        shop = tags.get("shop", "")
-                        
-                        category = "attraction"
-                        subcategory = ""
-                        quality_score = 1
-                        
-                        if amenity in ("restaurant", "cafe", "fast_food"):
-                            category = "eating"
-                            subcategory = amenity
-                            quality_score = 2
-                        elif tourism in ("zoo", "theme_park", "aquarium"):
-                            category = "recreation"
-                            subcategory = tourism
-                            quality_score = 5
-                        elif leisure in ("water_park", "amusement_arcade", "sports_centre", "stadium", "swimming_pool", "beach_resort"):
-                            category = "recreation"
-                            subcategory = leisure
-                            quality_score = 4
-                        elif amenity in ("theatre", "cinema", "arts_centre"):
-                            category = "recreation"
-                            subcategory = amenity
-                            quality_score = 3
-                        elif natural_tag in ("beach", "peak", "cave_entrance", "water"):
-                            category = "nature"
-                            subcategory = natural_tag
-                            quality_score = 4
-                        elif leisure in ("park", "garden", "nature_reserve"):
-                            category = "nature"
-                            subcategory = leisure
-                            quality_score = 3
-                        elif tourism in ("museum", "gallery"):
-                            category = "culture"
-                            subcategory = tourism
-                            quality_score = 4
-                        elif historic:
-                            category = "culture"
-                            subcategory = historic
-                            quality_score = 4
-                        elif amenity == "place_of_worship":
-                            category = "culture"
-                            subcategory = "temple"
-                            quality_score = 3
-                        elif shop:
-                            category = "shopping"
-                            subcategory = shop
-                            quality_score = 2
-                        elif tourism in ("attraction", "viewpoint"):
-                            category = "attraction"
-                            subcategory = tourism
-                            quality_score = 4
-                        
-                        if tags.get("wikipedia") or tags.get("wikidata"):
-                            quality_score += 2
-                        if tags.get("website") or tags.get("url"):
-                            quality_score += 1
-                        
-                        all_places.append({
-                            "name": name,
-                            "category": category,
-                            "subcategory": subcategory,
-                            "lat": p_lat,
-                            "lon": p_lon,
-                            "distance_m": round(dist),
-                            "description": tags.get("description", tags.get("description:en", f"{name}")),
-                            "opening_hours": tags.get("opening_hours", ""),
-                            "phone": tags.get("phone", ""),
-                            "website": tags.get("website", tags.get("url", "")),
-                            "wiki": tags.get("wikipedia", "").replace("en:", "").replace(" ", "_") or name.replace(" ", "_"),
-                            "quality_score": quality_score,
-                            "photo": ""
-                        })
-                    if elements:
-                        overpass_success = True
-                        print(f"  [Nearby] Overpass attempt {attempt+1} OK: {len(elements)} elements -> {len(all_places)} places")
-        except Exception as e:
-            print(f"Nearby Overpass attempt {attempt+1} failed: {e}")
     
-    # Also try OpenTripMap for higher-quality results
     try:
-        async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
-            resp = await client.get("https://api.opentripmap.com/0.1/en/places/radius", params={
+        # Big-radius searches (25 km full-day plans) match far more than we show: the
+        # streamed answer is parsed as it arrives and cut off once 60 places are kept
+        all_places = await poi_collect(NEARBY_FILTERS, lat, lon, radius,
+                                       lambda el, seen: _overpass_nearby(el, seen, lat, lon),
+                                       want=60, limit=120, timeout=20, ql_timeout=15)
+        print(f"  [Nearby] Overpass OK: {len(all_places)} places")
+    except Exception as e:
+        print(f"Nearby Overpass failed: {e}")
+    
+    # Also try OpenTripMap for higher-quality results
+    if not provider_down("api.opentripmap.com"):  # breaker open: skip without waiting
+        try:
+            async with http_pool.stream("GET", "https://api.opentripmap.com/0.1/en/places/radius", params={
                 "radius": radius, "lon": lon, "lat": lat,
                 "kinds": "interesting_places,cultural,historic,natural,architecture,amusements,sport,beaches,gardens_and_parks,religion,museums,theatres_and_entertainments,foods",
                 "rate": "1",
                 "limit": 50, "format": "json"
-            })
-            if resp.status_code in (401, 403):
-                pass  # Auth required, skip silently
-            else:
-                otm_places = resp.json()
-                if isinstance(otm_places, list):
-                    seen_names = {p["name"].lower() for p in all_places}
-                    for place in otm_places:
-                        name = place.get("name", "").strip()
-                        if not name or len(name) < 3 or name.lower() in seen_names:
-                            continue
-                        if any(sw in name.lower() for sw in skip_words):
-                            continue
-                        seen_names.add(name.lower())
-                        
-                        kinds = place.get("kinds", "")
-                        p_lat2 = place.get("point", {}).get("lat", lat)
-                        p_lon2 = place.get("point", {}).get("lon", lon)
-                        
-                        dlat2 = math.radians(float(p_lat2) - lat)
-                        dlon2 = math.radians(float(p_lon2) - lon)
-                        a_val2 = math.sin(dlat2/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(float(p_lat2))) * math.sin(dlon2/2)**2
-                        dist2 = 6371000 * 2 * math.atan2(math.sqrt(a_val2), math.sqrt(1-a_val2))
-                        
-                        category = "attraction"
-                        subcategory = ""
-                        quality_score = (place.get("rate", 1) or 1) + 1
-                        
-                        if any(k in kinds for k in ["foods", "restaurants", "cafes"]):
-                            category = "eating"
-                        elif any(k in kinds for k in ["amusements", "sport", "beaches"]):
-                            category = "recreation"
-                            quality_score += 2
-                        elif any(k in kinds for k in ["natural", "gardens_and_parks"]):
-                            category = "nature"
-                        elif any(k in kinds for k in ["museums", "cultural", "historic", "religion", "architecture"]):
-                            category = "culture"
-                            quality_score += 1
-                        elif any(k in kinds for k in ["theatres_and_entertainments"]):
-                            category = "recreation"
-                        
-                        all_places.append({
-                            "name": name,
-                            "category": category,
-                            "subcategory": subcategory,
-                        "lat": float(p_lat2),
-                        "lon": float(p_lon2),
-                        "distance_m": round(dist2),
-                        "description": name,
-                        "opening_hours": "",
-                        "phone": "",
-                        "website": "",
-                        "wiki": name.replace(" ", "_"),
-                        "quality_score": quality_score,
-                        "photo": ""
-                    })
-    except Exception as e:
-        print(f"OTM nearby failed: {e}")
+            }, timeout=10) as resp:
+                if resp.status_code not in (401, 403):  # auth required: skip silently
+                    otm_places = iter_json_array(resp.aiter_bytes())
+                    try:
+                        all_places += await take(otm_places, lambda place, seen: _otm_nearby(place, seen, lat, lon),
+                                                 seen={p["name"].lower() for p in all_places})
+                    finally:
+                        await otm_places.aclose()
+        except Exception as e:
+            print(f"OTM nearby failed: {e}")
     
     # Also supplement with Wikipedia GeoSearch for notable places
-    try:
-        async with httpx.AsyncClient(timeout=8, headers=HEADERS) as client:
-            resp = await client.get("https://en.wikipedia.org/w/api.php", params={
+    if not provider_down("en.wikipedia.org"):  # breaker open: skip without waiting
+        try:
+            resp = await http_pool.get("https://en.wikipedia.org/w/api.php", params={
                 "action": "query", "list": "geosearch",
                 "gscoord": f"{lat}|{lon}", "gsradius": min(radius, 10000),
                 "gslimit": "30", "format": "json"
-            })
+            }, timeout=8)
             if resp.status_code == 200:
                 data = resp.json()
                 geo_results = data.get("query", {}).get("geosearch", [])
                 seen_nearby = {p["name"].lower() for p in all_places}
-                wiki_skip = {"district", "taluk", "ward", "constituency", "division", "block",
-                             "tehsil", "state highway", "national highway", "river", "lake",
-                             "pin code", "postal", "village", "mandal", "municipality",
-                             "railway line", "metro line", "assembly", "lok sabha", "rajya sabha"}
                 for item in geo_results:
                     title = item.get("title", "").strip()
-                    if not title or len(title) < 3 or title.lower() in seen_nearby:
-                        continue
-                    if any(sw in title.lower() for sw in wiki_skip):
+                    title_lower = title.lower()
+                    if len(title) < 3 or title_lower in seen_nearby:
                         continue
-                    if any(sw in title.lower() for sw in skip_words):
+                    if WIKI_NEARBY_SKIP(title_lower) or NEARBY_SKIP(title_lower):
                         continue
-                    seen_nearby.add(title.lower())
+                    seen_nearby.add(title_lower)
                     
                     w_lat = float(item.get("lat", lat))
                     w_lon = float(item.get("lon", lon))
-                    dlat_w = math.radians(w_lat - lat)
-                    dlon_w = math.radians(w_lon - lon)
-                    a_w = math.sin(dlat_w/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(w_lat)) * math.sin(dlon_w/2)**2
-                    dist_w = 6371000 * 2 * math.atan2(math.sqrt(a_w), math.sqrt(1-a_w))
                     
                     all_places.append({
                         "name": title,
@@ -955,7 +1066,7 @@ async def get_nearby_places(lat: float, lon: float, radius: int = 5000, categori
                         "subcategory": "notable place",
                         "lat": w_lat,
                         "lon": w_lon,
-                        "distance_m": round(dist_w),
+                        "distance_m": 0,
                         "description": f"Notable place: {title}",
                         "opening_hours": "",
                         "phone": "",
@@ -964,8 +1075,17 @@ async def get_nearby_places(lat: float, lon: float, radius: int = 5000, categori
                         "quality_score": 5,  # Wikipedia articles are high-quality places
                         "photo": ""
                     })
-    except Exception as e:
-        print(f"Wikipedia GeoSearch nearby failed: {e}")
+        except Exception as e:
+            print(f"Wikipedia GeoSearch nearby failed: {e}")
+    
+    # Collapse cross-source duplicates (same spot, different names), then measure
+    # and radius-filter everything in one spatial-index pass
+    all_places = dedupe_by_location(all_places, DUPLICATE_POI_M, prefer=_prefer_ascii_name)
+    in_range = _places_within(all_places, lat, lon, radius * NEARBY_RADIUS_SLACK)
+    all_places = []
+    for dist, p in in_range:
+        p["distance_m"] = round(dist)
+        all_places.append(p)
     
     # Sort by quality_score descending, then distance ascending
     all_places.sort(key=lambda x: (-x["quality_score"], x["distance_m"]))
@@ -996,11 +1116,10 @@ async def get_nearby_places(lat: float, lon: float, radius: int = 5000, categori
     
     # Fetch photos for top results
     if flat_list:
-        photo_tasks = [fetch_wiki_photo_fast(p["name"]) for p in flat_list[:15]]
-        results = await asyncio.gather(*photo_tasks, return_exceptions=True)
-        for i, result in enumerate(results):
-            if i < len(flat_list) and isinstance(result, str) and result:
-                flat_list[i]["photo"] = result
+        photos = await resolve_photos([[p["name"]] for p in flat_list[:15]])
+        for place, photo in zip(flat_list, photos):
+            if photo:
+                place["photo"] = photo
         # Also assign photos to categorized items
         photo_map = {p["name"]: p.get("photo", "") for p in flat_list if p.get("photo")}
         for cat in categorized:
@@ -1254,6 +1373,16 @@ def get_language_tips(city: str) -> Optional[Dict]:
     """Get language tips for a city - supports all Indian cities"""
     city_lower = city.lower().strip()
     
+    cached = _language_cache.get(city_lower)
+    if cached is not None:
+        return cached or None  # {} marks "no language data"
+    
+    tips = _lookup_language_tips(city_lower)
+    _language_cache[city_lower] = tips or {}
+    return tips
+
+def _lookup_language_tips(city_lower: str) -> Optional[Dict]:
+    """Uncached language lookup: exact city match, then partial match"""
     # Direct match
     lang_info = CITY_LANGUAGE_MAP.get(city_lower)
     
@@ -1285,67 +1414,35 @@ def get_language_tips(city: str) -> Optional[Dict]:
 # WEATHER API (OpenMeteo - free, no key needed)
 # ============================================
 async def fetch_weather(lat: float, lon: float, days: int = 7) -> List[Dict]:
-    """Fetch real weather forecast from Open-Meteo API"""
+    """Fetch real weather forecast from Open-Meteo API (cached per ~0.1° grid cell)"""
+    cell = weather_cell(lat, lon)
+    fetch = lambda: _weather_flight.do(cell, lambda: _fetch_weather(cell))
+    columns = await _weather_cache.aget_swr(cell, fetch)
+    if columns is None:
+        columns = await fetch()
+    return columns.forecasts(min(days, FORECAST_DAYS)) if columns else []
+
+async def _fetch_weather(cell: Tuple[int, int]) -> Optional[ForecastColumns]:
+    """Uncached Open-Meteo daily forecast for a grid cell (full horizon, so shorter requests are slices)"""
+    if provider_down("api.open-meteo.com"):
+        return None
+    lat, lon = cell_center(cell)
     try:
-        async with httpx.AsyncClient(timeout=8, headers=HEADERS) as client:
-            resp = await client.get("https://api.open-meteo.com/v1/forecast", params={
-                "latitude": lat, "longitude": lon,
-                "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weathercode",
-                "timezone": "auto",
-                "forecast_days": min(days, 7)
-            })
-            if resp.status_code != 200:
-                return []
-            data = resp.json()
-            daily = data.get("daily", {})
-            dates = daily.get("time", [])
-            temps_max = daily.get("temperature_2m_max", [])
-            temps_min = daily.get("temperature_2m_min", [])
-            precip = daily.get("precipitation_probability_max", [])
-            codes = daily.get("weathercode", [])
-            
-            WMO_CODES = {
-                0: ("Clear sky", "☀️", "low"),
-                1: ("Mainly clear", "🌤️", "low"),
-                2: ("Partly cloudy", "⛅", "low"),
-                3: ("Overcast", "☁️", "medium"),
-                45: ("Fog", "🌫️", "medium"),
-                48: ("Rime fog", "🌫️", "medium"),
-                51: ("Light drizzle", "🌦️", "medium"),
-                53: ("Moderate drizzle", "🌦️", "medium"),
-                55: ("Dense drizzle", "🌧️", "high"),
-                61: ("Slight rain", "🌧️", "medium"),
-                63: ("Moderate rain", "🌧️", "high"),
-                65: ("Heavy rain", "🌧️", "high"),
-                71: ("Slight snow", "🌨️", "high"),
-                73: ("Moderate snow", "🌨️", "high"),
-                75: ("Heavy snow", "❄️", "high"),
-                80: ("Slight showers", "🌦️", "medium"),
-                81: ("Moderate showers", "🌧️", "high"),
-                82: ("Violent showers", "⛈️", "high"),
-                95: ("Thunderstorm", "⛈️", "high"),
-                96: ("Thunderstorm + hail", "⛈️", "high"),
-                99: ("Thunderstorm + heavy hail", "⛈️", "high"),
-            }
-            
-            forecasts = []
-            for i in range(len(dates)):
-                code = codes[i] if i < len(codes) else 0
-                wmo = WMO_CODES.get(code, ("Unknown", "🌤️", "low"))
-                forecasts.append({
-                    "date": dates[i],
-                    "temp_max": temps_max[i] if i < len(temps_max) else 25,
-                    "temp_min": temps_min[i] if i < len(temps_min) else 15,
-                    "precipitation_probability": precip[i] if i < len(precip) else 0,
-                    "description": wmo[0],
-                    "icon": wmo[1],
-                    "risk_level": wmo[2],  # low, medium, high
-                    "weather_code": code
-                })
-            return forecasts
+        resp = await http_pool.get("https://api.open-meteo.com/v1/forecast", params={
+            "latitude": lat, "longitude": lon,
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weathercode",
+            "timezone": "auto",
+            "forecast_days": FORECAST_DAYS
+        }, timeout=8)
+        if resp.status_code != 200:
+            return None
+        columns = ForecastColumns.from_open_meteo(resp.json())
+        if len(columns):
+            _weather_cache[cell] = columns
+        return columns
     except Exception as e:
         print(f"Weather fetch failed: {e}")
-        return []
+        return None
 
 
 # ============================================
@@ -1389,11 +1486,32 @@ class AgentManager:
                 except: pass
 
 agent_manager = AgentManager()
+itinerary_optimizer = ItineraryOptimizer()
 
 # ============================================
 # FastAPI App
 # ============================================
-app = FastAPI(title="Smart Route SRMist - Agentic AI Travel Planner")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_pool.startup(UPSTREAM_HOSTS)
+    await open_persistent_cache()
+    regions = poi_registry.load_all()
+    if regions:
+        print(f"  Offline POI store: {regions} region(s) loaded from {POI_DATA_DIR}")
+    packs = city_packs.load_all()
+    print(f"  City packs: {packs} loaded from {CITY_PACK_DIR}")
+    if CITY_PACK_WARMER:
+        _spawn_background(refresh_city_packs())
+    try:
+        yield
+    finally:
+        await cancel_background_tasks()
+        await cancel_cache_refreshes()
+        await close_persistent_cache()
+        await http_pool.aclose()
+
+app = FastAPI(title="Smart Route SRMist - Agentic AI Travel Planner", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1402,6 +1520,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip/br for whole JSON bodies; NDJSON streams pass through uncompressed
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")))
 
 # ============================================
 # Models
@@ -1419,6 +1539,7 @@ class TripRequest(BaseModel):
     include_restaurants: bool = True
     include_transport: bool = True
     origin: str = ""  # User's starting location (city or specific place)
+    expand_media: bool = False  # inline per-activity "media" link blocks (old response shape)
 
 class ReplanRequest(BaseModel):
     destination: str
@@ -1792,6 +1913,25 @@ async def health():
         "agents_active": sum(1 for a in agent_manager.agents.values() if a["status"] != AgentStatus.IDLE),
         "agents_total": len(agent_manager.agents),
         "tasks_completed": agent_manager.tasks_completed,
+        "upstream_breakers": breaker_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Outbound connection pool and cache stats"""
+    return {
+        "http_pool": http_pool.stats(),
+        "overpass": overpass.stats(),
+        "geocoder": geocoder.stats(),
+        "gazetteer": gazetteer.stats(),
+        "caches": cache_stats(),
+        "singleflight": singleflight_stats(),
+        "persistent_cache": _persistent_store.stats() if _persistent_store else None,
+        "poi_store": poi_registry.stats(),
+        "poi_snapshots": poi_snapshots.stats(),
+        "city_packs": city_packs.stats(),
+        "compression": compression_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -1815,7 +1955,7 @@ async def get_attractions(city: str):
         return {
             "success": True, "city": city, "coordinates": geo,
             "attractions": attractions, "count": len(attractions),
-            "source": "api_merged",
+            "source": attraction_source_label(city),
             "elapsed_seconds": elapsed
         }
     except Exception as e:
@@ -1836,6 +1976,30 @@ async def get_weather(city: str, days: int = 7):
         "forecasts": forecasts
     }
 
+@app.get("/media-templates")
+async def media_templates():
+    """Link templates for compact activities: fill {q} (quoted name), {lat}, {lon}, {wiki}"""
+    return FastJSONResponse({"version": MEDIA_TEMPLATES_VERSION, "templates": MEDIA_TEMPLATES},
+                            headers={"Cache-Control": "public, max-age=86400"})
+
+@app.get("/activity/{activity_id}/media")
+async def get_activity_media(activity_id: str, name: str = "", lat: Optional[float] = None,
+                             lon: Optional[float] = None, wiki: str = ""):
+    """Expanded media links for one itinerary activity. Activities the server no longer
+    remembers can still be expanded from name/lat/lon query parameters, and any of those
+    parameters that are given win over what the server remembers."""
+    act = _activity_cache.get(activity_id)
+    given = {k: v for k, v in (("name", name), ("lat", lat), ("lon", lon), ("wiki", wiki)) if v not in ("", None)}
+    if act is None:
+        if not name or lat is None or lon is None:
+            raise HTTPException(status_code=404, detail=f"Unknown activity: {activity_id}")
+        act = {"wiki": None, "photos": []}
+    elif any(act.get(k) != given[k] for k in ("name", "lat", "lon") if k in given):
+        # The client is showing a different place under this id: none of the old one's wiki/photos apply
+        act = {**act, "wiki": None, "photos": []}
+    act = {**act, **given}
+    return {"id": activity_id, "name": act["name"], "media": expand_media(act)}
+
 @app.get("/language-tips")
 async def get_language_tips_endpoint(city: str):
     """Get language tips for any city including all Indian cities"""
@@ -1877,7 +2041,7 @@ async def get_nearby(request: NearbyRequest):
         radius = 15000
     
     elapsed = round(time.time() - start_time, 2)
-    return {
+    return FastJSONResponse({
         "success": True,
         "places": result["all"],
         "categorized": result["categorized"],
@@ -1887,8 +2051,182 @@ async def get_nearby(request: NearbyRequest):
         "coordinates": {"lat": lat, "lon": lon},
         "resolved_location": resolved_location,
         "elapsed_seconds": elapsed
+    })
+
+DAY_LAST_START_MIN = 21 * 60  # no visit starts after 21:00; later stops are dropped from the day
+
+def _build_trip_days(attractions: List[Dict], request: TripRequest, geo: Optional[Dict],
+                     city: str, weather_forecasts: List[Dict]) -> List[Dict]:
+    """Day-by-day itinerary from ranked attractions (no network calls)"""
+    duration = request.duration
+    
+    # Build itinerary — ZERO REPEATS, quality-sorted selection, route-optimised days
+    # The best attractions that fit the trip are clustered into geographically
+    # compact days, and each day is ordered as a short path from the city centre
+    sorted_attractions = sorted(attractions, key=lambda x: (-x.get("quality", 1), -x.get("rating", 0)))
+    acts_per_day = max(3, min(5, len(sorted_attractions) // max(duration, 1)))
+    trip_pool = sorted_attractions[:acts_per_day * max(duration, 1)]
+    start_point = (geo["lat"], geo["lon"]) if geo else None
+    day_routes = itinerary_optimizer.plan(
+        [(a.get("lat", 0), a.get("lon", 0)) for a in trip_pool], duration, acts_per_day,
+        start=start_point, weights=[a.get("quality", 1) for a in trip_pool]
+    )
+
+    days = []
+    start = datetime.strptime(request.start_date, "%Y-%m-%d")
+    time_slots = ["09:00", "11:30", "14:00", "16:30", "18:30"]
+
+    # Global used-names set ensures ZERO duplicates across ALL days
+    used_names = set()
+
+    for day_num in range(duration):
+        date = start + timedelta(days=day_num)
+        day_activities = []
+
+        # This day's cluster, already in visiting order
+        selected = []
+        for idx in day_routes[day_num].stops:
+            attr = trip_pool[idx]
+            if attr["name"] not in used_names:
+                selected.append(attr)
+                used_names.add(attr["name"])
+
+        # If we've used all attractions and still need more days,
+        # re-fetch or just have fewer activities
+        if len(selected) < 2 and len(used_names) >= len(sorted_attractions):
+            # Allow reuse only if absolutely necessary (all used up)
+            remaining = [a for a in sorted_attractions if a["name"] not in {s["name"] for s in selected}]
+            if not remaining:
+                remaining = sorted_attractions  # All used, allow reuse
+            for attr in remaining:
+                if len(selected) >= 3:
+                    break
+                if attr["name"] not in {s["name"] for s in selected}:
+                    selected.append(attr)
+
+        daily_cost = 0
+        # Schedule: keep the usual slots, but never start before we can actually arrive
+        clock = 9 * 60
+        prev_point, prev_name = start_point, "city centre"
+        day_km, day_travel_min = 0.0, 0
+        for i, attr in enumerate(selected):
+            photos = attr.get("photos", []) or ([attr.get("photo", "")] if attr.get("photo") else [])
+            photos = [p for p in photos if p]
+
+            here = (attr.get("lat", 0), attr.get("lon", 0))
+            travel = estimate_travel(haversine_m(*prev_point, *here)) if prev_point else \
+                {"distance_km": 0.0, "minutes": 0, "mode": "walk"}
+            travel["from"] = prev_name
+            slot_h, slot_m = map(int, time_slots[i % len(time_slots)].split(":"))
+            arrival = max(slot_h * 60 + slot_m, clock + travel["minutes"])
+            if arrival > DAY_LAST_START_MIN:
+                # Long driving day: the rest can't start before the evening cut-off.
+                # Unmark them so they stay available to the reuse fallback of later days.
+                used_names.difference_update(a["name"] for a in selected[i:])
+                break
+            clock = arrival
+            visit_time = f"{clock // 60:02d}:{clock % 60:02d}"
+            clock += int(_parse_duration(attr.get("duration", "2 hours")) * 60)
+            prev_point, prev_name = here, attr["name"]
+            day_km += travel["distance_km"]
+            day_travel_min += travel["minutes"]
+
+            activity = {
+                "id": activity_id(attr["name"], attr.get("lat", 0), attr.get("lon", 0)),
+                "name": attr["name"],
+                "wiki": wiki_title(attr["name"], attr.get("wiki")),
+                "type": attr.get("type", "attraction"),
+                "time": visit_time,
+                "travel_from_previous": travel,
+                "duration": attr.get("duration", "2 hours"),
+                "cost": attr.get("price", 0),
+                "rating": attr.get("rating", 4.5),
+                "description": attr.get("description", f"Visit {attr['name']}"),
+                "lat": attr.get("lat", 0),
+                "lon": attr.get("lon", 0),
+                "photo": photos[0] if photos else "",
+                "photos": photos,
+                "reviews_count": random.randint(500, 50000),
+            }
+            # Links are expanded on demand (/media-templates, /activity/{id}/media) unless asked for inline
+            _activity_cache.set(activity["id"], {k: activity[k] for k in ("name", "lat", "lon", "wiki", "photos")})
+            if request.expand_media:
+                activity["media"] = expand_media(activity, use_wiki=False)  # exactly the old inline block
+            day_activities.append(activity)
+            daily_cost += activity["cost"]
+
+        # Add weather info for this day
+        day_weather = None
+        if day_num < len(weather_forecasts):
+            day_weather = weather_forecasts[day_num]
+
+        days.append({
+            "day": day_num + 1,
+            "date": date.strftime("%Y-%m-%d"),
+            "city": city,
+            "activities": day_activities,
+            "daily_cost": daily_cost,
+            "travel": {"total_km": round(day_km, 2), "total_minutes": day_travel_min},
+            "weather": day_weather
+        })
+    
+    return days
+
+
+def _trip_costs(days: List[Dict], budget: float) -> Dict[str, Any]:
+    """Activity total plus the estimated budget breakdown for a built itinerary"""
+    total_cost = sum(d["daily_cost"] for d in days)
+
+    # Proper budget breakdown based on actual costs + estimated non-activity costs
+    activities_cost = total_cost
+    accommodation_est = min(budget * 0.35, budget - activities_cost) if budget > activities_cost else budget * 0.35
+    food_est = budget * 0.20
+    transport_est = budget * 0.10
+    emergency_est = budget * 0.05
+
+    budget_breakdown = {
+        "accommodation": round(accommodation_est),
+        "food": round(food_est),
+        "activities": round(activities_cost),
+        "transport": round(transport_est),
+        "emergency": round(emergency_est)
+    }
+
+    total_estimated = sum(budget_breakdown.values())
+    budget_used_pct = round((total_estimated / budget) * 100, 1) if budget > 0 else 0
+    
+    return {
+        "total_cost": total_cost,
+        "budget_breakdown": budget_breakdown,
+        "budget_summary": {
+            "total_budget": budget,
+            "total_estimated_spend": total_estimated,
+            "activities_cost": activities_cost,
+            "remaining": max(0, budget - total_estimated),
+            "utilization_pct": budget_used_pct,
+        },
+    }
+
+
+def _trip_metadata(request: TripRequest, city: str, origin_geo: Optional[Dict],
+                   attractions: List[Dict], days: List[Dict], elapsed: float) -> Dict[str, Any]:
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "destination": request.destination,
+        "destination_city": city,
+        "origin": request.origin or "",
+        "origin_coordinates": {"lat": origin_geo["lat"], "lon": origin_geo["lon"]} if origin_geo else None,
+        "duration": request.duration,
+        "budget": request.budget,
+        "elapsed_seconds": elapsed,
+        "attractions_count": len(attractions),
+        "photos_loaded": sum(1 for d in days for a in d["activities"] if a.get("photo")),
+        "route_optimized": True,
+        "total_travel_minutes": sum(d["travel"]["total_minutes"] for d in days),
+        "source": attraction_source_label(city, request.destination)
     }
 
+
 @app.post("/generate-trip")
 async def generate_trip(request: TripRequest):
     """Generate complete trip — ALL from APIs, zero duplicates.
@@ -1907,52 +2245,7 @@ async def generate_trip(request: TripRequest):
         geo = await geocode_city_fast(raw_destination)
         
         # Extract the city name from the geocoded result for attraction search
-        # CRITICAL: Smart extraction that doesn't confuse state names with country names
-        city = raw_destination  # Default: use what user typed
-        
-        # Country/region names to exclude from city extraction
-        country_names = {"india", "united states", "united kingdom", "france", "japan", "china",
-                        "thailand", "indonesia", "italy", "spain", "turkey", "germany", "australia",
-                        "brazil", "canada", "mexico", "russia", "south africa", "egypt", "morocco",
-                        "sri lanka", "nepal", "bangladesh", "pakistan", "myanmar", "cambodia", "vietnam",
-                        "south korea", "north korea", "new zealand", "argentina", "chile", "colombia",
-                        "peru", "portugal", "netherlands", "belgium", "switzerland", "austria", "greece",
-                        "czech republic", "poland", "sweden", "norway", "denmark", "finland", "ireland",
-                        "scotland", "wales", "england"}
-        admin_words = {"district", "tehsil", "ward", "state", "pin", "taluk", "division",
-                      "zone", "region", "province", "county", "department", "prefecture",
-                      "municipality", "block", "circle", "sub-division", "mandal"}
-        
-        if geo:
-            display = geo.get("display_name", "")
-            addr = geo.get("address", {})
-            parts = [p.strip() for p in display.split(",")]
-            
-            # Strategy 1: Use address fields if available (most reliable)
-            addr_city = (addr.get("city") or addr.get("town") or addr.get("village") 
-                        or addr.get("municipality") or addr.get("county") or "")
-            
-            # Strategy 2: For states/regions (like Goa), the raw_destination IS the city
-            geo_type = geo.get("type", "")
-            geo_class = geo.get("class", "")
-            if geo_type in ("administrative", "state", "boundary") or geo_class == "boundary":
-                # User typed a state/region name — use it directly for attraction search
-                city = raw_destination
-            elif addr_city and addr_city.lower() not in country_names:
-                city = addr_city
-            elif len(parts) > 0:
-                # Try to find a valid city from display_name parts, skipping countries and admin terms
-                city_candidates = [p for p in parts if len(p.strip()) > 2 
-                                  and p.strip().lower() not in country_names
-                                  and not p.strip().isdigit()
-                                  and not any(aw in p.strip().lower() for aw in admin_words)]
-                if city_candidates:
-                    # First candidate is usually the specific place, second is often the city
-                    # But if user typed a simple name like "Goa", prefer their input
-                    if len(raw_destination.split()) <= 2 and len(raw_destination) < 20:
-                        city = raw_destination  # User's input is clean enough
-                    else:
-                        city = city_candidates[0] if len(city_candidates) == 1 else city_candidates[1] if len(city_candidates) > 1 else city_candidates[0]
+        city = trip_city(raw_destination, geo)
         
         # Also geocode origin if provided
         origin_geo = None
@@ -1988,117 +2281,9 @@ async def generate_trip(request: TripRequest):
         
         await agent_manager.broadcast("research", f"Found {len(attractions)} unique attractions via APIs")
         
-        # Build itinerary — ZERO REPEATS, quality-sorted distribution
-        # Sort by quality first, then distribute top attractions across days
-        sorted_attractions = sorted(attractions, key=lambda x: (-x.get("quality", 1), -x.get("rating", 0)))
-        acts_per_day = max(3, min(5, len(sorted_attractions) // max(duration, 1)))
-        
-        days = []
-        start = datetime.strptime(request.start_date, "%Y-%m-%d")
-        time_slots = ["09:00", "11:30", "14:00", "16:30", "18:30"]
-        
-        # Global used-names set ensures ZERO duplicates across ALL days
-        used_names = set()
-        
-        for day_num in range(duration):
-            date = start + timedelta(days=day_num)
-            day_activities = []
-            
-            # Pick unique attractions for this day
-            # Distribute top attractions evenly: Day1 gets #1,#3,#5, Day2 gets #2,#4,#6 etc.
-            selected = []
-            for attr in sorted_attractions:
-                if attr["name"] not in used_names and len(selected) < acts_per_day:
-                    selected.append(attr)
-                    used_names.add(attr["name"])
-            
-            # If we've used all attractions and still need more days,
-            # re-fetch or just have fewer activities
-            if len(selected) < 2 and len(used_names) >= len(sorted_attractions):
-                # Allow reuse only if absolutely necessary (all used up)
-                remaining = [a for a in sorted_attractions if a["name"] not in {s["name"] for s in selected}]
-                if not remaining:
-                    remaining = sorted_attractions  # All used, allow reuse
-                for attr in remaining:
-                    if len(selected) >= 3:
-                        break
-                    if attr["name"] not in {s["name"] for s in selected}:
-                        selected.append(attr)
-            
-            daily_cost = 0
-            for i, attr in enumerate(selected):
-                photos = attr.get("photos", []) or ([attr.get("photo", "")] if attr.get("photo") else [])
-                photos = [p for p in photos if p]
-                
-                activity = {
-                    "name": attr["name"],
-                    "type": attr.get("type", "attraction"),
-                    "time": time_slots[i % len(time_slots)],
-                    "duration": attr.get("duration", "2 hours"),
-                    "cost": attr.get("price", 0),
-                    "rating": attr.get("rating", 4.5),
-                    "description": attr.get("description", f"Visit {attr['name']}"),
-                    "lat": attr.get("lat", 0),
-                    "lon": attr.get("lon", 0),
-                    "photo": photos[0] if photos else "",
-                    "photos": photos,
-                    "reviews_count": random.randint(500, 50000),
-                    "media": {
-                        "photos": photos,
-                        "videos": {
-                            "youtube": f"https://www.youtube.com/results?search_query={quote(attr['name'])}+travel+guide",
-                            "virtual_tour": f"https://www.youtube.com/results?search_query={quote(attr['name'])}+virtual+tour+4k"
-                        },
-                        "reviews": {
-                            "google": f"https://www.google.com/search?q={quote(attr['name'])}+reviews",
-                            "tripadvisor": f"https://www.tripadvisor.com/Search?q={quote(attr['name'])}"
-                        },
-                        "maps": {
-                            "google": f"https://www.google.com/maps/search/?api=1&query={attr.get('lat', 0)},{attr.get('lon', 0)}",
-                            "directions": f"https://www.google.com/maps/dir/?api=1&destination={attr.get('lat', 0)},{attr.get('lon', 0)}"
-                        },
-                        "links": {
-                            "wiki": f"https://en.wikipedia.org/wiki/{quote(attr['name'].replace(' ', '_'))}",
-                            "booking": f"https://www.google.com/search?q={quote(attr['name'])}+tickets+booking"
-                        }
-                    }
-                }
-                day_activities.append(activity)
-                daily_cost += activity["cost"]
-            
-            # Add weather info for this day
-            day_weather = None
-            if day_num < len(weather_forecasts):
-                day_weather = weather_forecasts[day_num]
-            
-            days.append({
-                "day": day_num + 1,
-                "date": date.strftime("%Y-%m-%d"),
-                "city": city,
-                "activities": day_activities,
-                "daily_cost": daily_cost,
-                "weather": day_weather
-            })
+        days = _build_trip_days(attractions, request, geo, city, weather_forecasts)
         
-        total_cost = sum(d["daily_cost"] for d in days)
-        
-        # Proper budget breakdown based on actual costs + estimated non-activity costs
-        activities_cost = total_cost
-        accommodation_est = min(budget * 0.35, budget - activities_cost) if budget > activities_cost else budget * 0.35
-        food_est = budget * 0.20
-        transport_est = budget * 0.10
-        emergency_est = budget * 0.05
-        
-        budget_breakdown = {
-            "accommodation": round(accommodation_est),
-            "food": round(food_est),
-            "activities": round(activities_cost),
-            "transport": round(transport_est),
-            "emergency": round(emergency_est)
-        }
-        
-        total_estimated = sum(budget_breakdown.values())
-        budget_used_pct = round((total_estimated / budget) * 100, 1) if budget > 0 else 0
+        costs = _trip_costs(days, budget)
         
         # Mark all agents completed
         for a in agent_manager.agents.values():
@@ -2113,11 +2298,12 @@ async def generate_trip(request: TripRequest):
         # Get language tips
         lang_tips = get_language_tips(city)
         
-        return {
+        # Returned as a response so FastAPI doesn't walk the whole itinerary in jsonable_encoder
+        return FastJSONResponse({
             "success": True,
             "itinerary": {
                 "days": days,
-                "total_cost": total_cost,
+                "total_cost": costs["total_cost"],
                 "cities": [city]
             },
             "bookings": {
@@ -2125,14 +2311,8 @@ async def generate_trip(request: TripRequest):
                 "flights": [],
                 "restaurants": []
             },
-            "budget_breakdown": budget_breakdown,
-            "budget_summary": {
-                "total_budget": budget,
-                "total_estimated_spend": total_estimated,
-                "activities_cost": activities_cost,
-                "remaining": max(0, budget - total_estimated),
-                "utilization_pct": budget_used_pct,
-            },
+            "budget_breakdown": costs["budget_breakdown"],
+            "budget_summary": costs["budget_summary"],
             "weather_forecasts": weather_forecasts,
             "language_tips": lang_tips,
             "agent_summary": {
@@ -2140,26 +2320,161 @@ async def generate_trip(request: TripRequest):
                 "tasks_completed": agent_manager.tasks_completed,
                 "total_time": f"{elapsed}s"
             },
-            "metadata": {
-                "generated_at": datetime.now().isoformat(),
-                "destination": raw_destination,
-                "destination_city": city,
-                "origin": origin,
-                "origin_coordinates": {"lat": origin_geo["lat"], "lon": origin_geo["lon"]} if origin_geo else None,
-                "duration": duration,
-                "budget": budget,
-                "elapsed_seconds": elapsed,
-                "attractions_count": len(attractions),
-                "photos_loaded": sum(1 for d in days for a in d["activities"] if a.get("photo")),
-                "source": "api_merged (Overpass + OpenTripMap + Wikipedia)"
-            }
-        }
+            "metadata": _trip_metadata(request, city, origin_geo, attractions, days, elapsed)
+        })
     except Exception as e:
         print(f"Error: {e}")
         import traceback; traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return dumps_json(event) + b"\n"
+
+
+def _photo_patches(days: List[Dict], attractions: List[Dict]) -> List[Dict]:
+    """Photo updates for activities that were streamed before the photo pass finished"""
+    photos_by_name = {a["name"]: a.get("photos") or ([a["photo"]] if a.get("photo") else [])
+                      for a in attractions if a.get("photo")}
+    patches = []
+    for day in days:
+        for i, act in enumerate(day["activities"]):
+            photos = photos_by_name.get(act["name"])
+            if photos and not act.get("photo"):
+                act["photo"], act["photos"] = photos[0], photos
+                if "media" in act:
+                    act["media"]["photos"] = photos
+                cached = _activity_cache.get(act.get("id"))
+                if cached is not None:
+                    cached["photos"] = photos
+                patches.append({"day": day["day"], "activity": i, "name": act["name"],
+                                "photo": photos[0], "photos": photos})
+    return patches
+
+
+@app.post("/generate-trip/stream")
+async def generate_trip_stream(request: TripRequest):
+    """Same trip as /generate-trip, streamed as NDJSON events so the UI can render early:
+    meta (geocode) -> one "day" per day -> "photos" / "weather" patches -> "summary" -> "done"."""
+    
+    async def events():
+        start_time = time.time()
+        origin_task = attractions_task = weather_task = photo_task = None
+        try:
+            raw_destination = request.destination
+            origin = request.origin or ""
+            
+            geo = await geocode_city_fast(raw_destination)
+            city = trip_city(raw_destination, geo)
+            origin_task = asyncio.ensure_future(geocode_city_fast(origin)) if origin else None
+            
+            for a in agent_manager.agents.values():
+                a["status"] = AgentStatus.WORKING
+            await agent_manager.broadcast("coordinator", f"Starting streamed trip generation for {raw_destination}")
+            
+            attractions_task = asyncio.ensure_future(get_ranked_attractions(city))
+            if not geo:
+                geo = await geocode_city_fast(city)
+            if geo:
+                weather_task = asyncio.ensure_future(fetch_weather(geo["lat"], geo["lon"], request.duration))
+            
+            yield _ndjson({
+                "type": "meta",
+                "destination": raw_destination,
+                "destination_city": city,
+                "geo": {"lat": geo["lat"], "lon": geo["lon"], "display_name": geo.get("display_name", "")} if geo else None,
+                "origin": origin,
+                "duration": request.duration,
+                "budget": request.budget,
+            })
+            
+            attractions, photos_pending = await attractions_task
+            search_city = city
+            if not attractions and city != raw_destination:
+                search_city = raw_destination
+                attractions, photos_pending = await get_ranked_attractions(raw_destination)
+            await agent_manager.broadcast("research", f"Found {len(attractions)} unique attractions via APIs")
+            
+            # Days go out as soon as attractions are ranked; weather/photos follow as patches
+            days = _build_trip_days(attractions, request, geo, city, [])
+            for day in days:
+                yield _ndjson({"type": "day", "day": day})
+            
+            if photos_pending and attractions:
+                photo_task = asyncio.ensure_future(complete_attraction_photos(search_city, attractions))
+            weather_forecasts = []
+            pending = {t for t in (photo_task, weather_task) if t is not None}
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    if task.exception() is not None:
+                        print(f"  Stream patch failed: {task.exception()}")
+                        continue
+                    if task is photo_task:
+                        patches = _photo_patches(days, task.result())
+                        if patches:
+                            yield _ndjson({"type": "photos", "patches": patches})
+                    else:
+                        weather_forecasts = task.result()
+                        for day in days:
+                            idx = day["day"] - 1
+                            day["weather"] = weather_forecasts[idx] if idx < len(weather_forecasts) else None
+                        yield _ndjson({
+                            "type": "weather",
+                            "weather_forecasts": weather_forecasts,
+                            "days": [{"day": d["day"], "weather": d["weather"]} for d in days],
+                        })
+            
+            origin_geo = await origin_task if origin_task else None
+            costs = _trip_costs(days, request.budget)
+            for a in agent_manager.agents.values():
+                a["status"] = AgentStatus.COMPLETED
+                a["completed"] += 1
+            agent_manager.tasks_completed += 1
+            elapsed = round(time.time() - start_time, 2)
+            await agent_manager.broadcast("coordinator", f"Trip streamed in {elapsed}s with {len(attractions)} API-sourced attractions!")
+            
+            yield _ndjson({
+                "type": "summary",
+                "total_cost": costs["total_cost"],
+                "cities": [city],
+                "budget_breakdown": costs["budget_breakdown"],
+                "budget_summary": costs["budget_summary"],
+                "language_tips": get_language_tips(city),
+                "agent_summary": {
+                    "agents_used": len(agent_manager.agents),
+                    "tasks_completed": agent_manager.tasks_completed,
+                    "total_time": f"{elapsed}s"
+                },
+                "metadata": _trip_metadata(request, city, origin_geo, attractions, days, elapsed),
+            })
+            yield _ndjson({"type": "done", "success": True})
+        except Exception as e:
+            print(f"Stream error: {e}")
+            import traceback; traceback.print_exc()
+            yield _ndjson({"type": "error", "detail": str(e)})
+        finally:
+            # Also runs when the client disconnects (the generator is closed/cancelled)
+            for task in (origin_task, attractions_task, weather_task, photo_task):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _replacement_activity(act: Dict, alt: Dict, **changes) -> Dict:
+    """`act`'s slot filled by `alt`: everything derived from the place (id, wiki, coordinates,
+    photos, inline media) follows the new place instead of the one it replaces"""
+    new = {**act, "name": alt["name"], "type": alt["type"], "lat": alt["lat"], "lon": alt["lon"],
+           "wiki": wiki_title(alt["name"], alt.get("wiki")),
+           "photo": alt.get("photo", ""), "photos": alt.get("photos", []), **changes}
+    new["id"] = activity_id(new["name"], new["lat"], new["lon"])
+    _activity_cache.set(new["id"], {k: new[k] for k in ("name", "lat", "lon", "wiki", "photos")})
+    if "media" in act:
+        new["media"] = expand_media(new, use_wiki=False)
+    return new
+
 @app.post("/replan")
 async def replan_trip(request: ReplanRequest):
     """Replan trip for delay, weather risk, OR crowd issues"""
@@ -2205,36 +2520,27 @@ async def replan_trip(request: ReplanRequest):
             try:
                 geo = await geocode_city_fast(request.destination)
                 if geo:
-                    alt_query = f"""
-                    [out:json][timeout:10];
-                    (
-                      node["tourism"~"museum|gallery"](around:10000,{geo['lat']},{geo['lon']});
-                      node["amenity"~"theatre|cinema|arts_centre"](around:10000,{geo['lat']},{geo['lon']});
-                      node["shop"~"mall|department_store"](around:10000,{geo['lat']},{geo['lon']});
-                    );
-                    out 15;
-                    """
-                    async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
-                        resp = await client.post("https://overpass-api.de/api/interpreter", data={"data": alt_query})
-                        if resp.status_code == 200:
-                            elements = resp.json().get("elements", [])
-                            used_in_itin = {a["name"].lower() for d in original_days for a in d.get("activities", [])}
-                            for el in elements:
-                                tags = el.get("tags", {})
-                                name = tags.get("name", tags.get("name:en", "")).strip()
-                                if name and len(name) >= 3 and name.lower() not in used_in_itin:
-                                    indoor_alternatives.append({
-                                        "name": name,
-                                        "type": "museum" if "museum" in tags.get("tourism", "") else "indoor",
-                                        "lat": el.get("lat", geo["lat"]),
-                                        "lon": el.get("lon", geo["lon"]),
-                                        "description": f"Indoor alternative: {name}",
-                                        "cost": random.choice([0, 100, 200, 300, 500]),
-                                        "duration": random.choice(["1-2 hours", "2 hours", "2-3 hours"]),
-                                        "rating": round(3.8 + random.random() * 1.2, 1),
-                                        "reviews_count": random.randint(500, 20000),
-                                        "photo": "", "photos": []
-                                    })
+                    alt_data = await poi_query(INDOOR_FILTERS, geo['lat'], geo['lon'], 10000, limit=15, timeout=10)
+                    if alt_data:
+                        elements = alt_data.get("elements", [])
+                        used_in_itin = {a["name"].lower() for d in original_days for a in d.get("activities", [])}
+                        for el in elements:
+                            tags = el.get("tags", {})
+                            name = tags.get("name", tags.get("name:en", "")).strip()
+                            if name and len(name) >= 3 and name.lower() not in used_in_itin:
+                                indoor_alternatives.append({
+                                    "name": name,
+                                    "type": "museum" if "museum" in tags.get("tourism", "") else "indoor",
+                                    "lat": el.get("lat", geo["lat"]),
+                                    "lon": el.get("lon", geo["lon"]),
+                                    "description": f"Indoor alternative: {name}",
+                                    "cost": random.choice([0, 100, 200, 300, 500]),
+                                    "duration": random.choice(["1-2 hours", "2 hours", "2-3 hours"]),
+                                    "rating": round(3.8 + random.random() * 1.2, 1),
+                                    "reviews_count": random.randint(500, 20000),
+                                    "wiki": tags.get("wikipedia", "").replace("en:", "").replace(" ", "_"),
+                                    "photo": "", "photos": []
+                                })
             except:
                 pass
             
@@ -2249,19 +2555,15 @@ async def replan_trip(request: ReplanRequest):
                         if alt_idx < len(indoor_alternatives):
                             alt = indoor_alternatives[alt_idx]
                             alt_idx += 1
-                            act_copy = {
-                                **act_copy,
-                                "name": alt["name"],
-                                "type": alt["type"],
-                                "lat": alt["lat"],
-                                "lon": alt["lon"],
-                                "description": alt["description"],
-                                "cost": alt["cost"],
-                                "duration": alt["duration"],
-                                "weather_warning": f"🔄 Replaced outdoor activity due to {weather_risk.replace('_', ' ')} — original: {act['name']}",
-                                "original_name": act["name"],
-                                "original_type": act_type
-                            }
+                            act_copy = _replacement_activity(
+                                act_copy, alt,
+                                description=alt["description"],
+                                cost=alt["cost"],
+                                duration=alt["duration"],
+                                weather_warning=f"🔄 Replaced outdoor activity due to {weather_risk.replace('_', ' ')} — original: {act['name']}",
+                                original_name=act["name"],
+                                original_type=act_type
+                            )
                             changes_made.append(f"Replaced '{act['name']}' with indoor alternative '{alt['name']}'")
                         else:
                             act_copy["weather_warning"] = f"⚠️ {weather_risk.replace('_', ' ').title()} expected — consider indoor alternative"
@@ -2283,8 +2585,8 @@ async def replan_trip(request: ReplanRequest):
                         if alt_idx < len(indoor_alternatives):
                             alt = indoor_alternatives[alt_idx]
                             alt_idx += 1
-                            act_copy = {**act_copy, "name": alt["name"], "type": alt["type"],
-                                        "weather_warning": f"🔄 Replaced viewpoint due to fog — original: {act['name']}"}
+                            act_copy = _replacement_activity(
+                                act_copy, alt, weather_warning=f"🔄 Replaced viewpoint due to fog — original: {act['name']}")
                     new_activities.append(act_copy)
                 else:
                     new_activities.append(act_copy)
@@ -2688,13 +2990,9 @@ async def recommend_trip(request: RecommendRequest):
     recommendations = recommend_destinations(request)
     
     # Fetch photos for top recommendations in parallel
-    photo_tasks = [fetch_wiki_photo_fast(r["name"]) for r in recommendations[:5]]
-    photos = await asyncio.gather(*photo_tasks, return_exceptions=True)
-    for i, photo in enumerate(photos):
-        if i < len(recommendations) and isinstance(photo, str) and photo:
-            recommendations[i]["photo"] = photo
-        elif i < len(recommendations):
-            recommendations[i]["photo"] = ""
+    photos = await resolve_photos([[r["name"]] for r in recommendations[:5]])
+    for rec, photo in zip(recommendations, photos):
+        rec["photo"] = photo
     
     elapsed = round(time.time() - start_time, 2)
     
@@ -2735,72 +3033,18 @@ async def plan_half_day(request: HalfDayPlanRequest):
     
     await agent_manager.broadcast("coordinator", f"Planning {request.hours_available}h near {request.location}")
     
-    # Step 1: Geocode the specific location with multiple fallback strategies
+    # Step 1: Geocode the specific location (phrasings raced concurrently: as typed, ", India",
+    # the part before the comma, without "near"/"around")
     geo = await geocode_city_fast(request.location)
     
-    # If first attempt failed, try splitting and adding context
-    if not geo:
-        # Try just the main part (before comma)
-        main_part = request.location.split(",")[0].strip()
-        if main_part != request.location:
-            geo = await geocode_city_fast(main_part)
-    
-    if not geo:
-        # Try with "near" phrasing
-        geo = await geocode_city_fast(request.location.replace("near ", "").replace("around ", ""))
-    
     if not geo:
         raise HTTPException(status_code=404, detail=f"Could not find location: {request.location}. Try adding the city name (e.g., '{request.location}, Chennai')")
     
     lat, lon = geo["lat"], geo["lon"]
     display_name = geo.get("display_name", request.location)
     
-    # Step 2: Extract city name from display_name for broader attraction search
-    # display_name format: "SRM University, Street, Area, City Division, City, State, Pincode, Country"
-    # Known major Indian cities for matching
-    major_cities = {"mumbai", "delhi", "bangalore", "bengaluru", "chennai", "kolkata", "hyderabad",
-                    "pune", "ahmedabad", "jaipur", "lucknow", "surat", "kanpur", "nagpur", "indore",
-                    "bhopal", "visakhapatnam", "patna", "vadodara", "ghaziabad", "ludhiana", "agra",
-                    "varanasi", "coimbatore", "kochi", "thiruvananthapuram", "mysore", "mysuru",
-                    "goa", "chandigarh", "shimla", "manali", "rishikesh", "dehradun", "amritsar",
-                    "new delhi", "noida", "gurgaon", "gurugram", "faridabad", "thane", "navi mumbai",
-                    "paris", "london", "tokyo", "rome", "barcelona", "istanbul", "bangkok", "dubai",
-                    "singapore", "amsterdam", "cairo", "seoul", "prague", "vienna", "lisbon", "sydney",
-                    "hanoi", "new york", "bali", "kathmandu", "colombo", "kuala lumpur"}
-    
-    city_name = ""
-    parts = [p.strip() for p in display_name.split(",")]
-    
-    # First: check if any part matches a known major city
-    for part in parts:
-        part_lower = part.strip().lower()
-        if part_lower in major_cities:
-            city_name = part.strip()
-            break
-        # Also check if the part contains the city name (e.g., "Mumbai Zone 6")
-        for mc in major_cities:
-            if mc in part_lower and len(part_lower) < 30:
-                city_name = mc.title()
-                break
-        if city_name:
-            break
-    
-    # Fallback: use the user's location input (last word or after last comma)
-    if not city_name:
-        # Try the last meaningful word from the user input
-        user_parts = request.location.replace(",", " ").split()
-        if len(user_parts) > 1:
-            city_name = user_parts[-1]  # Usually the city is the last word
-        else:
-            city_name = request.location
-    
-    # Final fallback: use 3rd-4th component from display_name (skip the specific place)
-    if not city_name or len(city_name) < 3:
-        for part in parts[2:5]:
-            part_clean = part.strip()
-            if part_clean and len(part_clean) > 3 and not part_clean.isdigit():
-                city_name = part_clean
-                break
+    # Step 2: City for the broader attraction search (memoised on the geocode entry)
+    city_name = resolve_place(request.location, geo)["city"]
     
     # Step 3: Determine radius based on hours available (more generous)
     if request.hours_available <= 2:
@@ -2836,16 +3080,16 @@ async def plan_half_day(request: HalfDayPlanRequest):
     
     # Step 5: Merge Wikipedia and OpenTripMap results into all_places
     seen_names = {p["name"].lower() for p in all_places}
+    # Index what we already have so same-spot duplicates under another name are skipped
+    known = SpatialIndex(cell_m=DUPLICATE_POI_M, ref_lat=lat)
+    for p in all_places:
+        known.insert(float(p["lat"]), float(p["lon"]))
     
-    for wp in wiki_places:
+    # Allow slightly beyond radius
+    for dist, wp in _places_within(wiki_places, lat, lon, radius * 1.5):
         if wp["name"].lower() not in seen_names and wp["name"].lower() != city_name.lower():
-            # Calculate distance from user location
-            dlat = math.radians(wp["lat"] - lat)
-            dlon = math.radians(wp["lon"] - lon)
-            a_val = math.sin(dlat/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(wp["lat"])) * math.sin(dlon/2)**2
-            dist = 6371000 * 2 * math.atan2(math.sqrt(a_val), math.sqrt(1-a_val))
-            
-            if dist <= radius * 1.5:  # Allow slightly beyond radius
+            if known.find_near(wp["lat"], wp["lon"], DUPLICATE_POI_M) is None:
+                known.insert(wp["lat"], wp["lon"])
                 all_places.append({
                     "name": wp["name"],
                     "category": wp.get("type", "attraction"),
@@ -2862,14 +3106,10 @@ async def plan_half_day(request: HalfDayPlanRequest):
                 })
                 seen_names.add(wp["name"].lower())
     
-    for op in otm_places:
+    for dist2, op in _places_within(otm_places, lat, lon, radius * 1.5):
         if op["name"].lower() not in seen_names:
-            dlat2 = math.radians(op["lat"] - lat)
-            dlon2 = math.radians(op["lon"] - lon)
-            a_val2 = math.sin(dlat2/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(op["lat"])) * math.sin(dlon2/2)**2
-            dist2 = 6371000 * 2 * math.atan2(math.sqrt(a_val2), math.sqrt(1-a_val2))
-            
-            if dist2 <= radius * 1.5:
+            if known.find_near(op["lat"], op["lon"], DUPLICATE_POI_M) is None:
+                known.insert(op["lat"], op["lon"])
                 all_places.append({
                     "name": op["name"],
                     "category": op.get("type", "attraction"),
@@ -2888,11 +3128,7 @@ async def plan_half_day(request: HalfDayPlanRequest):
     # Step 6: If still nothing, try wider radius with just Wikipedia
     if not all_places:
         wider_wiki = await fetch_wikipedia_attractions(city_name, lat, lon)
-        for wp in wider_wiki:
-            dlat = math.radians(wp["lat"] - lat)
-            dlon = math.radians(wp["lon"] - lon)
-            a_val = math.sin(dlat/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(wp["lat"])) * math.sin(dlon/2)**2
-            dist = 6371000 * 2 * math.atan2(math.sqrt(a_val), math.sqrt(1-a_val))
+        for dist, wp in _places_within(wider_wiki, lat, lon, float("inf")):
             all_places.append({
                 "name": wp["name"],
                 "category": wp.get("type", "attraction"),
@@ -2911,11 +3147,7 @@ async def plan_half_day(request: HalfDayPlanRequest):
     if not all_places:
         attractions = await get_attractions_api(city_name)
         if attractions:
-            for a in attractions:
-                dlat = math.radians(a["lat"] - lat)
-                dlon = math.radians(a["lon"] - lon)
-                a_val = math.sin(dlat/2)**2 + math.cos(math.radians(lat)) * math.cos(math.radians(a["lat"])) * math.sin(dlon/2)**2
-                dist = 6371000 * 2 * math.atan2(math.sqrt(a_val), math.sqrt(1-a_val))
+            for dist, a in _places_within(attractions, lat, lon, float("inf")):
                 all_places.append({
                     "name": a["name"],
                     "category": a.get("type", "attraction"),
@@ -3022,18 +3254,15 @@ async def plan_half_day(request: HalfDayPlanRequest):
     
     # Fetch photos for plan items that don't have one
     if plan_activities:
-        photo_tasks = [fetch_wiki_photo_fast(a["name"]) for a in plan_activities if not a.get("photo")]
-        photos = await asyncio.gather(*photo_tasks, return_exceptions=True)
-        photo_idx = 0
-        for a in plan_activities:
-            if not a.get("photo") and photo_idx < len(photos):
-                if isinstance(photos[photo_idx], str) and photos[photo_idx]:
-                    a["photo"] = photos[photo_idx]
-                photo_idx += 1
+        missing = [a for a in plan_activities if not a.get("photo")]
+        photos = await resolve_photos([[a["name"]] for a in missing])
+        for a, photo in zip(missing, photos):
+            if photo:
+                a["photo"] = photo
     
     elapsed = round(time.time() - start_time, 2)
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "location": request.location,
         "coordinates": geo,
@@ -3061,7 +3290,7 @@ async def plan_half_day(request: HalfDayPlanRequest):
             "opentripmap": len(otm_places) if isinstance(otm_places, list) else 0,
             "total_merged": len(all_places),
         }
-    }
+    })
 
 
 @app.post("/agentic/flights/search")
@@ -3265,13 +3494,19 @@ CHATBOT_KNOWLEDGE = {
 }
 
 
+async def _destination_city_key(destination: str) -> str:
+    """Lower-cased canonical city for a free-text destination ("Bangalore, India" -> "bengaluru")"""
+    if not destination.strip():
+        return ""
+    geo = await geocode_city_fast(destination)
+    return resolve_place(destination, geo)["trip_city"].lower().strip() if geo else destination.lower().strip()
+
+
 async def _chatbot_suggest_places(location_query: str, dest: str, purpose: str = "") -> str:
     """Smart place suggestion using geocoding + nearby API"""
     # First geocode the location the user mentioned
-    geo = await geocode_city_fast(location_query)
-    if not geo:
-        # Try with destination appended
-        geo = await geocode_city_fast(f"{location_query}, {dest}" if dest else location_query)
+    # Destination-qualified phrasing races alongside the plain one
+    geo = await geocode_city_fast(location_query, [f"{location_query}, {dest}"] if dest else ())
     
     if not geo:
         return f"I couldn't find the exact location '<strong>{location_query}</strong>'. Try being more specific (e.g., 'suggest places near SRM University Chennai') or use the <strong>📍 Nearby</strong> button for GPS-based search."
@@ -3417,7 +3652,8 @@ async def chatbot_response(request: ChatRequest):
         
         # --- HIDDEN GEMS ---
         if any(kw in msg_lower for kw in ["hidden gem", "less known", "off the beaten", "secret", "viral"]):
-            gems = CHATBOT_KNOWLEDGE["hidden_gems"].get(dest, [])
+            gems = CHATBOT_KNOWLEDGE["hidden_gems"].get(dest) or \
+                CHATBOT_KNOWLEDGE["hidden_gems"].get(await _destination_city_key(request.destination), [])
             if gems:
                 gem_list = "".join([f"<li><strong>{g}</strong></li>" for g in gems])
                 response = f"Hidden gems in <strong>{request.destination}</strong>:<ul style='margin:6px 0 0 16px'>{gem_list}</ul>"
@@ -3449,7 +3685,8 @@ async def chatbot_response(request: ChatRequest):
         # --- FOOD --- (use word boundary for "eat" to avoid matching "weather")
         if any(kw in msg_lower for kw in ["food", "restaurant", "cuisine", "dining", "lunch", "dinner", "breakfast"]) or \
            re.search(r'\beat\b', msg_lower):
-            foods = CHATBOT_KNOWLEDGE["food"].get(dest, [])
+            foods = CHATBOT_KNOWLEDGE["food"].get(dest) or \
+                CHATBOT_KNOWLEDGE["food"].get(await _destination_city_key(request.destination), [])
             if foods:
                 food_list = "".join([f"<li><strong>{f}</strong></li>" for f in foods])
                 response = f"Must-try food in <strong>{request.destination}</strong>:<ul style='margin:6px 0 0 16px'>{food_list}</ul>"
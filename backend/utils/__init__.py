@@ -2,10 +2,14 @@
 
 from .config import settings
 from .helpers import format_currency, calculate_distance, format_time
+from .distance import haversine_m, one_to_many, distance_matrix
 
 __all__ = [
     "settings",
     "format_currency",
     "calculate_distance",
     "format_time",
+    "haversine_m",
+    "one_to_many",
+    "distance_matrix",
 ]
@@ -0,0 +1,350 @@
+"""
+Bounded, TTL-aware in-memory caches
+
+Each cache is a namespace (geocodes, attractions, photos, weather, ...) with
+its own TTL, entry limit, byte ceiling and eviction policy (LRU or sampled
+LFU). Every cache registers itself so /metrics can report hit/miss/eviction
+counters for all of them.
+
+A cache can be backed by a persistent CacheStore (see persistent_cache.py);
+`aget`/`aset` then read through to and write through to that second tier.
+
+With a `soft_ttl` the cache does stale-while-revalidate: past the soft TTL
+an entry is still served instantly by `aget_swr`, which kicks off a
+background refresh (at most `max_refreshes` at a time per cache); only past
+the hard `ttl` does the entry disappear and callers block on a fetch.
+"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+
+from .rate_limit import background_priority
+
+if TYPE_CHECKING:
+    from .persistent_cache import CacheStore
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+_MISSING = object()
+
+# All caches created in this process, by namespace
+CACHES: Dict[str, "TTLCache"] = {}
+
+
+def approx_size(value: Any) -> int:
+    """Rough deep size in bytes of JSON-like data (dicts, lists, strings, numbers)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approx_size(k) + approx_size(v)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            size += approx_size(v)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "fresh_until", "size", "hits")
+
+    def __init__(self, value: Any, expires_at: float, fresh_until: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.fresh_until = fresh_until
+        self.size = size
+        self.hits = 0
+
+
+class TTLCache:
+    """Size- and memory-bounded cache with per-entry expiry.
+
+    policy="lru" evicts the least recently used entry; policy="lfu" samples the
+    oldest few entries and evicts the least frequently hit one (Redis-style
+    approximate LFU, O(sample) per eviction).
+
+    `ttl` is the hard expiry; `soft_ttl` (optional, <= ttl) is when an entry
+    turns stale and `aget_swr` starts revalidating it in the background.
+    """
+
+    LFU_SAMPLE = 16
+
+    def __init__(self, namespace: str, maxsize: int = 1024, ttl: float = HOUR,
+                 max_bytes: Optional[int] = None, policy: str = "lru",
+                 soft_ttl: Optional[float] = None, max_refreshes: int = 4):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        if soft_ttl is not None and soft_ttl > ttl:
+            raise ValueError("soft_ttl must not exceed ttl")
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.soft_ttl = soft_ttl
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.store: Optional["CacheStore"] = None
+        self.store_hits = 0
+        # Stale-while-revalidate bookkeeping
+        self.max_refreshes = max_refreshes
+        self._refreshing: Set[Hashable] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._refresh_slots: Optional[asyncio.Semaphore] = None
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refreshes_skipped = 0
+        CACHES[namespace] = self
+
+    # ---------- dict-like API ----------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        entry.hits += 1
+        self.hits += 1
+        if self.policy == "lru":
+            self._data.move_to_end(key)
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if key in self._data:
+            self._remove(key)
+        size = approx_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else; don't cache it at all
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        # The stale window sits at the end of the hard TTL, so entries restored from the
+        # persistent tier with their remaining TTL turn stale at the right moment too
+        fresh_until = expires_at - (self.ttl - self.soft_ttl) if self.soft_ttl is not None else expires_at
+        self._data[key] = _Entry(value, expires_at, fresh_until, size)
+        self._bytes += size
+        self._enforce_limits()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        self._remove(key)
+        return entry.value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry.expires_at > time.monotonic()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ---------- persistent tier ----------
+    def attach_store(self, store: Optional["CacheStore"]) -> None:
+        self.store = store
+
+    async def aget(self, key: Hashable, default: Any = None) -> Any:
+        """Like get(), but falls back to the persistent store on a memory miss"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is None:
+            return default
+        found = await self.store.get(self.namespace, key)
+        if found is None:
+            return default
+        value, ttl_left = found
+        self.set(key, value, ttl=ttl_left)
+        self.store_hits += 1
+        return value
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Like set(), but also writes through to the persistent store"""
+        self.set(key, value, ttl)
+        if self.store is not None:
+            await self.store.set(self.namespace, key, value, self.ttl if ttl is None else ttl)
+
+    async def aget_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """{key: value} for the keys found; memory first, then one batched store read
+        for everything memory missed"""
+        found: Dict[Hashable, Any] = {}
+        missing = []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing and self.store is not None:
+            for key, (value, ttl_left) in (await self.store.get_many(self.namespace, missing)).items():
+                self.set(key, value, ttl=ttl_left)
+                self.store_hits += 1
+                found[key] = value
+        return found
+
+    async def aset_many(self, items: Sequence[Tuple[Hashable, Any, Optional[float]]]) -> None:
+        """aset() for (key, value, ttl) triples (ttl None = the cache default), written
+        through to the store in one batch"""
+        for key, value, ttl in items:
+            self.set(key, value, ttl)
+        if self.store is not None:
+            await self.store.set_many(self.namespace, [
+                (key, value, self.ttl if ttl is None else ttl) for key, value, ttl in items])
+
+    # ---------- stale-while-revalidate ----------
+    def is_stale(self, key: Hashable) -> bool:
+        """Present (not hard-expired) but past its soft TTL"""
+        entry = self._data.get(key)
+        now = time.monotonic()
+        return entry is not None and entry.fresh_until <= now < entry.expires_at
+
+    async def aget_swr(self, key: Hashable, refresh: Callable[[], Awaitable[Any]],
+                       default: Any = None) -> Any:
+        """Like aget(); a stale hit is still returned, and `refresh()` is scheduled in the
+        background to re-fetch it. `refresh` must store the new value itself (it is
+        usually the same single-flighted loader a miss would await)."""
+        value = await self.aget(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if self.is_stale(key):
+            self.stale_hits += 1
+            self.revalidate(key, refresh)
+        return value
+
+    def revalidate(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """Schedule a background refresh of `key` unless one is already running for it"""
+        if key in self._refreshing:
+            return False
+        if len(self._refreshing) >= self.max_refreshes * 4:
+            # Refresh queue is backed up (upstream slow/down); the hard TTL still bounds staleness
+            self.refreshes_skipped += 1
+            return False
+        if self._refresh_slots is None:
+            self._refresh_slots = asyncio.Semaphore(self.max_refreshes)
+        self._refreshing.add(key)
+        task = asyncio.ensure_future(self._run_refresh(key, refresh))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        return True
+
+    async def _run_refresh(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            async with self._refresh_slots:
+                with background_priority():  # nobody is waiting on this one
+                    await refresh()
+            self.refreshes += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.refresh_failures += 1  # keep serving the stale value until the hard TTL
+            print(f"  [{self.namespace}] background refresh of {key!r} failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def cancel_refreshes(self) -> None:
+        tasks = list(self._refresh_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def warm(self, limit: int = 200) -> int:
+        """Load the most-hit live entries from the persistent store (warm start)"""
+        if self.store is None:
+            return 0
+        entries = await self.store.hot_entries(self.namespace, limit)
+        for key, value, ttl_left in entries:
+            self.set(key, value, ttl=ttl_left)
+        return len(entries)
+
+    # ---------- eviction ----------
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._data.items() if e.expires_at <= now]:
+            self._remove(key)
+            self.expirations += 1
+
+    def _victim(self) -> Hashable:
+        if self.policy == "lru":
+            return next(iter(self._data))
+        sample = []
+        for key, entry in self._data.items():
+            sample.append((entry.hits, key))
+            if len(sample) >= self.LFU_SAMPLE:
+                break
+        return min(sample, key=lambda s: s[0])[1]
+
+    def _over_limit(self) -> bool:
+        if len(self._data) > self.maxsize:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _enforce_limits(self) -> None:
+        if not self._over_limit():
+            return
+        self._purge_expired()
+        while self._data and self._over_limit():
+            self._remove(self._victim())
+            self.evictions += 1
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "policy": self.policy,
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "soft_ttl_seconds": self.soft_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "store_hits": self.store_hits,
+            "persistent": self.store is not None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refreshes_in_flight": len(self._refreshing),
+            "refresh_failures": self.refresh_failures,
+            "refreshes_skipped": self.refreshes_skipped,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache namespace"""
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+async def cancel_cache_refreshes() -> None:
+    """Stop every cache's in-flight background refreshes (shutdown)"""
+    for cache in CACHES.values():
+        await cache.cancel_refreshes()
@@ -0,0 +1,158 @@
+"""
+Per-provider circuit breakers with adaptive timeouts
+
+Each upstream provider (Nominatim, each Overpass mirror, OpenTripMap,
+Wikipedia, Open-Meteo) gets a breaker:
+
+  closed     normal operation; consecutive failures are counted
+  open       calls fail fast with CircuitOpenError until the cool-down ends
+  half_open  one probe call is let through; success closes, failure re-opens
+
+Auth errors (401/403) and rate limiting (429) open the breaker immediately,
+for longer, since retrying sooner can't succeed. The breaker also keeps a
+window of successful latencies so callers' timeouts shrink to what the
+provider actually needs instead of always waiting out a worst-case value.
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# All breakers created in this process, by provider name
+BREAKERS: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit open (retry in {retry_in:.0f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker plus latency-percentile timeouts for one provider"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0,
+                 auth_recovery_seconds: float = 600.0, rate_limit_recovery_seconds: float = 60.0,
+                 timeout_quantile: float = 0.95, timeout_multiplier: float = 3.0,
+                 min_timeout: float = 2.0, window: int = 200):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.auth_recovery_seconds = auth_recovery_seconds
+        self.rate_limit_recovery_seconds = rate_limit_recovery_seconds
+        self.timeout_quantile = timeout_quantile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_for = recovery_seconds
+        self.last_error = ""
+        self._probe_in_flight = False
+
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        BREAKERS[name] = self
+
+    # ---------- state machine ----------
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_for - time.monotonic())
+
+    def allow(self) -> bool:
+        """May a call go out now? Moves open -> half_open once the cool-down is over"""
+        if self.state == OPEN and self.retry_in() <= 0:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def is_open(self) -> bool:
+        """True when calls would be rejected right now (doesn't consume the half-open probe)"""
+        if self.state == OPEN:
+            return self.retry_in() > 0
+        return self.state == HALF_OPEN and self._probe_in_flight
+
+    def before_call(self) -> None:
+        self.calls += 1
+        if not self.allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def abandon(self) -> None:
+        """The call was cancelled before it finished; free the half-open probe slot"""
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self, reason: str = "", status_code: Optional[int] = None,
+                       retry_after: Optional[float] = None) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = reason or (f"HTTP {status_code}" if status_code else "error")
+        if status_code in (401, 403):
+            self._trip(self.auth_recovery_seconds)
+        elif status_code == 429:
+            self._trip(retry_after if retry_after else self.rate_limit_recovery_seconds)
+        elif self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._trip(self.recovery_seconds)
+
+    def _trip(self, seconds: float) -> None:
+        if self.state != OPEN:
+            self.trips += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_for = seconds
+        self._probe_in_flight = False
+
+    # ---------- adaptive timeout ----------
+    def timeout(self, ceiling: float) -> float:
+        """Observed p95 latency x multiplier, clamped to [min_timeout, ceiling]"""
+        if len(self.latencies) < 10:
+            return ceiling
+        ordered = sorted(self.latencies)
+        p = ordered[min(len(ordered) - 1, int(self.timeout_quantile * len(ordered)))]
+        return min(ceiling, max(self.min_timeout, p * self.timeout_multiplier))
+
+    # ---------- metrics ----------
+    def as_dict(self) -> Dict[str, Any]:
+        state = self.state
+        if state == OPEN and self.retry_in() <= 0:
+            state = HALF_OPEN  # next call will be the probe
+        return {
+            "state": state,
+            "retry_in_seconds": round(self.retry_in(), 1) if state == OPEN else 0,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+            "adaptive_timeout_s": round(self.timeout(float("inf")), 2) if len(self.latencies) >= 10 else None,
+        }
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """State of every registered breaker"""
+    return {name: breaker.as_dict() for name, breaker in BREAKERS.items()}
@@ -0,0 +1,144 @@
+"""
+Precomputed city packs
+
+A pack is the finished attraction list for one city — the full three-source
+merge, dedup, quality ranking and photo pass — plus its geocode, written to
+`<dir>/<slug>.pack.json.gz`. Packs are loaded at startup and served before
+any upstream call, so popular destinations plan with zero network I/O for
+geocoding and attractions. A background refresher (see smartroute_server,
+opt-in via CITY_PACK_WARMER=1) rebuilds packs as they age; with several
+uvicorn workers only the one holding the directory's warmer lock builds,
+the others re-read the packs it writes.
+
+File layout (gzip-compressed compact JSON):
+
+    {"format": 1, "city": "Jaipur", "built_at": 1760000000,
+     "geo": {...}, "sources": ["Overpass", ...], "attractions": [...]}
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+try:  # warmer lock; without fcntl (Windows) every process may warm
+    import fcntl
+except ImportError:
+    fcntl = None
+
+PACK_FORMAT = 1
+PACK_SUFFIX = ".pack.json.gz"
+WARMER_LOCK = ".warmer.lock"
+
+
+def pack_slug(city: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", city.lower()).strip("-") or "city"
+
+
+class CityPackStore:
+    """Packs on disk, keyed in memory by lower-cased city name"""
+
+    def __init__(self, directory: str, max_age_seconds: float):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.packs: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.builds = 0
+        self.build_failures = 0
+        self._lock_fh = None
+
+    def load_all(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(PACK_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as fh:
+                    pack = json.load(fh)
+            except Exception as e:
+                print(f"  City pack {name} unreadable: {e}")
+                continue
+            if pack.get("format") != PACK_FORMAT:
+                continue  # built by another version; the refresher will rebuild it
+            self.packs[pack["city"].lower().strip()] = pack
+        return len(self.packs)
+
+    def get(self, city: str) -> Optional[Dict[str, Any]]:
+        pack = self.packs.get(city.lower().strip())
+        if pack is not None:
+            self.hits += 1
+        return pack
+
+    def attractions(self, city: str) -> Optional[List[Dict[str, Any]]]:
+        pack = self.get(city)
+        if not pack or not pack.get("attractions"):
+            return None
+        return [dict(a) for a in pack["attractions"]]
+
+    def geo(self, city: str) -> Optional[Dict[str, Any]]:
+        pack = self.packs.get(city.lower().strip())
+        return pack.get("geo") if pack else None
+
+    def age(self, city: str) -> float:
+        pack = self.packs.get(city.lower().strip())
+        return time.time() - pack["built_at"] if pack else float("inf")
+
+    def needs_refresh(self, city: str) -> bool:
+        return self.age(city) >= self.max_age_seconds
+
+    def acquire_warmer_lock(self) -> bool:
+        """True if this process may run the refresher: one per pack directory, held
+        (non-blocking flock) until the process exits"""
+        if self._lock_fh is not None:
+            return True
+        if fcntl is None:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        fh = open(os.path.join(self.directory, WARMER_LOCK), "w")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._lock_fh = fh
+        return True
+
+    async def save(self, city: str, geo: Dict[str, Any], attractions: List[Dict[str, Any]],
+                   sources: List[str]) -> Dict[str, Any]:
+        pack = {
+            "format": PACK_FORMAT,
+            "city": city,
+            "built_at": int(time.time()),
+            "geo": geo,
+            "sources": sources,
+            "attractions": attractions,
+        }
+        # Compressing a few hundred attractions takes long enough to stall the event loop
+        await asyncio.to_thread(self._write, pack_slug(city), pack)
+        self.packs[city.lower().strip()] = pack
+        self.builds += 1
+        return pack
+
+    def _write(self, slug: str, pack: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, slug + PACK_SUFFIX)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+            json.dump(pack, fh, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, path)  # readers never see a half-written pack
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "packs": len(self.packs),
+            "hits": self.hits,
+            "builds": self.builds,
+            "build_failures": self.build_failures,
+            "warmer": self._lock_fh is not None,
+            "oldest_age_hours": round(max(map(self.age, self.packs), default=0) / 3600, 1),
+        }
@@ -0,0 +1,220 @@
+"""
+Precompiled POI classification tables
+
+The Overpass, OpenTripMap and Wikipedia parsers (attractions and nearby
+search) used to run if/elif chains of tag tests and `any(w in name.lower()
+for w in words)` scans per element. The same decisions are made here from
+lookup tables built once at import:
+
+  - word lists become one compiled alternation each (a single regex search
+    gives the same answer as "any word is a substring")
+  - tag value -> type/category is a dict lookup; where the old chains tested
+    several keys in a fixed order, each rule carries its rank and the best
+    ranked match wins, which is the same precedence without the chain
+  - OpenTripMap `kinds` strings repeat across places, so their category is
+    memoised per distinct string
+
+Callers lower-case a name once and pass it in. bench_classify.py compares
+these against the old inline code.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class WordMatcher:
+    """`word in text` for any of `words`, as one precompiled regex search (text already lower-case)"""
+
+    __slots__ = ("words", "_search")
+
+    def __init__(self, words: Iterable[str]):
+        self.words = frozenset(words)
+        # Longest first so the alternation never stops on a shorter prefix of a longer word
+        pattern = "|".join(map(re.escape, sorted(self.words, key=len, reverse=True)))
+        self._search = re.compile(pattern).search
+
+    def __call__(self, text: str) -> bool:
+        return self._search(text) is not None
+
+
+# ---------- name filters ----------
+_NON_POI_WORDS = ("bus station", "railway station", "airport", "hospital", "school",
+                  "college", "university", "bank", "atm", "pharmacy", "gas station",
+                  "parking", "toilet", "post office")
+
+# Overpass attractions
+ATTRACTION_SKIP = WordMatcher(_NON_POI_WORDS + ("bench", "police"))
+# OpenTripMap attractions
+OTM_SKIP = WordMatcher(_NON_POI_WORDS)
+# Every nearby-search source
+NEARBY_SKIP = WordMatcher(_NON_POI_WORDS + ("bus stop", "petrol", "police"))
+
+# Wikipedia geosearch titles that aren't sights (areas, transport, organisations, media)
+WIKI_SKIP = WordMatcher((
+    "district", "ward", "station", "airport", "highway", "road",
+    "river", "village", "town", "city", "county", "province",
+    "school", "university", "college", "hospital", "constituency",
+    "assembly", "lok sabha", "rajya sabha", "parliament", "election",
+    "metro", "bus", "railway", "junction", "bypass", "flyover",
+    "municipal", "corporation", "division", "zone", "tehsil",
+    "block", "sector", "phase", "plot", "colony", "society",
+    "pin code", "postal", "census", "population", "demographics",
+    "administrative", "subdivision", "circle", "region",
+    "company", "ltd", "inc", "pvt", "private", "limited",
+    "cricket", "football", "hockey", "stadium", "league",
+    "film", "movie", "television", "serial", "episode",
+    "album", "song", "band", "novel", "book",
+))
+# ...and the lighter list used for nearby search
+WIKI_NEARBY_SKIP = WordMatcher((
+    "district", "taluk", "ward", "constituency", "division", "block",
+    "tehsil", "state highway", "national highway", "river", "lake",
+    "pin code", "postal", "village", "mandal", "municipality",
+    "railway line", "metro line", "assembly", "lok sabha", "rajya sabha",
+))
+# Words that mark a title as a tourist spot
+TOURIST_WORDS = WordMatcher((
+    "temple", "fort", "palace", "mosque", "church", "museum",
+    "garden", "park", "lake", "beach", "cave", "waterfall",
+    "monument", "memorial", "tomb", "mausoleum", "shrine",
+    "gallery", "tower", "gate", "well", "step well", "baoli",
+    "haveli", "mahal", "garh", "mandir", "masjid", "gurudwara",
+    "zoo", "sanctuary", "reserve", "hills",
+))
+
+
+# ---------- Overpass attractions ----------
+_MUSEUM_TOURISM = WordMatcher(("museum", "gallery"))
+_HISTORIC_TYPE = {
+    "castle": "fort", "fort": "fort",
+    "palace": "palace",
+    "monument": "monument", "memorial": "monument",
+    "ruins": "historic", "archaeological_site": "historic",
+}
+_TOURISM_BOOST = {"attraction": 2, "museum": 2, "zoo": 2}
+_HISTORIC_BOOST = {"castle": 2, "fort": 2, "palace": 2, "ruins": 2, "archaeological_site": 2}
+
+
+def attraction_type(tags: Dict[str, str]) -> str:
+    """Attraction type for an OSM element's tags"""
+    tourism = tags.get("tourism", "")
+    if tourism and _MUSEUM_TOURISM(tourism):
+        return "museum"
+    kind = _HISTORIC_TYPE.get(tags.get("historic", ""))
+    if kind:
+        return kind
+    if tags.get("amenity") == "place_of_worship":
+        return "religious"
+    if tourism == "viewpoint":
+        return "viewpoint"
+    if "park" in tags.get("leisure", ""):
+        return "park"
+    return "attraction"
+
+
+def attraction_quality(tags: Dict[str, str]) -> int:
+    """Notability score: wiki links, contact info and tourism/heritage tags"""
+    quality = 1
+    if tags.get("wikipedia") or tags.get("wikidata"):
+        quality += 3
+    if tags.get("website") or tags.get("url"):
+        quality += 1
+    if tags.get("description") or tags.get("description:en"):
+        quality += 1
+    quality += _TOURISM_BOOST.get(tags.get("tourism", ""), 0)
+    quality += _HISTORIC_BOOST.get(tags.get("historic", ""), 0)
+    if tags.get("heritage"):
+        quality += 2
+    return quality
+
+
+# ---------- nearby search (Overpass) ----------
+# (rank, category, subcategory or None for the tag value, base quality); lower rank wins
+_Rule = Tuple[int, str, Optional[str], int]
+
+
+def _rules(rank: int, category: str, values: str, quality: int, sub: Optional[str] = None) -> Dict[str, _Rule]:
+    return {v: (rank, category, sub, quality) for v in values.split("|")}
+
+
+_NEARBY_RULES: Dict[str, Dict[str, _Rule]] = {
+    "amenity": {**_rules(0, "eating", "restaurant|cafe|fast_food", 2),
+                **_rules(3, "recreation", "theatre|cinema|arts_centre", 3),
+                **_rules(8, "culture", "place_of_worship", 3, sub="temple")},
+    "tourism": {**_rules(1, "recreation", "zoo|theme_park|aquarium", 5),
+                **_rules(6, "culture", "museum|gallery", 4),
+                **_rules(10, "attraction", "attraction|viewpoint", 4)},
+    "leisure": {**_rules(2, "recreation", "water_park|amusement_arcade|sports_centre|stadium|swimming_pool|beach_resort", 4),
+                **_rules(5, "nature", "park|garden|nature_reserve", 3)},
+    "natural": _rules(4, "nature", "beach|peak|cave_entrance|water", 4),
+}
+# Any value of these keys matches, at this rank
+_NEARBY_ANY: Dict[str, _Rule] = {
+    "historic": (7, "culture", None, 4),
+    "shop": (9, "shopping", None, 2),
+}
+_NEARBY_KEYS = tuple(dict.fromkeys((*_NEARBY_RULES, *_NEARBY_ANY)))
+
+
+def nearby_category(tags: Dict[str, str]) -> Tuple[str, str, int]:
+    """(category, subcategory, quality score) for an OSM element in nearby search"""
+    best: Optional[_Rule] = None
+    best_value = ""
+    for key in _NEARBY_KEYS:
+        value = tags.get(key)
+        if not value:
+            continue
+        rule = _NEARBY_RULES.get(key, {}).get(value) or _NEARBY_ANY.get(key)
+        if rule is not None and (best is None or rule[0] < best[0]):
+            best, best_value = rule, value
+    if best is None:
+        category, subcategory, quality = "attraction", "", 1
+    else:
+        category, subcategory, quality = best[1], best[2] if best[2] is not None else best_value, best[3]
+    if tags.get("wikipedia") or tags.get("wikidata"):
+        quality += 2
+    if tags.get("website") or tags.get("url"):
+        quality += 1
+    return category, subcategory, quality
+
+
+# ---------- OpenTripMap kinds ----------
+# First matching substring of the comma-separated kinds string wins
+_OTM_TYPES = (
+    (("museum",), "museum"),
+    (("castle", "fort"), "fort"),
+    (("palace",), "palace"),
+    (("monument", "memorial"), "monument"),
+    (("historic",), "historic"),
+    (("religion", "church", "temple"), "religious"),
+    (("natural", "beach"), "hidden_gem"),
+    (("architecture",), "architecture"),
+    (("garden", "park"), "park"),
+    (("theatre", "amusement"), "landmark"),
+)
+# (kinds words, category, quality bonus) for nearby search
+_OTM_CATEGORIES = (
+    (("foods", "restaurants", "cafes"), "eating", 0),
+    (("amusements", "sport", "beaches"), "recreation", 2),
+    (("natural", "gardens_and_parks"), "nature", 0),
+    (("museums", "cultural", "historic", "religion", "architecture"), "culture", 1),
+    (("theatres_and_entertainments",), "recreation", 0),
+)
+
+
+@lru_cache(maxsize=1024)
+def otm_attraction_type(kinds: str) -> str:
+    for words, kind in _OTM_TYPES:
+        if any(w in kinds for w in words):
+            return kind
+    return "attraction"
+
+
+@lru_cache(maxsize=1024)
+def otm_nearby_category(kinds: str) -> Tuple[str, int]:
+    """(category, quality bonus) for an OpenTripMap place in nearby search"""
+    for words, category, bonus in _OTM_CATEGORIES:
+        if any(w in kinds for w in words):
+            return category, bonus
+    return "attraction", 0
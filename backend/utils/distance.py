@@ -0,0 +1,79 @@
+"""
+Vectorized great-circle distance engine
+
+All haversine math in the backend goes through here. Single pairs use plain
+`math` (NumPy call overhead dominates for one point); one-to-many and
+all-pairs distances are computed in one NumPy pass. Distances are metres.
+"""
+
+import math
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# Rows per block when building big matrices; bounds the float64 temporaries
+# to roughly chunk_rows * M * 8 bytes per intermediate array.
+DEFAULT_CHUNK_ROWS = 1024
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in metres"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2)
+    return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def _haversine_rad(lat1: np.ndarray, lon1: np.ndarray, cos1: np.ndarray,
+                   lat2: np.ndarray, lon2: np.ndarray, cos2: np.ndarray) -> np.ndarray:
+    """Broadcasting haversine on inputs already in radians (with their cosines)"""
+    a = np.sin((lat2 - lat1) * 0.5) ** 2 + cos1 * cos2 * np.sin((lon2 - lon1) * 0.5) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return (2 * EARTH_RADIUS_M) * np.arcsin(np.sqrt(a))
+
+
+def one_to_many(lat: float, lon: float, lats: ArrayLike, lons: ArrayLike,
+                dtype: type = np.float64) -> np.ndarray:
+    """Distances from one point to every (lats[i], lons[i]), shape (N,)"""
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+    lat1 = math.radians(lat)
+    out = _haversine_rad(lat1, math.radians(lon), math.cos(lat1), lat2, lon2, np.cos(lat2))
+    return out.astype(dtype, copy=False)
+
+
+def distance_matrix(lats: ArrayLike, lons: ArrayLike,
+                    lats2: Optional[ArrayLike] = None, lons2: Optional[ArrayLike] = None,
+                    dtype: type = np.float64,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    """Pairwise distances, shape (N, M).
+
+    With only `lats`/`lons` this is the symmetric all-pairs matrix (zero
+    diagonal) used for route optimisation. Pass `dtype=np.float32` to halve
+    memory for large N; rows are computed `chunk_rows` at a time.
+    """
+    lat_a = np.radians(np.asarray(lats, dtype=np.float64))
+    lon_a = np.radians(np.asarray(lons, dtype=np.float64))
+    if lats2 is None:
+        lat_b, lon_b = lat_a, lon_a
+    else:
+        lat_b = np.radians(np.asarray(lats2, dtype=np.float64))
+        lon_b = np.radians(np.asarray(lons2, dtype=np.float64))
+    cos_a, cos_b = np.cos(lat_a), np.cos(lat_b)
+
+    n, m = lat_a.shape[0], lat_b.shape[0]
+    out = np.empty((n, m), dtype=dtype)
+    step = max(1, int(chunk_rows))
+    for start in range(0, n, step):
+        end = min(n, start + step)
+        out[start:end] = _haversine_rad(
+            lat_a[start:end, None], lon_a[start:end, None], cos_a[start:end, None],
+            lat_b[None, :], lon_b[None, :], cos_b[None, :])
+    if lats2 is None:
+        np.fill_diagonal(out, 0)
+    return out
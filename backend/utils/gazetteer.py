@@ -0,0 +1,259 @@
+"""
+Local gazetteer: instant geocoding for places the app already knows
+
+Every destination the app mentions (DESTINATION_DATABASE, the language map,
+the half-day planner's city list, SRM campus aliases) with its coordinates,
+names and common aliases ("bengaluru"/"bangalore", "trivandrum", "vizag").
+Lookups are in-process:
+
+  exact      normalised name/alias -> entry (dict lookup)
+  qualified  "Jaipur, India" / "Kochi, Kerala": head matched, tail must be
+             the entry's region or country
+  fuzzy      trigram index narrows to a handful of candidates, then a
+             bounded edit distance (1 typo for short names, 2 for long)
+             must single out one entry
+
+Only exact names and a single typo in a long name (7+ characters) are
+answered outright. Other fuzzy matches are too close to real, different
+places ("Raipur" is not "Jaipur", "Patan" is not "Patna"), so resolve()
+returns them as unconfirmed hints that the caller checks against
+Nominatim first. Anything else ("Marina Beach Chennai", street addresses)
+misses and goes to Nominatim as before.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# name, "alias|alias", lat, lon, region, country, kind
+#   kind: city | region (state/island/country-level destination) | campus
+PLACES: Tuple[Tuple[str, str, float, float, str, str, str], ...] = (
+    # --- India: metros and large cities ---
+    ("Mumbai", "bombay", 19.0760, 72.8777, "Maharashtra", "India", "city"),
+    ("Delhi", "new delhi|dilli", 28.6139, 77.2090, "Delhi", "India", "city"),
+    ("Bengaluru", "bangalore|blr|bengaluru city", 12.9716, 77.5946, "Karnataka", "India", "city"),
+    ("Chennai", "madras", 13.0827, 80.2707, "Tamil Nadu", "India", "city"),
+    ("Kolkata", "calcutta", 22.5726, 88.3639, "West Bengal", "India", "city"),
+    ("Hyderabad", "", 17.3850, 78.4867, "Telangana", "India", "city"),
+    ("Pune", "poona", 18.5204, 73.8567, "Maharashtra", "India", "city"),
+    ("Ahmedabad", "amdavad", 23.0225, 72.5714, "Gujarat", "India", "city"),
+    ("Jaipur", "pink city", 26.9124, 75.7873, "Rajasthan", "India", "city"),
+    ("Lucknow", "", 26.8467, 80.9462, "Uttar Pradesh", "India", "city"),
+    ("Surat", "", 21.1702, 72.8311, "Gujarat", "India", "city"),
+    ("Kanpur", "cawnpore", 26.4499, 80.3319, "Uttar Pradesh", "India", "city"),
+    ("Nagpur", "", 21.1458, 79.0882, "Maharashtra", "India", "city"),
+    ("Indore", "", 22.7196, 75.8577, "Madhya Pradesh", "India", "city"),
+    ("Bhopal", "", 23.2599, 77.4126, "Madhya Pradesh", "India", "city"),
+    ("Visakhapatnam", "vizag|vishakhapatnam", 17.6868, 83.2185, "Andhra Pradesh", "India", "city"),
+    ("Patna", "", 25.5941, 85.1376, "Bihar", "India", "city"),
+    ("Vadodara", "baroda", 22.3072, 73.1812, "Gujarat", "India", "city"),
+    ("Ghaziabad", "", 28.6692, 77.4538, "Uttar Pradesh", "India", "city"),
+    ("Ludhiana", "", 30.9010, 75.8573, "Punjab", "India", "city"),
+    ("Coimbatore", "kovai", 11.0168, 76.9558, "Tamil Nadu", "India", "city"),
+    ("Kochi", "cochin|ernakulam", 9.9312, 76.2673, "Kerala", "India", "city"),
+    ("Thiruvananthapuram", "trivandrum", 8.5241, 76.9366, "Kerala", "India", "city"),
+    ("Mysuru", "mysore", 12.2958, 76.6394, "Karnataka", "India", "city"),
+    ("Chandigarh", "", 30.7333, 76.7794, "Chandigarh", "India", "city"),
+    ("Dehradun", "dehra dun", 30.3165, 78.0322, "Uttarakhand", "India", "city"),
+    ("Noida", "", 28.5355, 77.3910, "Uttar Pradesh", "India", "city"),
+    ("Gurugram", "gurgaon", 28.4595, 77.0266, "Haryana", "India", "city"),
+    ("Faridabad", "", 28.4089, 77.3178, "Haryana", "India", "city"),
+    ("Thane", "", 19.2183, 72.9781, "Maharashtra", "India", "city"),
+    ("Navi Mumbai", "new bombay", 19.0330, 73.0297, "Maharashtra", "India", "city"),
+    ("Madurai", "", 9.9252, 78.1198, "Tamil Nadu", "India", "city"),
+    ("Srinagar", "", 34.0837, 74.7973, "Jammu and Kashmir", "India", "city"),
+    ("Bhubaneswar", "bhubaneshwar", 20.2961, 85.8245, "Odisha", "India", "city"),
+    ("Guwahati", "gauhati", 26.1445, 91.7362, "Assam", "India", "city"),
+    ("Aurangabad", "chhatrapati sambhajinagar", 19.8762, 75.3433, "Maharashtra", "India", "city"),
+    # --- India: tourist towns ---
+    ("Agra", "", 27.1767, 78.0081, "Uttar Pradesh", "India", "city"),
+    ("Varanasi", "banaras|benares|kashi", 25.3176, 82.9739, "Uttar Pradesh", "India", "city"),
+    ("Udaipur", "city of lakes", 24.5854, 73.7125, "Rajasthan", "India", "city"),
+    ("Jodhpur", "blue city", 26.2389, 73.0243, "Rajasthan", "India", "city"),
+    ("Jaisalmer", "golden city", 26.9157, 70.9083, "Rajasthan", "India", "city"),
+    ("Ajmer", "", 26.4499, 74.6399, "Rajasthan", "India", "city"),
+    ("Pushkar", "", 26.4897, 74.5511, "Rajasthan", "India", "city"),
+    ("Amritsar", "", 31.6340, 74.8723, "Punjab", "India", "city"),
+    ("Shimla", "simla", 31.1048, 77.1734, "Himachal Pradesh", "India", "city"),
+    ("Manali", "", 32.2432, 77.1892, "Himachal Pradesh", "India", "city"),
+    ("Mcleodganj", "mcleod ganj|mcleodganj dharamshala", 32.2426, 76.3213, "Himachal Pradesh", "India", "city"),
+    ("Rishikesh", "", 30.0869, 78.2676, "Uttarakhand", "India", "city"),
+    ("Leh", "leh ladakh|ladakh", 34.1526, 77.5771, "Ladakh", "India", "city"),
+    ("Darjeeling", "", 27.0410, 88.2663, "West Bengal", "India", "city"),
+    ("Munnar", "kerala (munnar)", 10.0889, 77.0595, "Kerala", "India", "city"),
+    ("Alappuzha", "alleppey", 9.4981, 76.3388, "Kerala", "India", "city"),
+    ("Puducherry", "pondicherry|pondy", 11.9416, 79.8083, "Puducherry", "India", "city"),
+    ("Ooty", "udhagamandalam|ootacamund", 11.4102, 76.6950, "Tamil Nadu", "India", "city"),
+    ("Coorg", "kodagu|madikeri", 12.4244, 75.7382, "Karnataka", "India", "city"),
+    ("Hampi", "", 15.3350, 76.4600, "Karnataka", "India", "city"),
+    ("Goa", "", 15.2993, 74.1240, "Goa", "India", "region"),
+    ("Kerala", "gods own country", 10.8505, 76.2711, "Kerala", "India", "region"),
+    # --- International ---
+    ("Paris", "", 48.8566, 2.3522, "Ile-de-France", "France", "city"),
+    ("London", "", 51.5074, -0.1278, "England", "United Kingdom", "city"),
+    ("Tokyo", "", 35.6762, 139.6503, "Tokyo", "Japan", "city"),
+    ("Kyoto", "", 35.0116, 135.7681, "Kyoto", "Japan", "city"),
+    ("Rome", "roma", 41.9028, 12.4964, "Lazio", "Italy", "city"),
+    ("Barcelona", "", 41.3874, 2.1686, "Catalonia", "Spain", "city"),
+    ("Istanbul", "constantinople", 41.0082, 28.9784, "Istanbul", "Turkey", "city"),
+    ("Bangkok", "krung thep", 13.7563, 100.5018, "Bangkok", "Thailand", "city"),
+    ("Dubai", "", 25.2048, 55.2708, "Dubai", "United Arab Emirates", "city"),
+    ("Singapore", "", 1.3521, 103.8198, "Singapore", "Singapore", "city"),
+    ("Amsterdam", "", 52.3676, 4.9041, "North Holland", "Netherlands", "city"),
+    ("Cairo", "", 30.0444, 31.2357, "Cairo", "Egypt", "city"),
+    ("Seoul", "", 37.5665, 126.9780, "Seoul", "South Korea", "city"),
+    ("Prague", "praha", 50.0755, 14.4378, "Prague", "Czech Republic", "city"),
+    ("Vienna", "wien", 48.2082, 16.3738, "Vienna", "Austria", "city"),
+    ("Lisbon", "lisboa", 38.7223, -9.1393, "Lisbon", "Portugal", "city"),
+    ("Sydney", "", -33.8688, 151.2093, "New South Wales", "Australia", "city"),
+    ("Hanoi", "ha noi|vietnam (hanoi)", 21.0278, 105.8342, "Hanoi", "Vietnam", "city"),
+    ("New York", "new york city|nyc|manhattan", 40.7128, -74.0060, "New York", "United States", "city"),
+    ("Kathmandu", "", 27.7172, 85.3240, "Bagmati", "Nepal", "city"),
+    ("Colombo", "", 6.9271, 79.8612, "Western Province", "Sri Lanka", "city"),
+    ("Kuala Lumpur", "kl", 3.1390, 101.6869, "Federal Territory of Kuala Lumpur", "Malaysia", "city"),
+    ("Marrakech", "marrakesh", 31.6295, -7.9811, "Marrakesh-Safi", "Morocco", "city"),
+    ("Bali", "", -8.4095, 115.1889, "Bali", "Indonesia", "region"),
+    ("Sri Lanka", "ceylon", 7.8731, 80.7718, "Sri Lanka", "Sri Lanka", "region"),
+    # --- SRM campus (the app's home base) ---
+    ("SRM Institute of Science and Technology",
+     "srm|srmist|srm university|srm university chennai|srm institute|srm kattankulathur",
+     12.8231, 80.0442, "Kattankulathur, Chennai, Tamil Nadu", "India", "campus"),
+)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+CONFIDENT_TYPO_MIN_LEN = 7  # a 1-typo match is trusted only on names at least this long
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower().replace("'", "")).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting a swap of neighbours ("jaipru") as one typo;
+    gives up (returning limit + 1) once it must exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, before[j - 2] + 1)
+            cur.append(d)
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+class Gazetteer:
+    """Name/alias -> place table with exact, qualified and typo-tolerant lookup"""
+
+    def __init__(self, places=PLACES):
+        self._entries: List[Dict[str, Any]] = []
+        self._exact: Dict[str, int] = {}
+        self._grams: Dict[str, List[int]] = {}
+        self._keys: List[Tuple[str, int]] = []  # (normalised name/alias, entry index)
+        for name, aliases, lat, lon, region, country, kind in places:
+            idx = len(self._entries)
+            self._entries.append({"name": name, "lat": lat, "lon": lon, "region": region,
+                                  "country": country, "kind": kind,
+                                  "qualifiers": {normalize(p) for p in region.split(",")} | {normalize(country)}})
+            for key in [name] + [a for a in aliases.split("|") if a]:
+                key = normalize(key)
+                self._exact.setdefault(key, idx)
+                k = len(self._keys)
+                self._keys.append((key, idx))
+                for g in _trigrams(key):
+                    self._grams.setdefault(g, []).append(k)
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.hints = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- lookup ----------
+    def _fuzzy(self, query: str) -> Optional[Tuple[int, int]]:
+        """(entry index, edit distance) of the single closest name, if any"""
+        if len(query) < 5:
+            return None  # too short to tell a typo from a different place
+        limit = 1 if len(query) <= 6 else 2
+        shared: Dict[int, int] = {}
+        for g in _trigrams(query):
+            for k in self._grams.get(g, ()):
+                shared[k] = shared.get(k, 0) + 1
+        best: Dict[int, int] = {}  # entry -> smallest distance over its names
+        for k, _ in sorted(shared.items(), key=lambda kv: -kv[1])[:12]:
+            key, idx = self._keys[k]
+            d = _edit_distance(query, key, limit)
+            if d <= limit:
+                best[idx] = min(d, best.get(idx, d))
+        if not best:
+            return None
+        ranked = sorted(best.items(), key=lambda kv: kv[1])
+        # Ambiguous typo (equally close to two places): let Nominatim decide
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None
+        return ranked[0]
+
+    def _match(self, query: str) -> Tuple[Optional[int], int]:
+        """(entry index, edit distance) for a whole normalised query; 0 = exact"""
+        if query in self._exact:
+            return self._exact[query], 0
+        found = self._fuzzy(query)
+        return found if found is not None else (None, 0)
+
+    def resolve(self, text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(Nominatim-shaped result, confirmed?). Unconfirmed results are typo guesses
+        that may really be another place: only use them once Nominatim agrees."""
+        head, _, tail = text.partition(",")
+        query = normalize(text)
+        idx, distance = self._match(query)
+        if idx is None and tail:
+            # "Kochi, Kerala" / "Jaipur, India": the qualifier must agree with the entry
+            query = normalize(head)
+            idx, distance = self._match(query)
+            if idx is not None and not all(normalize(t) in self._entries[idx]["qualifiers"]
+                                           for t in tail.split(",") if t.strip()):
+                idx = None
+        if idx is None:
+            self.misses += 1
+            return None, False
+        confirmed = distance == 0 or (distance == 1 and len(query) >= CONFIDENT_TYPO_MIN_LEN)
+        if not confirmed:
+            self.hints += 1
+            return self._result(self._entries[idx]), False
+        self.hits += 1
+        self.fuzzy_hits += distance > 0
+        return self._result(self._entries[idx]), True
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Nominatim-shaped result for a known place (exact or a safe typo), or None"""
+        result, confirmed = self.resolve(text)
+        return result if confirmed else None
+
+    @staticmethod
+    def _result(e: Dict[str, Any]) -> Dict[str, Any]:
+        display = ", ".join(dict.fromkeys([e["name"], e["region"], e["country"]]))  # "Singapore", not x3
+        if e["kind"] == "campus":
+            # Same shape as the old hardcoded SRM entry (no address: trip city comes from the input)
+            return {"lat": e["lat"], "lon": e["lon"], "display_name": display,
+                    "type": "university", "class": "amenity", "source": "gazetteer"}
+        if e["kind"] == "region":
+            return {"lat": e["lat"], "lon": e["lon"], "display_name": display,
+                    "type": "state", "class": "boundary", "source": "gazetteer",
+                    "address": {"state": e["region"], "country": e["country"]}}
+        return {"lat": e["lat"], "lon": e["lon"], "display_name": display,
+                "type": "city", "class": "place", "source": "gazetteer",
+                "address": {"city": e["name"], "state": e["region"], "country": e["country"]}}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"places": len(self._entries), "names": len(self._keys), "hits": self.hits,
+                "fuzzy_hits": self.fuzzy_hits, "hints": self.hints, "misses": self.misses}
@@ -0,0 +1,171 @@
+"""
+Concurrent multi-variant geocoding (Nominatim)
+
+A free-text location can be phrased several ways ("X", "X, India", the part
+before the first comma, "near X" without the "near"). Instead of trying
+them one after another with an 8 s timeout each, the variants are raced:
+
+  - the exact query goes out first; the next variant is staggered in only
+    if no answer has arrived after `stagger` seconds (or as soon as an
+    earlier variant comes back empty), never more than `max_parallel` at
+    once, so Nominatim sees at most two requests from us at a time
+  - a hit wins as soon as every higher-priority variant has come back
+    empty, or immediately if it is high-confidence (a preferred place type)
+  - everything still in flight is cancelled once there is a winner
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+NOMINATIM_SEARCH = "https://nominatim.openstreetmap.org/search"
+
+# Result types that are what the user meant (not an admin boundary or a road)
+PREFERRED_TYPES = frozenset({"attraction", "museum", "university", "city", "town", "village"})
+COUNTRY_HINTS = ("india", "usa", "uk", "france", "japan", "thailand", "indonesia", "italy",
+                 "spain", "turkey", "germany", "australia")
+FILLER_PREFIXES = ("near ", "around ")
+
+
+def query_variants(query: str, extra: Sequence[str] = ()) -> List[str]:
+    """Candidate phrasings of `query`, most literal first, de-duplicated"""
+    query = query.strip()
+    candidates = [query]
+    # If it doesn't look like it already has a country, add India context
+    if not any(c in query.lower() for c in COUNTRY_HINTS):
+        candidates.append(f"{query}, India")
+    main_part = query.split(",")[0].strip()
+    if main_part and main_part != query:
+        candidates.append(main_part)
+    stripped = query
+    for prefix in FILLER_PREFIXES:
+        stripped = stripped.replace(prefix, "")
+    candidates.append(stripped.strip())
+    candidates.extend(extra)
+
+    seen, out = set(), []
+    for c in candidates:
+        key = c.lower().strip()
+        if key and key not in seen:
+            seen.add(key)
+            out.append(c.strip())
+    return out
+
+
+def pick_best(data: List[Dict[str, Any]], query: str) -> Tuple[Dict[str, Any], bool]:
+    """Best Nominatim result and whether it is high-confidence (a preferred place type)"""
+    best, confident = data[0], False
+    for r in data:
+        if r.get("type", "") in PREFERRED_TYPES:
+            best, confident = r, True
+            break
+    return {
+        "lat": float(best["lat"]),
+        "lon": float(best["lon"]),
+        "display_name": best.get("display_name", query),
+        "type": best.get("type", ""),
+        "class": best.get("class", ""),
+        "address": best.get("address", {})
+    }, confident
+
+
+class Geocoder:
+    """Races query variants against Nominatim and returns the best early answer"""
+
+    def __init__(self, pool, url: str = NOMINATIM_SEARCH, max_parallel: int = 2,
+                 stagger: float = 0.4, request_timeout: float = 8.0, deadline: float = 10.0):
+        self.pool = pool
+        self.url = url
+        self.max_parallel = max_parallel
+        self.stagger = stagger
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.lookups = 0
+        self.requests = 0
+        self.early_wins = 0
+        self.cancelled = 0
+        self.not_found = 0
+
+    async def _search(self, query: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        self.requests += 1
+        try:
+            resp = await self.pool.get(self.url, params={
+                "q": query, "format": "json", "limit": 3,
+                "addressdetails": 1
+            }, timeout=self.request_timeout)
+            data = resp.json() if resp.status_code == 200 else None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None  # network error / breaker open: same as no hit for this variant
+        return pick_best(data, query) if data else None
+
+    @staticmethod
+    def _winner(results: Dict[int, Optional[Tuple[Dict, bool]]], n: int) -> Optional[Dict[str, Any]]:
+        # Highest-priority hit whose betters have all come back empty
+        for i in range(n):
+            if i not in results:
+                break
+            if results[i] is not None:
+                return results[i][0]
+        # ...or any high-confidence hit, earliest variant first
+        for i in sorted(results):
+            if results[i] is not None and results[i][1]:
+                return results[i][0]
+        return None
+
+    async def geocode(self, variants: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """First acceptable result over `variants` (ordered most- to least-preferred)"""
+        self.lookups += 1
+        queue = list(enumerate(variants))
+        running: Dict[asyncio.Task, int] = {}
+        results: Dict[int, Optional[Tuple[Dict, bool]]] = {}
+        deadline = time.monotonic() + self.deadline
+
+        def launch() -> None:
+            i, q = queue.pop(0)
+            running[asyncio.ensure_future(self._search(q))] = i
+
+        launch()
+        try:
+            while running or queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                can_launch = bool(queue) and len(running) < self.max_parallel
+                if not running:
+                    launch()
+                    continue
+                done, _ = await asyncio.wait(running, timeout=min(self.stagger, remaining) if can_launch else remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+                winner = self._winner(results, len(variants))
+                if winner is not None:
+                    if running or queue:
+                        self.early_wins += 1
+                    return winner
+                # Nothing yet: stagger in the next variant (slow answer, or an empty one came back)
+                if queue and len(running) < self.max_parallel:
+                    launch()
+        finally:
+            self.cancelled += len(running)
+            for task in running:
+                task.cancel()
+
+        # Deadline hit or every variant answered: best of what we have
+        for i in sorted(results):
+            if results[i] is not None:
+                return results[i][0]
+        self.not_found += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "requests": self.requests,
+            "early_wins": self.early_wins,
+            "cancelled": self.cancelled,
+            "not_found": self.not_found,
+            "max_parallel": self.max_parallel,
+        }
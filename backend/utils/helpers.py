@@ -1,7 +1,8 @@
 """Utility helper functions"""
 
 from typing import Tuple
-import math
+
+from .distance import haversine_m
 
 
 def format_currency(amount: float, currency: str = "₹") -> str:
@@ -14,21 +15,7 @@ def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float])
     Calculate distance between two coordinates (Haversine formula)
     Returns distance in kilometers
     """
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    
-    R = 6371  # Earth's radius in km
-    
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(dlat/2) ** 2 +
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-         math.sin(dlon/2) ** 2)
-    
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
+    return haversine_m(coord1[0], coord1[1], coord2[0], coord2[1]) / 1000
 
 
 def format_time(hours: float) -> str:
@@ -0,0 +1,248 @@
+"""
+Shared outbound HTTP client pool
+
+One long-lived httpx.AsyncClient per upstream host, so repeated calls to
+Nominatim / Overpass / Wikipedia / OpenTripMap / Open-Meteo reuse warm
+TCP+TLS connections instead of handshaking on every request. Hosts with a
+request-rate policy get a HostRateLimiter (see rate_limit.py) in front.
+"""
+
+import asyncio
+import contextlib
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .circuit_breaker import CircuitBreaker
+from .rate_limit import HostRateLimiter
+
+try:  # HTTP/2 needs the optional `h2` package (httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (only the delta-seconds form)"""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class HostPoolStats:
+    """Counters for a single host's connection pool"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waits = 0           # requests that had to queue for a free connection
+        self.wait_seconds = 0.0
+
+    def as_dict(self, open_connections: Optional[int]) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "open_connections": open_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waits": self.waits,
+            "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 2) if self.waits else 0.0,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class HTTPClientPool:
+    """App-lifetime pool of per-host AsyncClients with keep-alive and connection limits.
+
+    Clients are created lazily on first use, so the pool also works outside the
+    FastAPI lifespan (scripts, tests); `aclose()` must be called on shutdown.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 max_connections_per_host: int = 10,
+                 max_keepalive_per_host: int = 5,
+                 keepalive_expiry: float = 30.0,
+                 default_timeout: float = 10.0,
+                 http2: bool = True,
+                 host_overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+                 breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 rate_limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.headers = dict(headers or {})
+        self.max_connections_per_host = max_connections_per_host
+        self.max_keepalive_per_host = max_keepalive_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.default_timeout = default_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.host_overrides = host_overrides or {}
+        self.breakers = breakers or {}  # host -> provider breaker
+        # host -> HostRateLimiter(rate, burst, ...) for hosts with a usage policy
+        self.limiters = {host: HostRateLimiter(host, **cfg) for host, cfg in (rate_limits or {}).items()}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self._stats: Dict[str, HostPoolStats] = {}
+
+    # ---------- lifecycle ----------
+    async def startup(self, hosts: Iterable[str] = ()) -> None:
+        """Pre-create clients for the hosts we know we'll talk to"""
+        for host in hosts:
+            self.client_for(host)
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._transports.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"  HTTP pool close failed: {e}")
+
+    # ---------- clients ----------
+    def _host_setting(self, host: str, key: str, default: Any) -> Any:
+        return self.host_overrides.get(host, {}).get(key, default)
+
+    def client_for(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is not None:
+            return client
+
+        max_conn = self._host_setting(host, "max_connections", self.max_connections_per_host)
+        limits = httpx.Limits(
+            max_connections=max_conn,
+            max_keepalive_connections=self._host_setting(host, "max_keepalive", self.max_keepalive_per_host),
+            keepalive_expiry=self._host_setting(host, "keepalive_expiry", self.keepalive_expiry),
+        )
+        # ALPN falls back to HTTP/1.1 for hosts that don't speak h2
+        transport = httpx.AsyncHTTPTransport(
+            http2=self._host_setting(host, "http2", self.http2) and HTTP2_AVAILABLE,
+            limits=limits,
+        )
+        client = httpx.AsyncClient(transport=transport, headers=self.headers,
+                                   timeout=self.default_timeout)
+        self._clients[host] = client
+        self._transports[host] = transport
+        self._stats.setdefault(host, HostPoolStats())
+        return client
+
+    # ---------- requests ----------
+    def breaker_for(self, url_or_host: str) -> Optional[CircuitBreaker]:
+        host = urlsplit(url_or_host).netloc or url_or_host
+        return self.breakers.get(host)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            return await self._send(method, url, host, **kwargs)
+        breaker = self.breakers.get(host)
+        if breaker is not None and breaker.is_open():
+            breaker.before_call()  # fail fast instead of queueing for a token first
+        # Identical GETs (same URL + params) queued or in flight share one upstream call;
+        # a streamed body can only be read once, so those are never shared
+        key = None
+        if method == "GET" and not kwargs.get("stream"):
+            key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+        resp = await limiter.submit(key, lambda: self._send(method, url, host, **kwargs))
+        if resp.status_code == 429:
+            limiter.pause(_retry_after(resp.headers.get("retry-after")) or 1.0 / limiter.rate * 5)
+        return resp
+
+    async def _send(self, method: str, url: str, host: str, **kwargs) -> httpx.Response:
+        breaker = self.breakers.get(host)
+        if breaker is not None:
+            breaker.before_call()  # raises CircuitOpenError without touching the network
+            if isinstance(kwargs.get("timeout"), (int, float)):
+                kwargs["timeout"] = breaker.timeout(kwargs["timeout"])
+        client = self.client_for(host)
+        stats = self._stats[host]
+        max_conn = self._host_setting(host, "max_connections", self.max_connections_per_host)
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", trace)
+        stream = kwargs.pop("stream", False)
+
+        stats.requests += 1
+        queued = stats.in_flight >= max_conn
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        started = time.perf_counter()
+        try:
+            if stream:
+                # Returns once headers arrive; the caller reads (and closes) the body
+                resp = await client.send(client.build_request(method, url, extensions=extensions, **kwargs),
+                                         stream=True)
+            else:
+                resp = await client.request(method, url, extensions=extensions, **kwargs)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.abandon()
+            raise
+        except Exception as e:
+            stats.errors += 1
+            if breaker is not None:
+                breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            stats.in_flight -= 1
+            if queued:
+                stats.waits += 1
+                stats.wait_seconds += time.perf_counter() - started
+
+        if breaker is not None:
+            if resp.status_code >= 500 or resp.status_code in (401, 403, 429):
+                breaker.record_failure(status_code=resp.status_code,
+                                       retry_after=_retry_after(resp.headers.get("retry-after")))
+            else:
+                breaker.record_success(time.perf_counter() - started)
+        return resp
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Like request(), but the body is left unread for resp.aiter_bytes(); the
+        connection is released on exit even if the body was only partly read"""
+        resp = await self.request(method, url, stream=True, **kwargs)
+        try:
+            yield resp
+        finally:
+            await resp.aclose()
+
+    # ---------- metrics ----------
+    def _open_connections(self, host: str) -> Optional[int]:
+        pool = getattr(self._transports.get(host), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return None
+        return sum(1 for c in connections if not c.is_closed())
+
+    def stats(self) -> Dict[str, Any]:
+        hosts = {host: s.as_dict(self._open_connections(host)) for host, s in self._stats.items()}
+        total_requests = sum(s.requests for s in self._stats.values())
+        total_new = sum(s.new_connections for s in self._stats.values())
+        return {
+            "http2": self.http2,
+            "hosts": hosts,
+            "total_requests": total_requests,
+            "total_new_connections": total_new,
+            "handshakes_saved": max(0, total_requests - total_new),
+            "reuse_ratio": round(1 - total_new / total_requests, 3) if total_requests else 0.0,
+            "rate_limits": {host: limiter.stats() for host, limiter in self.limiters.items()},
+        }
@@ -0,0 +1,87 @@
+"""
+Incremental JSON array parsing for large upstream responses
+
+Overpass answers {"version": ..., "osm3s": {...}, "elements": [...]} and
+OpenTripMap a bare [...]. Instead of reading the whole body and building
+every element before filtering, the array items are decoded one at a time
+as bytes arrive (json.JSONDecoder.raw_decode per item, so the decoding
+itself stays in C) and handed to the caller, who can stop reading as soon
+as it has enough — the rest of the body is never downloaded or parsed.
+
+Items must be objects, arrays or strings (a bare number split across two
+chunks would decode early); both upstreams return arrays of objects.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Set, Union
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = re.compile(r"[\s,]*")
+_TOP_LEVEL_ARRAY = re.compile(r"\s*\[")
+MAX_PREAMBLE = 1 << 20  # bytes of JSON allowed before the array starts
+
+
+def _array_start(key: Optional[str]) -> "re.Pattern[str]":
+    return _TOP_LEVEL_ARRAY if key is None else re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes], key: Optional[str] = None) -> AsyncIterator[Any]:
+    """Items of the top-level JSON array (key=None) or of the array under `key` in the
+    top-level object, decoded as the chunks arrive. ValueError if the body ends early."""
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    start = _array_start(key)
+    buf = ""
+    in_array = False
+    async for chunk in chunks:
+        buf += decode(chunk)
+        if not in_array:
+            m = start.match(buf) if key is None else start.search(buf)
+            if m is None:
+                if key is None and buf.strip():
+                    raise ValueError(f"expected a JSON array, got {buf.strip()[:40]!r}")
+                if len(buf) > MAX_PREAMBLE:
+                    raise ValueError(f"no {key!r} array in the first {MAX_PREAMBLE} bytes")
+                continue
+            buf = buf[m.end():]
+            in_array = True
+
+        pos = 0
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                return
+            try:
+                item, pos_after = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # item continues in the next chunk
+            yield item
+            pos = pos_after
+        buf = buf[pos:]
+    raise ValueError("JSON array truncated" if in_array else f"no {key or 'top-level'!r} array in response")
+
+
+async def take(items: Union[Iterable[Any], AsyncIterable[Any]], parse: Callable[[Any, Set[str]], Any],
+               want: Optional[int] = None, seen: Optional[Set[str]] = None) -> List[Any]:
+    """Run `parse(item, seen)` over `items`, keeping non-None results; stop after `want` of them.
+    `seen` (fresh per call unless given) lets parse skip duplicates."""
+    seen = set() if seen is None else seen
+    out: List[Any] = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            result = parse(item, seen)
+            if result is not None:
+                out.append(result)
+                if want is not None and len(out) >= want:
+                    break
+    else:
+        for item in items:
+            result = parse(item, seen)
+            if result is not None:
+                out.append(result)
+                if want is not None and len(out) >= want:
+                    break
+    return out
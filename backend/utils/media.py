@@ -0,0 +1,70 @@
+"""
+Activity media links (YouTube, reviews, maps, Wikipedia, tickets)
+
+The links are pure functions of an activity's canonical fields (name, lat,
+lon, wiki), so itineraries carry only those plus an id. Clients expand the
+templates themselves (GET /media-templates, fetched once) or ask the server
+for one activity's links (GET /activity/{id}/media) when the user opens it.
+expand_media() builds the same block server-side; with use_wiki=False it
+is byte-for-byte the old inline "media" block (whose Wikipedia link was
+guessed from the display name) for clients that still want that.
+
+Template fields: {q} URL-quoted name, {lat}/{lon}, {wiki} URL-quoted article title.
+Wiki fields may already be percent-encoded ("Elliot%27s_Beach"); they are
+decoded first so they are never encoded twice.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+from urllib.parse import quote, unquote
+
+MEDIA_TEMPLATES_VERSION = 1
+
+MEDIA_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "videos": {
+        "youtube": "https://www.youtube.com/results?search_query={q}+travel+guide",
+        "virtual_tour": "https://www.youtube.com/results?search_query={q}+virtual+tour+4k",
+    },
+    "reviews": {
+        "google": "https://www.google.com/search?q={q}+reviews",
+        "tripadvisor": "https://www.tripadvisor.com/Search?q={q}",
+    },
+    "maps": {
+        "google": "https://www.google.com/maps/search/?api=1&query={lat},{lon}",
+        "directions": "https://www.google.com/maps/dir/?api=1&destination={lat},{lon}",
+    },
+    "links": {
+        "wiki": "https://en.wikipedia.org/wiki/{wiki}",
+        "booking": "https://www.google.com/search?q={q}+tickets+booking",
+    },
+}
+
+
+def activity_id(name: str, lat: float, lon: float) -> str:
+    """Stable short id for an activity (same place -> same id across itineraries)"""
+    return hashlib.sha1(f"{name}|{lat:.5f}|{lon:.5f}".encode("utf-8")).hexdigest()[:12]
+
+
+def wiki_title(name: str, wiki: Optional[str] = None) -> str:
+    return wiki or name.replace(" ", "_")
+
+
+def quote_wiki(name: str, wiki: Optional[str] = None) -> str:
+    """URL path segment for the article: the wiki title (decoded first, in case it already
+    is percent-encoded) or, without one, the name with underscores"""
+    return quote(unquote(wiki)) if wiki else quote(wiki_title(name))
+
+
+def expand_media(activity: Dict[str, Any], use_wiki: bool = True) -> Dict[str, Any]:
+    """The full media block for an activity with name/lat/lon (and optionally wiki, photos).
+    use_wiki=False links Wikipedia by name, as the old inline block did."""
+    fields = {
+        "q": quote(activity["name"]),
+        "lat": activity.get("lat", 0),
+        "lon": activity.get("lon", 0),
+        "wiki": quote_wiki(activity["name"], activity.get("wiki") if use_wiki else None),
+    }
+    media: Dict[str, Any] = {"photos": activity.get("photos", [])}
+    for group, links in MEDIA_TEMPLATES.items():
+        media[group] = {key: template.format(**fields) for key, template in links.items()}
+    return media
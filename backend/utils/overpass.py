@@ -0,0 +1,202 @@
+"""
+Hedged Overpass API client
+
+Overpass mirrors have heavy latency tails (queueing on busy slots). Every
+query goes to the mirror with the best recent latency/error record; if it
+hasn't answered by that mirror's p95 latency, a duplicate is sent to the next
+mirror and whichever succeeds first wins. A fast failure (429, 504, network
+error) fails over to the next mirror immediately.
+
+collect() streams the winning response instead of parsing it whole: each
+element is parsed as it arrives and reading stops once enough were kept.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Set
+
+from .circuit_breaker import CircuitOpenError
+from .http_client import HTTPClientPool
+from .json_stream import iter_json_array, take
+
+DEFAULT_MIRRORS = (
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+)
+
+
+class OverpassError(Exception):
+    """Every mirror failed (or timed out) for a query"""
+
+
+class MirrorStats:
+    """EWMA latency/error rate plus a window of recent latencies for percentiles"""
+
+    def __init__(self, alpha: float = 0.2, window: int = 100, initial_latency: float = 3.0):
+        self.alpha = alpha
+        self.ewma_latency = initial_latency
+        self.ewma_error = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0          # answered first (as primary or hedge)
+        self.hedges_sent = 0   # times this mirror was the hedge target
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.requests += 1
+        self.ewma_error = (1 - self.alpha) * self.ewma_error + self.alpha * (0.0 if ok else 1.0)
+        if ok:
+            self.latencies.append(latency)
+            self.ewma_latency = (1 - self.alpha) * self.ewma_latency + self.alpha * latency
+        else:
+            self.errors += 1
+
+    def record_abandoned(self, elapsed: float) -> None:
+        """A losing hedge was cancelled after `elapsed`; its latency is at least that"""
+        self.ewma_latency = (1 - self.alpha) * self.ewma_latency + self.alpha * max(elapsed, self.ewma_latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self) -> float:
+        """Lower is better: expected latency inflated by the recent error rate"""
+        return self.ewma_latency * (1 + 4 * self.ewma_error)
+
+    def as_dict(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+            "hedges_sent": self.hedges_sent,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1),
+            "ewma_error_rate": round(self.ewma_error, 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class OverpassClient:
+    """Runs Overpass QL against the best mirror, hedging to a second one on slow answers"""
+
+    def __init__(self, pool: HTTPClientPool, mirrors: Sequence[str] = DEFAULT_MIRRORS,
+                 hedge_quantile: float = 0.95, min_hedge_delay: float = 0.5,
+                 default_hedge_delay: float = 2.5):
+        self.pool = pool
+        self.mirrors: List[str] = list(mirrors)
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self._stats: Dict[str, MirrorStats] = {m: MirrorStats() for m in self.mirrors}
+        self.queries = 0
+        self.hedged = 0
+        self.failures = 0
+
+    def _tripped(self, mirror: str) -> bool:
+        breaker = self.pool.breaker_for(mirror) if hasattr(self.pool, "breaker_for") else None
+        return breaker is not None and breaker.is_open()
+
+    def ranked_mirrors(self) -> List[str]:
+        """Best mirror first; mirrors with an open circuit breaker go last"""
+        return sorted(self.mirrors, key=lambda m: (self._tripped(m), self._stats[m].score()))
+
+    def hedge_delay(self, mirror: str) -> float:
+        p = self._stats[mirror].percentile(self.hedge_quantile)
+        return max(self.min_hedge_delay, p if p is not None else self.default_hedge_delay)
+
+    async def _read(self, mirror: str, ql: str, timeout: float,
+                    consume: Optional[Callable[[AsyncIterator[Any]], Awaitable[Any]]]) -> Any:
+        if consume is None:
+            resp = await self.pool.post(mirror, data={"data": ql}, timeout=timeout)
+            if resp.status_code != 200:
+                raise OverpassError(f"{mirror} returned HTTP {resp.status_code}")
+            return resp.json()
+        async with self.pool.stream("POST", mirror, data={"data": ql}, timeout=timeout) as resp:
+            if resp.status_code != 200:
+                raise OverpassError(f"{mirror} returned HTTP {resp.status_code}")
+            elements = iter_json_array(resp.aiter_bytes(), key="elements")
+            try:
+                return await consume(elements)
+            finally:
+                await elements.aclose()
+
+    async def _attempt(self, mirror: str, ql: str, timeout: float,
+                       consume: Optional[Callable[[AsyncIterator[Any]], Awaitable[Any]]] = None) -> Any:
+        started = time.perf_counter()
+        try:
+            data = await self._read(mirror, ql, timeout, consume)
+        except CircuitOpenError:
+            raise  # skipped without a request; says nothing about latency
+        except asyncio.CancelledError:
+            # Lost the race: not an error, but it was at least this slow
+            self._stats[mirror].record_abandoned(time.perf_counter() - started)
+            raise
+        except Exception:
+            self._stats[mirror].record(time.perf_counter() - started, ok=False)
+            raise
+        self._stats[mirror].record(time.perf_counter() - started, ok=True)
+        return data
+
+    async def query(self, ql: str, timeout: float = 15.0,
+                    consume: Optional[Callable[[AsyncIterator[Any]], Awaitable[Any]]] = None) -> Any:
+        """Parsed JSON of the first mirror to answer successfully; OverpassError if none do.
+        With `consume`, the answer is instead `await consume(elements)`, where `elements`
+        yields the response's elements as they stream in (called once per mirror attempt)."""
+        self.queries += 1
+        order = self.ranked_mirrors()
+        running: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        deadline = time.perf_counter() + timeout
+
+        def launch(mirror: str) -> None:
+            remaining = max(0.5, deadline - time.perf_counter())
+            running[asyncio.ensure_future(self._attempt(mirror, ql, remaining, consume))] = mirror
+
+        launch(order.pop(0))
+        try:
+            while running:
+                # Until the next mirror is hedged in, wait for the primary's p95; after that, for anyone
+                wait_for = self.hedge_delay(next(iter(running.values()))) if order else None
+                if wait_for is not None:
+                    wait_for = min(wait_for, max(0.0, deadline - time.perf_counter()))
+                done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if order:
+                        mirror = order.pop(0)
+                        self._stats[mirror].hedges_sent += 1
+                        self.hedged += 1
+                        launch(mirror)
+                    continue
+                for task in done:
+                    mirror = running.pop(task)
+                    if task.exception() is None:
+                        self._stats[mirror].wins += 1
+                        return task.result()
+                    errors.append(f"{mirror}: {task.exception()}")
+                    # Fast failure: fail over right away instead of waiting out the hedge delay
+                    if order and not running:
+                        launch(order.pop(0))
+        finally:
+            for task in running:
+                task.cancel()
+        self.failures += 1
+        raise OverpassError("All Overpass mirrors failed: " + "; ".join(errors))
+
+    async def collect(self, ql: str, parse: Callable[[Dict[str, Any], Set[str]], Any],
+                      want: Optional[int] = None, timeout: float = 15.0) -> List[Any]:
+        """Non-None `parse(element, seen)` results, parsed while the response streams in;
+        reading stops after `want` of them"""
+        return await self.query(ql, timeout, consume=lambda elements: take(elements, parse, want))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "hedged": self.hedged,
+            "failures": self.failures,
+            "primary": self.ranked_mirrors()[0] if self.mirrors else None,
+            "mirrors": {m: s.as_dict() for m, s in self._stats.items()},
+        }
@@ -0,0 +1,308 @@
+"""
+Persistent cache backends
+
+A CacheStore is the second tier behind a TTLCache: entries survive restarts
+and, because SQLite runs in WAL mode, are shared by every uvicorn worker on
+the same host. All SQLite work happens on one dedicated thread so the event
+loop never blocks on disk I/O.
+
+Reads stay read-only: hit counts (which pick the warm-start entries) are
+tallied in memory and written in one batch every HIT_FLUSH_SECONDS or
+HIT_FLUSH_KEYS distinct keys, and on close, rather than one write
+transaction per lookup.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+_FORMAT_ZJSON = b"z"  # 1-byte header: zlib-compressed compact JSON
+
+
+def encode_value(value: Any) -> bytes:
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _FORMAT_ZJSON + zlib.compress(raw, 6)
+
+
+def decode_value(blob: bytes) -> Any:
+    if blob[:1] != _FORMAT_ZJSON:
+        raise ValueError("Unknown cache value format")
+    return json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+
+
+def encode_key(key: Hashable) -> str:
+    # JSON keeps str keys and tuple keys (lat/lon, ...) unambiguous
+    return json.dumps(key, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_key(raw: str) -> Hashable:
+    key = json.loads(raw)
+    return tuple(key) if isinstance(key, list) else key
+
+
+class CacheStore(ABC):
+    """Async interface every persistent backend implements.
+
+    `get` and `hot_entries` return values with their remaining TTL in seconds
+    so the in-memory tier can expire them at the same moment.
+    """
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """(value, seconds of TTL left), or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, namespace: str, key: Hashable, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds, replacing any existing entry"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: Hashable) -> None:
+        """Remove the entry if present"""
+
+    @abstractmethod
+    async def hot_entries(self, namespace: str, limit: int) -> List[Tuple[Hashable, Any, float]]:
+        """Up to `limit` live entries, most read first, as (key, value, ttl_left)"""
+
+    async def get_many(self, namespace: str, keys: Sequence[Hashable]) -> Dict[Hashable, Tuple[Any, float]]:
+        """{key: (value, ttl_left)} for the keys that are present; backends override
+        this to read them in one round-trip"""
+        found = {}
+        for key in keys:
+            hit = await self.get(namespace, key)
+            if hit is not None:
+                found[key] = hit
+        return found
+
+    async def set_many(self, namespace: str, items: Sequence[Tuple[Hashable, Any, float]]) -> None:
+        """Store (key, value, ttl) triples; backends override this to write them in one go"""
+        for key, value, ttl in items:
+            await self.set(namespace, key, value, ttl)
+
+
+class SQLiteStore(CacheStore):
+    """SQLite (WAL mode) key-value store shared by all workers on one host"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache (
+        namespace  TEXT NOT NULL,
+        key        TEXT NOT NULL,
+        value      BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        hits       INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_cache_hot ON cache (namespace, hits DESC);
+    """
+
+    HIT_FLUSH_SECONDS = 30.0
+    HIT_FLUSH_KEYS = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+        self._conn: Optional[sqlite3.Connection] = None
+        # (namespace, key) -> hits not yet written; only touched on the executor thread
+        self._pending_hits: Dict[Tuple[str, str], int] = {}
+        self._hits_flushed_at = time.monotonic()
+        self.hit_flushes = 0
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # ---------- lifecycle ----------
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(self.SCHEMA)
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+        self._conn = conn
+
+    async def open(self) -> None:
+        await self._run(self._open)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._flush_hits()
+            except sqlite3.Error as e:
+                print(f"  Persistent cache hit flush failed on close: {e}")
+            self._conn.close()
+            self._conn = None
+
+    async def close(self) -> None:
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    # ---------- operations ----------
+    def _get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)).fetchone()
+        if row is None:
+            return None
+        ttl_left = row[1] - time.time()
+        if ttl_left <= 0:
+            return None
+        self._count_hits(namespace, [key])
+        return decode_value(row[0]), ttl_left
+
+    def _count_hits(self, namespace: str, keys: List[str]) -> None:
+        for key in keys:
+            slot = (namespace, key)
+            self._pending_hits[slot] = self._pending_hits.get(slot, 0) + 1
+        if (len(self._pending_hits) >= self.HIT_FLUSH_KEYS
+                or time.monotonic() - self._hits_flushed_at >= self.HIT_FLUSH_SECONDS):
+            try:
+                self._flush_hits()
+            except sqlite3.Error as e:  # counts are only a warm-start hint; never fail the read
+                self.errors += 1
+                print(f"  Persistent cache hit flush failed: {e}")
+
+    def _flush_hits(self) -> None:
+        self._hits_flushed_at = time.monotonic()
+        if not self._pending_hits:
+            return
+        pending, self._pending_hits = self._pending_hits, {}
+        self._conn.executemany("UPDATE cache SET hits = hits + ? WHERE namespace = ? AND key = ?",
+                               [(n, ns, key) for (ns, key), n in pending.items()])
+        self._conn.commit()
+        self.hit_flushes += 1
+
+    async def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        if self._conn is None:
+            return None
+        self.reads += 1
+        try:
+            return await self._run(self._get, namespace, encode_key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"  Persistent cache read failed ({namespace}): {e}")
+            return None
+
+    def _set(self, namespace: str, key: str, blob: bytes, expires_at: float) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO cache (namespace, key, value, expires_at, hits, updated_at) "
+            "VALUES (?, ?, ?, ?, 0, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+            (namespace, key, blob, expires_at, now))
+        self._conn.commit()
+
+    async def set(self, namespace: str, key: Hashable, value: Any, ttl: float) -> None:
+        if self._conn is None:
+            return
+        self.writes += 1
+        try:
+            blob = encode_value(value)
+            await self._run(self._set, namespace, encode_key(key), blob, time.time() + ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"  Persistent cache write failed ({namespace}): {e}")
+
+    SQL_MAX_VARS = 500  # stay well under SQLite's bound-parameter limit
+
+    def _get_many(self, namespace: str, keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+        now = time.time()
+        found = {}
+        for i in range(0, len(keys), self.SQL_MAX_VARS):
+            chunk = keys[i:i + self.SQL_MAX_VARS]
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM cache WHERE namespace = ? AND expires_at > ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                (namespace, now, *chunk)).fetchall()
+            for k, v, exp in rows:
+                found[k] = (decode_value(v), exp - now)
+        if found:
+            self._count_hits(namespace, list(found))
+        return found
+
+    async def get_many(self, namespace: str, keys: Sequence[Hashable]) -> Dict[Hashable, Tuple[Any, float]]:
+        if self._conn is None or not keys:
+            return {}
+        self.reads += 1
+        encoded = {encode_key(key): key for key in keys}
+        try:
+            found = await self._run(self._get_many, namespace, list(encoded))
+        except Exception as e:
+            self.errors += 1
+            print(f"  Persistent cache read failed ({namespace}, {len(keys)} keys): {e}")
+            return {}
+        return {encoded[k]: hit for k, hit in found.items()}
+
+    def _set_many(self, namespace: str, rows: List[Tuple[str, bytes, float]]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO cache (namespace, key, value, expires_at, hits, updated_at) "
+            "VALUES (?, ?, ?, ?, 0, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+            [(namespace, key, blob, expires_at, now) for key, blob, expires_at in rows])
+        self._conn.commit()
+
+    async def set_many(self, namespace: str, items: Sequence[Tuple[Hashable, Any, float]]) -> None:
+        if self._conn is None or not items:
+            return
+        self.writes += 1
+        try:
+            now = time.time()
+            rows = [(encode_key(key), encode_value(value), now + ttl) for key, value, ttl in items]
+            await self._run(self._set_many, namespace, rows)
+        except Exception as e:
+            self.errors += 1
+            print(f"  Persistent cache write failed ({namespace}, {len(items)} keys): {e}")
+
+    def _delete(self, namespace: str, key: str) -> None:
+        self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+        self._conn.commit()
+
+    async def delete(self, namespace: str, key: Hashable) -> None:
+        if self._conn is None:
+            return
+        await self._run(self._delete, namespace, encode_key(key))
+
+    def _hot_entries(self, namespace: str, limit: int) -> List[Tuple[Hashable, Any, float]]:
+        self._flush_hits()
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT key, value, expires_at FROM cache "
+            "WHERE namespace = ? AND expires_at > ? ORDER BY hits DESC LIMIT ?",
+            (namespace, now, limit)).fetchall()
+        return [(decode_key(k), decode_value(v), exp - now) for k, v, exp in rows]
+
+    async def hot_entries(self, namespace: str, limit: int) -> List[Tuple[Hashable, Any, float]]:
+        if self._conn is None:
+            return []
+        try:
+            return await self._run(self._hot_entries, namespace, limit)
+        except Exception as e:
+            self.errors += 1
+            print(f"  Persistent cache warm-up failed ({namespace}): {e}")
+            return []
+
+    def stats(self) -> dict:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"backend": "sqlite-wal", "path": self.path, "file_bytes": size,
+                "reads": self.reads, "writes": self.writes, "errors": self.errors,
+                "pending_hits": len(self._pending_hits), "hit_flushes": self.hit_flushes}
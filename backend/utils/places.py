@@ -0,0 +1,140 @@
+"""
+Resolved-place records
+
+/generate-trip, /plan-halfday and the chatbot all need the same things out of
+a geocode result: which city to search attractions in, the region, the
+country and the kind of place. Deriving them means string heuristics over
+the Nominatim display_name, so they are computed once per (query, geocode
+result) and memoised in a small TTL cache. The geocode dict itself is never
+touched: it is the shared cached object, and endpoints return it as-is
+under "coordinates".
+"""
+
+import re
+from typing import Any, Dict, Hashable, Optional
+
+from .cache import TTLCache, DAY
+
+
+# Country names that must never be mistaken for a city
+COUNTRY_NAMES = frozenset({
+    "india", "united states", "united kingdom", "france", "japan", "china",
+    "thailand", "indonesia", "italy", "spain", "turkey", "germany", "australia",
+    "brazil", "canada", "mexico", "russia", "south africa", "egypt", "morocco",
+    "sri lanka", "nepal", "bangladesh", "pakistan", "myanmar", "cambodia", "vietnam",
+    "south korea", "north korea", "new zealand", "argentina", "chile", "colombia",
+    "peru", "portugal", "netherlands", "belgium", "switzerland", "austria", "greece",
+    "czech republic", "poland", "sweden", "norway", "denmark", "finland", "ireland",
+    "scotland", "wales", "england",
+})
+ADMIN_WORDS = ("district", "tehsil", "ward", "state", "pin", "taluk", "division",
+               "zone", "region", "province", "county", "department", "prefecture",
+               "municipality", "block", "circle", "sub-division", "mandal")
+_ADMIN_RE = re.compile("|".join(map(re.escape, ADMIN_WORDS)))
+
+# Known major cities, for picking the city out of a long display_name
+MAJOR_CITIES = frozenset({
+    "mumbai", "delhi", "bangalore", "bengaluru", "chennai", "kolkata", "hyderabad",
+    "pune", "ahmedabad", "jaipur", "lucknow", "surat", "kanpur", "nagpur", "indore",
+    "bhopal", "visakhapatnam", "patna", "vadodara", "ghaziabad", "ludhiana", "agra",
+    "varanasi", "coimbatore", "kochi", "thiruvananthapuram", "mysore", "mysuru",
+    "goa", "chandigarh", "shimla", "manali", "rishikesh", "dehradun", "amritsar",
+    "new delhi", "noida", "gurgaon", "gurugram", "faridabad", "thane", "navi mumbai",
+    "paris", "london", "tokyo", "rome", "barcelona", "istanbul", "bangkok", "dubai",
+    "singapore", "amsterdam", "cairo", "seoul", "prague", "vienna", "lisbon", "sydney",
+    "hanoi", "new york", "bali", "kathmandu", "colombo", "kuala lumpur",
+})
+# One pass per display_name part instead of a substring test per city; longest name wins
+_MAJOR_CITY_RE = re.compile("|".join(map(re.escape, sorted(MAJOR_CITIES, key=len, reverse=True))))
+
+REGION_TYPES = ("administrative", "state", "boundary")
+ADDRESS_FIELDS = ("city", "town", "village", "municipality", "county", "state", "country")
+
+_resolved_cache = TTLCache("resolved_places", maxsize=5000, ttl=DAY, max_bytes=4 * 1024 * 1024)
+
+
+def _trip_city(query: str, geo: Dict[str, Any], parts: list, addr_city: str) -> str:
+    """City to search attractions in for a trip to `query`.
+    Doesn't confuse state names with country names: a state/region the user typed
+    (like Goa) is searched as-is."""
+    if geo.get("type", "") in REGION_TYPES or geo.get("class", "") == "boundary":
+        return query
+    if addr_city and addr_city.lower() not in COUNTRY_NAMES:
+        return addr_city
+    # Valid city candidates from display_name parts, skipping countries and admin terms
+    candidates = [p for p in parts if len(p) > 2
+                  and p.lower() not in COUNTRY_NAMES
+                  and not p.isdigit()
+                  and not _ADMIN_RE.search(p.lower())]
+    if not candidates:
+        return query
+    # If the user typed a simple name like "Goa", prefer their input;
+    # otherwise the first candidate is usually the place itself and the second the city
+    if len(query.split()) <= 2 and len(query) < 20:
+        return query
+    return candidates[1] if len(candidates) > 1 else candidates[0]
+
+
+def _local_city(query: str, parts: list) -> str:
+    """City around a specific spot (half-day plans, chatbot suggestions)"""
+    for part in parts:
+        part_lower = part.lower()
+        if part_lower in MAJOR_CITIES:
+            return part
+        # Also a part containing the city name (e.g., "Mumbai Zone 6")
+        if len(part_lower) < 30:
+            m = _MAJOR_CITY_RE.search(part_lower)
+            if m:
+                return m.group(0).title()
+
+    # Fallback: the user's input (usually the city is the last word)
+    user_parts = query.replace(",", " ").split()
+    city = user_parts[-1] if len(user_parts) > 1 else query
+    if len(city) >= 3:
+        return city
+    # Final fallback: 3rd-5th display_name component (skip the specific place)
+    for part in parts[2:5]:
+        if len(part) > 3 and not part.isdigit():
+            return part
+    return city
+
+
+def _memo_key(query: str, geo: Dict[str, Any]) -> Hashable:
+    """Everything the derivation reads, so equal inputs share one memo entry"""
+    addr = geo.get("address") or {}
+    return (query, geo.get("display_name", ""), geo.get("type", ""),
+            geo.get("class", ""), tuple(addr.get(f) or "" for f in ADDRESS_FIELDS))
+
+
+def resolve_place(query: str, geo: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical city/region/country/type for a geocode result (memoised; `geo` is not modified)"""
+    key = query.lower().strip()
+    memo_key = _memo_key(query.strip(), geo)
+    cached = _resolved_cache.get(memo_key)
+    if cached is not None:
+        return cached
+
+    addr = geo.get("address") or {}
+    parts = [p.strip() for p in geo.get("display_name", "").split(",") if p.strip()]
+    addr_city = (addr.get("city") or addr.get("town") or addr.get("village")
+                 or addr.get("municipality") or addr.get("county") or "")
+    country = addr.get("country") or (parts[-1] if parts else "")
+    region = addr.get("state") or next(
+        (p for p in reversed(parts[:-1]) if not p.isdigit() and p.lower() not in COUNTRY_NAMES), "")
+
+    resolved = {
+        "query": key,
+        "trip_city": _trip_city(query.strip(), geo, parts, addr_city),
+        "city": _local_city(query.strip(), parts),
+        "region": region,
+        "country": country,
+        "place_type": geo.get("type", ""),
+        "place_class": geo.get("class", ""),
+    }
+    _resolved_cache.set(memo_key, resolved)
+    return resolved
+
+
+def trip_city(query: str, geo: Optional[Dict[str, Any]]) -> str:
+    """Attraction-search city for `query` (what the user typed when there's no geocode)"""
+    return resolve_place(query, geo)["trip_city"] if geo else query
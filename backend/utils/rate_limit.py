@@ -0,0 +1,182 @@
+"""
+Per-host rate-limited dispatch (token bucket + priority queue)
+
+Some upstreams publish hard request-rate policies (Nominatim: 1 req/s,
+absolute). Every request to such a host goes through its HostRateLimiter:
+
+  - a token bucket (rate, burst) decides when the next request may leave
+  - waiting requests form a priority queue: interactive callers (a user is
+    waiting on the response) jump ahead of background work (pack warmer,
+    stale-while-revalidate refreshes)
+  - identical GETs already queued or in flight are coalesced: late callers
+    await the first caller's response instead of spending another token
+  - when the queue is deep, background requests are shed (RateLimitedError)
+    rather than delaying interactive ones further
+  - a 429 pauses the bucket for the server's Retry-After
+
+Priority travels in a ContextVar so call sites don't thread it through:
+wrap background work in `with background_priority():`.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def background_priority():
+    """Requests made inside this block (and tasks spawned from it) queue as background work"""
+    token = request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class RateLimitedError(Exception):
+    """Background request shed because the host's queue is backed up"""
+
+
+class HostRateLimiter:
+    """Token bucket with a priority wait queue and in-flight request coalescing"""
+
+    def __init__(self, host: str, rate: float, burst: int = 1, max_background_queue: int = 8):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_background_queue = max_background_queue
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._seq = itertools.count()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # heap of (priority, seq, future)
+        self._scheduler: Optional[asyncio.Task] = None
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._wait_times: Deque[float] = deque(maxlen=500)
+        self.sent = 0
+        self.coalesced = 0
+        self.shed = 0
+        self.pauses = 0
+
+    # ---------- token bucket ----------
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> bool:
+        if time.monotonic() < self._paused_until:
+            return False
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def pause(self, seconds: float) -> None:
+        """Upstream said slow down (429): send nothing for `seconds`"""
+        self.pauses += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def _next_token_in(self) -> float:
+        self._refill()
+        wait = max(0.0, (1 - self._tokens) / self.rate)
+        return max(wait, self._paused_until - time.monotonic())
+
+    # ---------- queue ----------
+    def depth(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    async def _acquire(self, priority: int) -> None:
+        if not self._waiters and self._take():
+            self._wait_times.append(0.0)
+            return
+        if priority >= BACKGROUND and self.depth() >= self.max_background_queue:
+            self.shed += 1
+            raise RateLimitedError(f"{self.host} queue full ({self.depth()} waiting); background request shed")
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.ensure_future(self._schedule())
+        queued_at = time.monotonic()
+        await waiter  # a cancelled caller leaves a cancelled future; the scheduler skips it
+        self._wait_times.append(time.monotonic() - queued_at)
+
+    async def _schedule(self) -> None:
+        """Hand out tokens to waiters, best priority first, as the bucket refills"""
+        while self._waiters:
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)  # caller gave up
+            if not self._waiters:
+                break
+            if self._take():
+                heapq.heappop(self._waiters)[2].set_result(None)
+            else:
+                await asyncio.sleep(self._next_token_in())
+
+    async def submit(self, key: Optional[Hashable], send: Callable[[], Awaitable[Any]],
+                     priority: Optional[int] = None) -> Any:
+        """Run `send()` once a token is available. Callers with the same non-None `key`
+        while one is queued or in flight share its result."""
+        if key is not None:
+            shared = self._pending.get(key)
+            if shared is not None:
+                self.coalesced += 1
+                try:
+                    return await asyncio.shield(shared)
+                except asyncio.CancelledError:
+                    if not shared.cancelled():
+                        raise  # we were cancelled, not the shared request
+                    # The original caller gave up before sending; queue our own request
+
+        shared = asyncio.get_running_loop().create_future()
+        shared.add_done_callback(lambda f: f.cancelled() or f.exception())  # no "never retrieved" noise
+        if key is not None:
+            self._pending[key] = shared
+        try:
+            await self._acquire(request_priority.get() if priority is None else priority)
+            self.sent += 1
+            result = await send()
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            if key is not None and self._pending.get(key) is shared:
+                del self._pending[key]
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_times)
+
+        def pct(q: float) -> float:
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.depth(),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "shed": self.shed,
+            "pauses": self.pauses,
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+        }
@@ -0,0 +1,162 @@
+"""
+Fast JSON responses and negotiated compression
+
+FastJSONResponse serialises with orjson (when installed; stdlib json
+otherwise) and is the app's default response class. Endpoints with big
+nested payloads (/generate-trip, /nearby, /plan-halfday) return one directly,
+which also skips FastAPI's jsonable_encoder pass over the whole dict.
+
+CompressionMiddleware compresses complete response bodies with brotli (when
+the optional `brotli` package is installed and the client accepts br) or
+gzip. Only single-message bodies are compressed: streamed responses such as
+/generate-trip/stream NDJSON pass through untouched, so their events are
+never held back in a compressor buffer.
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+try:  # br support needs the optional `brotli` package
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _default(obj: Any) -> Any:
+    """Values the JSON encoders don't know: numpy scalars/arrays, sets, pydantic models"""
+    if hasattr(obj, "tolist"):  # numpy scalar or array
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ---------- compression ----------
+_stats = {"responses": 0, "compressed": 0, "bytes_in": 0, "bytes_out": 0, "br": 0, "gzip": 0}
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' or None for an Accept-Encoding header (br preferred when available)"""
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """Compresses complete (non-streamed) responses of at least `minimum_size` bytes"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held until we know whether the body comes in one piece
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            initial, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=initial["headers"])
+            _stats["responses"] += 1
+            if (message.get("more_body", False) or len(body) < self.minimum_size
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                await send(initial)
+                await send(message)
+                return
+            compressed = self._compress(body, encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) >= len(body):
+                await send(initial)
+                await send(message)
+                return
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            _stats["compressed"] += 1
+            _stats[encoding] += 1
+            _stats["bytes_in"] += len(body)
+            _stats["bytes_out"] += len(compressed)
+            await send(initial)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def compression_stats() -> Dict[str, Any]:
+    ratio = _stats["bytes_out"] / _stats["bytes_in"] if _stats["bytes_in"] else 0.0
+    return {
+        **_stats,
+        "ratio": round(ratio, 3),
+        "orjson": orjson is not None,
+        "brotli": brotli is not None,
+    }
@@ -0,0 +1,95 @@
+"""
+Single-flight request coalescing
+
+When many coroutines ask for the same key at once (50 users planning
+"Jaipur"), only the first one runs the upstream fetch; the rest await the
+same in-flight task. The task is shielded so a cancelled caller never
+cancels the shared work for everybody else.
+
+`do_many` does the same per key for batched upstreams: keys already in
+flight are joined, and only the rest go out together in one new batch.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+_NOT_FOUND = object()
+
+# All groups created in this process, by name
+FLIGHTS: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        FLIGHTS[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    async def do_many(self, keys: Sequence[Hashable],
+                      fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, T]]]) -> Dict[Hashable, T]:
+        """Results for `keys`, where `fn(keys_not_in_flight)` fetches one batch and returns
+        {key: value}. Keys the batch leaves out or fails on are missing from the result."""
+        tasks: Dict[Hashable, asyncio.Task] = {}
+        own = []
+        for key in dict.fromkeys(keys):
+            self.calls += 1
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                tasks[key] = task
+            else:
+                own.append(key)
+        if own:
+            batch = asyncio.ensure_future(fn(own))
+            self.executions += 1
+            for key in own:
+                task = asyncio.ensure_future(self._pick(batch, key))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t, key=key: self._finish(key, t))
+                tasks[key] = task
+        values = await asyncio.gather(*(asyncio.shield(t) for t in tasks.values()), return_exceptions=True)
+        return {key: value for key, value in zip(tasks, values)
+                if value is not _NOT_FOUND and not isinstance(value, BaseException)}
+
+    @staticmethod
+    async def _pick(batch: "asyncio.Future", key: Hashable) -> Any:
+        return (await batch).get(key, _NOT_FOUND)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered single-flight group"""
+    return {name: group.stats() for name, group in FLIGHTS.items()}
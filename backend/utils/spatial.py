@@ -0,0 +1,159 @@
+"""
+Grid spatial index over lat/lon
+
+Points are projected onto a local equirectangular plane (metres) and bucketed
+into square cells, so near-duplicate checks, radius filters and k-nearest
+queries only look at a handful of neighbouring cells instead of every POI.
+Exact distances are great-circle metres, computed for all candidates of a
+query in one vectorized call (see distance.py).
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .distance import one_to_many
+
+METRES_PER_DEG_LAT = 111320.0
+
+Cell = Tuple[int, int]
+
+
+class SpatialIndex:
+    """Uniform-grid index of (lat, lon, item) points.
+
+    `cell_m` should be around the typical query radius: small enough that a
+    dedup check touches ~9 cells, large enough that radius queries don't walk
+    thousands of empty ones. The projection is anchored at the first point's
+    latitude (or `ref_lat`), which is accurate to well under 1% across a city.
+    """
+
+    def __init__(self, cell_m: float = 500.0, ref_lat: Optional[float] = None):
+        self.cell_m = cell_m
+        self._ref_lat = ref_lat
+        self._m_per_deg_lon = 0.0 if ref_lat is None else self._lon_scale(ref_lat)
+        self._cells: Dict[Cell, List[int]] = {}
+        self._lats: List[float] = []
+        self._lons: List[float] = []
+        self._items: List[Any] = []
+
+    @staticmethod
+    def _lon_scale(lat: float) -> float:
+        return METRES_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        if self._ref_lat is None:
+            self._ref_lat = lat
+            self._m_per_deg_lon = self._lon_scale(lat)
+        return (math.floor(lat * METRES_PER_DEG_LAT / self.cell_m),
+                math.floor(lon * self._m_per_deg_lon / self.cell_m))
+
+    # ---------- building ----------
+    def insert(self, lat: float, lon: float, item: Any = None) -> int:
+        """Add a point and return its index"""
+        idx = len(self._lats)
+        self._lats.append(lat)
+        self._lons.append(lon)
+        self._items.append(item)
+        self._cells.setdefault(self._cell(lat, lon), []).append(idx)
+        return idx
+
+    def replace(self, idx: int, item: Any) -> None:
+        """Swap the payload stored at `idx` (same location)"""
+        self._items[idx] = item
+
+    def __len__(self) -> int:
+        return len(self._lats)
+
+    def __getitem__(self, idx: int) -> Any:
+        return self._items[idx]
+
+    def items(self) -> List[Any]:
+        return list(self._items)
+
+    # ---------- queries ----------
+    def _cells_within(self, lat: float, lon: float, radius_m: float) -> Iterable[List[int]]:
+        if not math.isfinite(radius_m):
+            yield from self._cells.values()
+            return
+        cy, cx = self._cell(lat, lon)
+        span = int(math.ceil(radius_m / self.cell_m))
+        # Wide radius over a sparse grid: walk occupied cells instead of the full square
+        if (2 * span + 1) ** 2 > len(self._cells):
+            for (y, x), bucket in self._cells.items():
+                if abs(y - cy) <= span and abs(x - cx) <= span:
+                    yield bucket
+            return
+        for y in range(cy - span, cy + span + 1):
+            for x in range(cx - span, cx + span + 1):
+                bucket = self._cells.get((y, x))
+                if bucket:
+                    yield bucket
+
+    def _measure(self, lat: float, lon: float, candidates: List[int]) -> List[Tuple[float, int]]:
+        """(distance_m, index) for each candidate, in one vectorized call"""
+        if not candidates:
+            return []
+        dists = one_to_many(lat, lon, [self._lats[i] for i in candidates],
+                            [self._lons[i] for i in candidates])
+        return list(zip(dists.tolist(), candidates))
+
+    def find_near(self, lat: float, lon: float, within_m: float) -> Optional[int]:
+        """Index of the closest existing point within `within_m` metres, or None"""
+        candidates = [idx for bucket in self._cells_within(lat, lon, within_m) for idx in bucket]
+        hits = [hit for hit in self._measure(lat, lon, candidates) if hit[0] <= within_m]
+        return min(hits)[1] if hits else None
+
+    def within(self, lat: float, lon: float, radius_m: float) -> List[Tuple[float, Any]]:
+        """All (distance_m, item) pairs within `radius_m`, nearest first"""
+        candidates = [idx for bucket in self._cells_within(lat, lon, radius_m) for idx in bucket]
+        found = sorted(hit for hit in self._measure(lat, lon, candidates) if hit[0] <= radius_m)
+        return [(dist, self._items[idx]) for dist, idx in found]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[float, Any]]:
+        """The k closest (distance_m, item) pairs, nearest first"""
+        if not self._lats or k <= 0:
+            return []
+        cy, cx = self._cell(lat, lon)
+        max_ring = max(max(abs(y - cy), abs(x - cx)) for y, x in self._cells)
+        found: List[Tuple[float, int]] = []
+        for ring in range(max_ring + 1):
+            ring_candidates = []
+            for y in range(cy - ring, cy + ring + 1):
+                step = 1 if abs(y - cy) == ring else 2 * ring
+                for x in range(cx - ring, cx + ring + 1, max(step, 1)):
+                    ring_candidates.extend(self._cells.get((y, x), ()))
+            found.extend(self._measure(lat, lon, ring_candidates))
+            # Anything beyond this ring is at least ring * cell_m away
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= ring * self.cell_m:
+                    break
+        found.sort()
+        return [(dist, self._items[idx]) for dist, idx in found[:k]]
+
+
+def dedupe_by_location(items: Iterable[Dict[str, Any]], within_m: float,
+                       prefer: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None,
+                       lat_key: str = "lat", lon_key: str = "lon") -> List[Dict[str, Any]]:
+    """Drop items that sit within `within_m` of an earlier one, keeping input order.
+
+    `prefer(new, existing)` may return True to let a later duplicate replace the
+    one already kept (e.g. an English name over a transliterated one).
+    """
+    index = SpatialIndex(cell_m=max(within_m, 1.0))
+    kept: List[Dict[str, Any]] = []
+    for item in items:
+        lat, lon = item.get(lat_key), item.get(lon_key)
+        if lat is None or lon is None:
+            kept.append(item)
+            continue
+        lat, lon = float(lat), float(lon)
+        dup = index.find_near(lat, lon, within_m)
+        if dup is None:
+            index.insert(lat, lon, len(kept))
+            kept.append(item)
+        elif prefer is not None:
+            slot = index[dup]
+            if prefer(item, kept[slot]):
+                kept[slot] = item
+    return kept
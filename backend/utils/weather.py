@@ -0,0 +1,110 @@
+"""
+Compact per-grid-cell weather forecasts
+
+Open-Meteo's forecast models resolve roughly 0.1°, so every coordinate is
+snapped to a 0.1° cell: the same city geocoded from different strings (or a
+hotel and an attraction a few km apart) shares one cached forecast. Each
+cell always holds the full 7-day horizon in columnar arrays; a request for
+fewer days is a slice, so overlapping 3/5/7-day requests cost one call.
+Rows are dated in the location's own timezone (timezone=auto), so "today"
+is worked out from the cell's UTC offset, not the server's clock.
+"""
+
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+GRID_DEG = 0.1
+FORECAST_DAYS = 7  # Open-Meteo free tier horizon; always fetch all of it
+
+# WMO weather interpretation codes -> (description, icon, risk level)
+WMO_CODES: Dict[int, Tuple[str, str, str]] = {
+    0: ("Clear sky", "☀️", "low"),
+    1: ("Mainly clear", "🌤️", "low"),
+    2: ("Partly cloudy", "⛅", "low"),
+    3: ("Overcast", "☁️", "medium"),
+    45: ("Fog", "🌫️", "medium"),
+    48: ("Rime fog", "🌫️", "medium"),
+    51: ("Light drizzle", "🌦️", "medium"),
+    53: ("Moderate drizzle", "🌦️", "medium"),
+    55: ("Dense drizzle", "🌧️", "high"),
+    61: ("Slight rain", "🌧️", "medium"),
+    63: ("Moderate rain", "🌧️", "high"),
+    65: ("Heavy rain", "🌧️", "high"),
+    71: ("Slight snow", "🌨️", "high"),
+    73: ("Moderate snow", "🌨️", "high"),
+    75: ("Heavy snow", "❄️", "high"),
+    80: ("Slight showers", "🌦️", "medium"),
+    81: ("Moderate showers", "🌧️", "high"),
+    82: ("Violent showers", "⛈️", "high"),
+    95: ("Thunderstorm", "⛈️", "high"),
+    96: ("Thunderstorm + hail", "⛈️", "high"),
+    99: ("Thunderstorm + heavy hail", "⛈️", "high"),
+}
+UNKNOWN_WMO = ("Unknown", "🌤️", "low")
+
+
+def weather_cell(lat: float, lon: float) -> Tuple[int, int]:
+    """Grid cell holding (lat, lon)"""
+    return (round(lat / GRID_DEG), round(lon / GRID_DEG))
+
+
+def cell_center(cell: Tuple[int, int]) -> Tuple[float, float]:
+    return (round(cell[0] * GRID_DEG, 4), round(cell[1] * GRID_DEG, 4))
+
+
+class ForecastColumns:
+    """One cell's daily forecast as parallel arrays (one row per date)"""
+
+    __slots__ = ("dates", "temp_max", "temp_min", "precip", "codes", "utc_offset_seconds")
+
+    def __init__(self, dates: List[str], temp_max: List[float], temp_min: List[float],
+                 precip: List[float], codes: List[int], utc_offset_seconds: int = 0):
+        self.dates = dates
+        self.temp_max = array("f", temp_max)
+        self.temp_min = array("f", temp_min)
+        self.precip = array("f", precip)
+        self.codes = array("h", codes)
+        self.utc_offset_seconds = utc_offset_seconds
+
+    @classmethod
+    def from_open_meteo(cls, payload: Dict[str, Any]) -> "ForecastColumns":
+        """Columns from a full Open-Meteo response (daily block plus utc_offset_seconds)"""
+        daily = payload.get("daily") or {}
+        dates = daily.get("time", [])
+        n = len(dates)
+
+        def column(name: str, fallback: float) -> List[float]:
+            values = daily.get(name) or []
+            return [values[i] if i < len(values) and values[i] is not None else fallback for i in range(n)]
+
+        return cls(dates, column("temperature_2m_max", 25), column("temperature_2m_min", 15),
+                   column("precipitation_probability_max", 0), [int(c) for c in column("weathercode", 0)],
+                   int(payload.get("utc_offset_seconds") or 0))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def local_today(self) -> date:
+        """Current date at the forecast location"""
+        return (datetime.now(timezone.utc) + timedelta(seconds=self.utc_offset_seconds)).date()
+
+    def forecasts(self, days: int, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Up to `days` per-day dicts starting at the location's today (earlier rows are skipped)"""
+        first = (today or self.local_today()).isoformat()
+        skip = next((i for i, d in enumerate(self.dates) if d >= first), len(self.dates))
+        out = []
+        for i in range(skip, min(len(self.dates), skip + days)):
+            code = int(self.codes[i])
+            description, icon, risk = WMO_CODES.get(code, UNKNOWN_WMO)
+            out.append({
+                "date": self.dates[i],
+                "temp_max": round(self.temp_max[i], 1),
+                "temp_min": round(self.temp_min[i], 1),
+                "precipitation_probability": int(self.precip[i]),
+                "description": description,
+                "icon": icon,
+                "risk_level": risk,  # low, medium, high
+                "weather_code": code,
+            })
+        return out
@@ -143,6 +143,7 @@ function init() {
     initMap();
     setupEventListeners();
     connectWebSocket();
+    loadMediaTemplates();
     setInterval(updateAgentPulse, 3000);
     document.getElementById('startDate').valueAsDate = new Date();
     
@@ -824,8 +825,7 @@ async function generateFallbackItinerary(dest, duration, budget, startDate) {
             name: a.name, type: a.type, time: times[i % times.length], duration: a.duration,
             cost: a.cost, rating: a.rating, description: a.desc, lat: a.lat, lon: a.lon,
             reviews_count: Math.floor(Math.random() * 50000 + 5000),
-            photos: a.photos || [],
-            media: { photos: a.photos || [], videos: {}, maps: {}, reviews: {}, links: {} }
+            photos: a.photos || []
         }));
         days.push({
             day: d + 1, date: date.toISOString().split('T')[0], city: dest,
@@ -1643,6 +1643,61 @@ function addNearbyToMap(places, userLat, userLon) {
     map.fitBounds(L.latLngBounds(allCoords), { padding: [40, 40], maxZoom: 16 });
 }
 
+// ============================================
+// MEDIA LINKS
+// Activities carry only name/lat/lon/wiki; link templates come once from
+// /media-templates and are expanded here when a modal opens
+// ============================================
+const MEDIA_TEMPLATES_FALLBACK = {
+    videos: {
+        youtube: 'https://www.youtube.com/results?search_query={q}+travel+guide',
+        virtual_tour: 'https://www.youtube.com/results?search_query={q}+virtual+tour+4k',
+    },
+    reviews: {
+        google: 'https://www.google.com/search?q={q}+reviews',
+        tripadvisor: 'https://www.tripadvisor.com/Search?q={q}',
+    },
+    maps: {
+        google: 'https://www.google.com/maps/search/?api=1&query={lat},{lon}',
+        directions: 'https://www.google.com/maps/dir/?api=1&destination={lat},{lon}',
+    },
+    links: {
+        wiki: 'https://en.wikipedia.org/wiki/{wiki}',
+        booking: 'https://www.google.com/search?q={q}+tickets+booking',
+    },
+};
+let mediaTemplates = null;
+
+async function loadMediaTemplates() {
+    if (mediaTemplates) return mediaTemplates;
+    try {
+        const res = await fetch(`${API_BASE}/media-templates`, { signal: AbortSignal.timeout(3000) });
+        if (res.ok) mediaTemplates = (await res.json()).templates;
+    } catch (e) { /* backend offline: built-in copy */ }
+    return mediaTemplates || MEDIA_TEMPLATES_FALLBACK;
+}
+
+// Wiki titles may already be percent-encoded ("Elliot%27s_Beach"): decode before encoding
+function safeDecode(text) {
+    try { return decodeURIComponent(text); } catch (e) { return text; }
+}
+
+function activityMedia(act) {
+    const fields = {
+        q: encodeURIComponent(act.name),
+        lat: act.lat, lon: act.lon,
+        wiki: encodeURIComponent(act.wiki ? safeDecode(act.wiki) : act.name.replace(/ /g, '_')),
+    };
+    const media = { photos: act.photos || [] };
+    for (const [group, links] of Object.entries(mediaTemplates || MEDIA_TEMPLATES_FALLBACK)) {
+        media[group] = {};
+        for (const [key, template] of Object.entries(links)) {
+            media[group][key] = template.replace(/\{(\w+)\}/g, (_, f) => fields[f] ?? '');
+        }
+    }
+    return media;
+}
+
 // ============================================
 // MEDIA MODAL
 // ============================================
@@ -1651,7 +1706,7 @@ function openMediaModal(dayIdx, actIdx) {
     if (!act) return;
     const modal = document.getElementById('mediaModal');
     document.getElementById('modalTitle').textContent = act.name;
-    const q = encodeURIComponent(act.name);
+    const media = activityMedia(act);
 
     const photos = act.photos?.filter(p => p) || [];
     document.getElementById('modalPhotos').innerHTML = photos.length
@@ -1667,25 +1722,25 @@ function openMediaModal(dayIdx, actIdx) {
     }
 
     document.getElementById('modalVideos').innerHTML = `
-    <a href="https://www.youtube.com/results?search_query=${q}+travel+guide" target="_blank" class="media-link-btn youtube"><i class="fab fa-youtube"></i> Travel Guide</a>
-    <a href="https://www.youtube.com/results?search_query=${q}+virtual+tour+4k" target="_blank" class="media-link-btn youtube"><i class="fas fa-vr-cardboard"></i> Virtual Tour</a>`;
+    <a href="${media.videos.youtube}" target="_blank" class="media-link-btn youtube"><i class="fab fa-youtube"></i> Travel Guide</a>
+    <a href="${media.videos.virtual_tour}" target="_blank" class="media-link-btn youtube"><i class="fas fa-vr-cardboard"></i> Virtual Tour</a>`;
 
     const mapDiv = document.getElementById('modalMapEmbed');
     mapDiv.innerHTML = act.lat && act.lon ? `<iframe src="https://www.openstreetmap.org/export/embed.html?bbox=${act.lon - 0.01},${act.lat - 0.01},${act.lon + 0.01},${act.lat + 0.01}&layer=mapnik&marker=${act.lat},${act.lon}" style="width:100%;height:100%;border:none;border-radius:var(--radius)"></iframe>` : '<p class="text-muted">Map unavailable</p>';
 
     document.getElementById('modalMaps').innerHTML = `
-    <a href="https://www.google.com/maps/search/?api=1&query=${act.lat},${act.lon}" target="_blank" class="media-link-btn google"><i class="fas fa-map-marked-alt"></i> Google Maps</a>
-    <a href="https://www.google.com/maps/dir/?api=1&destination=${act.lat},${act.lon}" target="_blank" class="media-link-btn google"><i class="fas fa-directions"></i> Directions</a>`;
+    <a href="${media.maps.google}" target="_blank" class="media-link-btn google"><i class="fas fa-map-marked-alt"></i> Google Maps</a>
+    <a href="${media.maps.directions}" target="_blank" class="media-link-btn google"><i class="fas fa-directions"></i> Directions</a>`;
 
     const fullStars = Math.floor(act.rating);
     document.getElementById('modalRating').innerHTML = `<div class="rating-big">${act.rating}</div><div><div class="rating-stars">${Array.from({length:5}, (_,i) => `<span class="star ${i < fullStars ? '' : 'empty'}">${i < fullStars ? '★' : '☆'}</span>`).join('')}</div><div class="rating-label">${(act.reviews_count || 0).toLocaleString()} reviews</div></div>`;
     document.getElementById('modalReviews').innerHTML = `
-    <a href="https://www.google.com/search?q=${q}+reviews" target="_blank" class="media-link-btn google"><i class="fab fa-google"></i> Google Reviews</a>
-    <a href="https://www.tripadvisor.com/Search?q=${q}" target="_blank" class="media-link-btn tripadvisor"><i class="fab fa-tripadvisor"></i> TripAdvisor</a>`;
+    <a href="${media.reviews.google}" target="_blank" class="media-link-btn google"><i class="fab fa-google"></i> Google Reviews</a>
+    <a href="${media.reviews.tripadvisor}" target="_blank" class="media-link-btn tripadvisor"><i class="fab fa-tripadvisor"></i> TripAdvisor</a>`;
 
     document.getElementById('modalLinks').innerHTML = `
-    <a href="https://en.wikipedia.org/wiki/${q.replace(/%20/g, '_')}" target="_blank" class="media-link-btn wiki"><i class="fab fa-wikipedia-w"></i> Wikipedia</a>
-    <a href="https://www.google.com/search?q=${q}+tickets+booking" target="_blank" class="media-link-btn"><i class="fas fa-ticket-alt"></i> Tickets</a>`;
+    <a href="${media.links.wiki}" target="_blank" class="media-link-btn wiki"><i class="fab fa-wikipedia-w"></i> Wikipedia</a>
+    <a href="${media.links.booking}" target="_blank" class="media-link-btn"><i class="fas fa-ticket-alt"></i> Tickets</a>`;
 
     document.getElementById('modalInfo').innerHTML = `
     <div class="info-badge"><i class="fas fa-clock"></i> ${act.duration}</div>
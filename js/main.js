@@ -421,7 +421,7 @@ function displayItinerary(itinerary) {
                                     <span>⏱️ ${activity.duration}</span>
                                     <span>💰 ₹${(activity.cost || 0).toLocaleString()}</span>
                                 </div>
-                                <button class="activity-media-btn" onclick="event.stopPropagation(); showActivityMedia('${activity.name}', ${JSON.stringify(activity.media).replace(/"/g, '&quot;')})">
+                                <button class="activity-media-btn" onclick="event.stopPropagation(); showActivityDetails(${index}, ${actIndex})">
                                     📸 View Photos & Videos
                                 </button>
                             </div>
@@ -640,9 +640,7 @@ window.showActivityDetails = function(dayIndex, activityIndex) {
     if (!currentItinerary) return;
     
     const activity = currentItinerary.days[dayIndex]?.activities[activityIndex];
-    if (!activity || !activity.media) return;
-    
-    showActivityMedia(activity.name, activity.media);
+    openActivityMedia(activity);  // fetches the links on demand (map.js)
 };
 
 // ============================================
@@ -7,6 +7,7 @@ let map = null;
 let markers = [];
 let routePolyline = null;
 let markerCluster = null;
+let mapActivities = [];
 
 // Color scheme for activity types
 const ACTIVITY_COLORS = {
@@ -197,6 +198,7 @@ function updateMapWithItinerary(itinerary) {
     console.log('🗺️  Updating map with itinerary:', itinerary);
 
     clearMarkers();
+    mapActivities = [];
 
     const allCoordinates = [];
     let activityCounter = 1;
@@ -231,15 +233,18 @@ function updateMapWithItinerary(itinerary) {
             const marker = L.marker([lat, lon], { icon: markerIcon })
                 .addTo(map);
 
+            mapActivities.push(activity);
+            const activityIndex = mapActivities.length - 1;
+
             // Create popup content
             const popupContent = `
                 <div class="popup-title">${activity.name}</div>
                 <div class="popup-info">⏰ ${activity.time || 'N/A'} • ${activity.duration || 'N/A'}</div>
                 <div class="popup-info">📍 Day ${day.day} • ${activity.type || 'Activity'}</div>
                 <div class="popup-cost">💰 ₹${activity.cost || 0}</div>
-                ${activity.media ? `<button class="popup-media-btn" onclick="showActivityMedia('${activity.name}', ${JSON.stringify(activity.media).replace(/"/g, '&quot;')})">
+                <button class="popup-media-btn" onclick="openActivityMedia(mapActivities[${activityIndex}])">
                     📸 View Photos & Videos
-                </button>` : ''}
+                </button>
             `;
 
             marker.bindPopup(popupContent, {
@@ -291,6 +296,28 @@ function updateMapWithItinerary(itinerary) {
     }
 }
 
+// Itineraries carry only name/lat/lon/wiki per activity; the links are
+// fetched from the server when the user opens one (and kept on the activity)
+window.loadActivityMedia = async function(activity) {
+    if (activity.media) return activity.media;
+    const params = new URLSearchParams({ name: activity.name, lat: activity.lat, lon: activity.lon });
+    if (activity.wiki) params.set('wiki', activity.wiki);
+    const response = await fetch(`${CONFIG.API_BASE_URL}/activity/${activity.id || '_'}/media?${params}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    activity.media = (await response.json()).media;
+    return activity.media;
+};
+
+window.openActivityMedia = async function(activity) {
+    if (!activity) return;
+    try {
+        showActivityMedia(activity.name, await loadActivityMedia(activity));
+    } catch (error) {
+        console.error('Failed to load media for:', activity.name, error);
+        showToast('Could not load photos & videos', 'warning');
+    }
+};
+
 // Show activity media modal
 window.showActivityMedia = function(activityName, media) {
     if (!media) {
@@ -322,7 +349,7 @@ window.showActivityMedia = function(activityName, media) {
     const videoLinks = document.getElementById('modalVideoLinks');
     if (videoLinks && media.videos) {
         videoLinks.innerHTML = `
-            <a href="${media.videos.youtube_search}" target="_blank" class="link-btn">
+            <a href="${media.videos.youtube}" target="_blank" class="link-btn">
                 <i class="fab fa-youtube"></i> Watch on YouTube
             </a>
         `;
@@ -348,8 +375,8 @@ window.showActivityMedia = function(activityName, media) {
             <a href="${media.maps.google}" target="_blank" class="link-btn">
                 <i class="fas fa-map-marked-alt"></i> Google Maps
             </a>
-            <a href="${media.maps.osm}" target="_blank" class="link-btn">
-                <i class="fas fa-map"></i> OpenStreetMap
+            <a href="${media.maps.directions}" target="_blank" class="link-btn">
+                <i class="fas fa-directions"></i> Directions
             </a>
         `;
     }